@@ -1,4 +1,3 @@
-import os
 import sys
 from logging.config import fileConfig
 from os.path import abspath, dirname
@@ -11,6 +10,7 @@ from alembic import context
 load_dotenv()
 sys.path.insert(0, dirname(dirname(abspath(__file__))))
 from app.db.base import Base
+from app.core.config import DATABASE_URL
 
 config = context.config
 if config.config_file_name is not None:
@@ -18,20 +18,29 @@ if config.config_file_name is not None:
 
 target_metadata = Base.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Search structures are managed by app/db/search_index.py, not the models
+    if reflected and compare_to is None:
+        if type_ == "table" and "_fts" in name:
+            return False
+        if type_ == "index" and name.endswith("_trgm"):
+            return False
+    return True
+
 def run_migrations_offline() -> None:
-    url = os.getenv("DATABASE_URL")
     context.configure(
-        url=url,
+        url=DATABASE_URL,
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
     with context.begin_transaction():
         context.run_migrations()
 
 def run_migrations_online() -> None:
-    db_url = os.getenv("DATABASE_URL")
-    config.set_main_option("sqlalchemy.url", db_url)
+    config.set_main_option("sqlalchemy.url", DATABASE_URL)
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -39,7 +48,8 @@ def run_migrations_online() -> None:
     )
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object,
         )
         with context.begin_transaction():
             context.run_migrations()
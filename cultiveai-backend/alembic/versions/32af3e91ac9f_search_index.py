@@ -0,0 +1,142 @@
+"""search index for clients and properties
+
+Revision ID: 32af3e91ac9f
+Revises: 6667d08e192a
+Create Date: 2026-10-19 09:20:07.552871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '32af3e91ac9f'
+down_revision: Union[str, Sequence[str], None] = '6667d08e192a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Search structures as of this revision, copied from app/db/search_index.py so that
+# later changes there do not change what this migration creates
+
+
+def _sqlite_digits(column: str) -> str:
+    expr = f"coalesce({column}, '')"
+    for char in (".", "-", "/", "(", ")", " ", "+"):
+        expr = f"replace({expr}, '{char}', '')"
+    return expr
+
+
+_SQLITE_CLIENT_VALUES = (
+    "{row}.name, {row}.email, {row}.city, "
+    + _sqlite_digits("{row}.document") + ", " + _sqlite_digits("{row}.phone")
+)
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5(
+        name, email, city, document_digits, phone_digits,
+        content='', prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS properties_fts USING fts5(
+        name, city, client_name,
+        content='', prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS clients_fts_ai AFTER INSERT ON clients BEGIN
+        INSERT INTO clients_fts(rowid, name, email, city, document_digits, phone_digits)
+        VALUES (new.id, {_SQLITE_CLIENT_VALUES.format(row="new")});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS clients_fts_ad AFTER DELETE ON clients BEGIN
+        INSERT INTO clients_fts(clients_fts, rowid, name, email, city, document_digits, phone_digits)
+        VALUES ('delete', old.id, {_SQLITE_CLIENT_VALUES.format(row="old")});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS clients_fts_au AFTER UPDATE ON clients BEGIN
+        INSERT INTO clients_fts(clients_fts, rowid, name, email, city, document_digits, phone_digits)
+        VALUES ('delete', old.id, {_SQLITE_CLIENT_VALUES.format(row="old")});
+        INSERT INTO clients_fts(rowid, name, email, city, document_digits, phone_digits)
+        VALUES (new.id, {_SQLITE_CLIENT_VALUES.format(row="new")});
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS clients_fts_au_name AFTER UPDATE OF name ON clients
+    WHEN old.name IS NOT new.name BEGIN
+        INSERT INTO properties_fts(properties_fts, rowid, name, city, client_name)
+        SELECT 'delete', p.id, p.name, p.city, old.name FROM properties p WHERE p.client_id = old.id;
+        INSERT INTO properties_fts(rowid, name, city, client_name)
+        SELECT p.id, p.name, p.city, new.name FROM properties p WHERE p.client_id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS clients_fts_bd BEFORE DELETE ON clients BEGIN
+        INSERT INTO properties_fts(properties_fts, rowid, name, city, client_name)
+        SELECT 'delete', p.id, p.name, p.city, old.name FROM properties p WHERE p.client_id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS properties_fts_ai AFTER INSERT ON properties BEGIN
+        INSERT INTO properties_fts(rowid, name, city, client_name)
+        SELECT new.id, new.name, new.city, c.name FROM clients c WHERE c.id = new.client_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS properties_fts_ad AFTER DELETE ON properties BEGIN
+        INSERT INTO properties_fts(properties_fts, rowid, name, city, client_name)
+        SELECT 'delete', old.id, old.name, old.city, c.name FROM clients c WHERE c.id = old.client_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS properties_fts_au AFTER UPDATE ON properties BEGIN
+        INSERT INTO properties_fts(properties_fts, rowid, name, city, client_name)
+        SELECT 'delete', old.id, old.name, old.city, c.name FROM clients c WHERE c.id = old.client_id;
+        INSERT INTO properties_fts(rowid, name, city, client_name)
+        SELECT new.id, new.name, new.city, c.name FROM clients c WHERE c.id = new.client_id;
+    END""",
+]
+
+SQLITE_BACKFILL = [
+    f"""INSERT INTO clients_fts(rowid, name, email, city, document_digits, phone_digits)
+        SELECT clients.id, {_SQLITE_CLIENT_VALUES.format(row="clients")} FROM clients""",
+    """INSERT INTO properties_fts(rowid, name, city, client_name)
+        SELECT p.id, p.name, p.city, c.name FROM properties p JOIN clients c ON c.id = p.client_id""",
+]
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # unaccent() is only STABLE; an IMMUTABLE wrapper is required for indexing
+    """CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS
+        $$ SELECT public.unaccent('public.unaccent', $1) $$
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT""",
+    "CREATE INDEX IF NOT EXISTS ix_clients_search_trgm ON clients USING gin "
+    "((f_unaccent(lower(clients.name || ' ' || coalesce(clients.email, '') || ' ' || coalesce(clients.city, '')))) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_clients_name_trgm ON clients USING gin ((f_unaccent(lower(clients.name))) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_clients_document_trgm ON clients USING gin "
+    "((regexp_replace(coalesce(clients.document, ''), '\\D', '', 'g')) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_clients_phone_trgm ON clients USING gin "
+    "((regexp_replace(coalesce(clients.phone, ''), '\\D', '', 'g')) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_properties_search_trgm ON properties USING gin "
+    "((f_unaccent(lower(properties.name || ' ' || coalesce(properties.city, '')))) gin_trgm_ops)",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        statements = SQLITE_DDL + SQLITE_BACKFILL
+    elif dialect == 'postgresql':
+        statements = POSTGRES_DDL
+    else:
+        return
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in (
+            'clients_fts_ai', 'clients_fts_ad', 'clients_fts_au', 'clients_fts_au_name', 'clients_fts_bd',
+            'properties_fts_ai', 'properties_fts_ad', 'properties_fts_au',
+        ):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS properties_fts')
+        op.execute('DROP TABLE IF EXISTS clients_fts')
+    elif dialect == 'postgresql':
+        for index in (
+            'ix_clients_search_trgm', 'ix_clients_name_trgm', 'ix_clients_document_trgm',
+            'ix_clients_phone_trgm', 'ix_properties_search_trgm',
+        ):
+            op.execute(f'DROP INDEX IF EXISTS {index}')
+        op.execute('DROP FUNCTION IF EXISTS f_unaccent(text)')
@@ -0,0 +1,106 @@
+"""baseline schema
+
+Revision ID: 6667d08e192a
+Revises: 
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6667d08e192a'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('full_name', sa.String(length=255), nullable=True),
+        sa.Column('is_active', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+
+    op.create_table(
+        'clients',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('document', sa.String(length=20), nullable=True),
+        sa.Column('phone', sa.String(length=20), nullable=True),
+        sa.Column('email', sa.String(length=255), nullable=True),
+        sa.Column('address', sa.String(length=500), nullable=True),
+        sa.Column('city', sa.String(length=100), nullable=True),
+        sa.Column('state', sa.String(length=2), nullable=True),
+        sa.Column('notes', sa.String(length=1000), nullable=True),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_clients_id'), 'clients', ['id'], unique=False)
+
+    op.create_table(
+        'properties',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('total_area_hectares', sa.Float(), nullable=True),
+        sa.Column('geojson_boundary', sa.JSON(), nullable=True),
+        sa.Column('city', sa.String(length=100), nullable=True),
+        sa.Column('state', sa.String(length=2), nullable=True),
+        sa.Column('notes', sa.String(length=1000), nullable=True),
+        sa.Column('client_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['client_id'], ['clients.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_properties_id'), 'properties', ['id'], unique=False)
+
+    op.create_table(
+        'analysis_reports',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('title', sa.String(length=255), nullable=True),
+        sa.Column('owner_id', sa.Integer(), nullable=True),
+        sa.Column('property_id', sa.Integer(), nullable=True),
+        sa.Column('aoi_geojson', sa.JSON(), nullable=False),
+        sa.Column('aoi_area_hectares', sa.Float(), nullable=True),
+        sa.Column('analysis_period', sa.JSON(), nullable=True),
+        sa.Column('satellite_image_info', sa.JSON(), nullable=True),
+        sa.Column('ndvi_stats', sa.JSON(), nullable=True),
+        sa.Column('degradation_summary', sa.JSON(), nullable=True),
+        sa.Column('ai_description', sa.Text(), nullable=True),
+        sa.Column('map_layers_urls', sa.JSON(), nullable=True),
+        sa.Column('report_html', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['property_id'], ['properties.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_analysis_reports_id'), 'analysis_reports', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_analysis_reports_id'), table_name='analysis_reports')
+    op.drop_table('analysis_reports')
+    op.drop_index(op.f('ix_properties_id'), table_name='properties')
+    op.drop_table('properties')
+    op.drop_index(op.f('ix_clients_id'), table_name='clients')
+    op.drop_table('clients')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
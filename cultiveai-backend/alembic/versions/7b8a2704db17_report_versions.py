@@ -0,0 +1,33 @@
+"""report versions
+
+Revision ID: 7b8a2704db17
+Revises: c8f2d6a9e417
+Create Date: 2026-10-20 09:02:14.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b8a2704db17'
+down_revision: Union[str, Sequence[str], None] = 'c8f2d6a9e417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('analysis_reports', 'change_reports')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Plain ALTER TABLE (SQLite >= 3.35), as in b8d2f4e6a193
+    for table in TABLES:
+        op.execute(f'ALTER TABLE {table} DROP COLUMN version')
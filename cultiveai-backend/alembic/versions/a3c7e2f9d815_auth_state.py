@@ -0,0 +1,34 @@
+"""auth state
+
+Revision ID: a3c7e2f9d815
+Revises: f1b9d3a7c462
+Create Date: 2026-10-19 20:21:45.907214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c7e2f9d815'
+down_revision: Union[str, Sequence[str], None] = 'f1b9d3a7c462'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    auth_state = op.create_table(
+        'auth_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.bulk_insert(auth_state, [{'id': 1, 'version': 0}])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('auth_state')
@@ -0,0 +1,39 @@
+"""property paddocks
+
+Revision ID: a8d4e1f7c035
+Revises: f3c7a2e5b918
+Create Date: 2026-10-20 03:02:51.740166
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d4e1f7c035'
+down_revision: Union[str, Sequence[str], None] = 'f3c7a2e5b918'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        # SQLite accepts an inline REFERENCES on ADD COLUMN, but not ALTER ... ADD CONSTRAINT
+        op.execute('ALTER TABLE properties ADD COLUMN paddocks_geometry_id INTEGER REFERENCES geometries (id)')
+    else:
+        op.add_column('properties', sa.Column('paddocks_geometry_id', sa.Integer(), nullable=True))
+        op.create_foreign_key(
+            'properties_paddocks_geometry_id_fkey', 'properties', 'geometries', ['paddocks_geometry_id'], ['id']
+        )
+    op.create_index(op.f('ix_properties_paddocks_geometry_id'), 'properties', ['paddocks_geometry_id'], unique=False)
+    op.add_column('analysis_reports', sa.Column('paddock_summary', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('analysis_reports', 'paddock_summary')
+    op.drop_index(op.f('ix_properties_paddocks_geometry_id'), table_name='properties')
+    op.execute('ALTER TABLE properties DROP COLUMN paddocks_geometry_id')
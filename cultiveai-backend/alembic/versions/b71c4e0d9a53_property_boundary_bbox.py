@@ -0,0 +1,85 @@
+"""property boundary bbox
+
+Revision ID: b71c4e0d9a53
+Revises: fdd2208057c8
+Create Date: 2026-10-19 11:02:17.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import shapely
+from shapely.errors import GEOSException
+from shapely.geometry import shape
+from shapely.ops import unary_union
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71c4e0d9a53'
+down_revision: Union[str, Sequence[str], None] = 'fdd2208057c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BBOX_COLUMNS = ('bbox_min_lon', 'bbox_min_lat', 'bbox_max_lon', 'bbox_max_lat')
+
+# Geometry helpers as of this revision, copied from app/services/geometry_service.py so that
+# later changes there do not change what this migration backfills
+
+
+def _to_shape(geojson):
+    """A GeoJSON FeatureCollection, Feature or bare geometry as one shapely geometry (None if unparsable)."""
+    if not geojson or not isinstance(geojson, dict):
+        return None
+    try:
+        kind = geojson.get('type')
+        if kind == 'FeatureCollection':
+            geoms = [shape(f['geometry']) for f in geojson.get('features', []) if f.get('geometry')]
+        elif kind == 'Feature':
+            geoms = [shape(geojson['geometry'])] if geojson.get('geometry') else []
+        else:
+            geoms = [shape(geojson)]
+        if not geoms:
+            return None
+        geom = geoms[0] if len(geoms) == 1 else unary_union(geoms)
+        if not geom.is_valid:
+            geom = shapely.make_valid(geom)
+        return None if geom.is_empty else geom
+    except (GEOSException, KeyError, TypeError, ValueError, AttributeError):
+        return None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in BBOX_COLUMNS:
+        op.add_column('properties', sa.Column(column, sa.Float(), nullable=True))
+
+    # Backfill from the stored GeoJSON (PostGIS is not part of the stack)
+    properties = sa.table(
+        'properties', sa.column('id', sa.Integer), sa.column('geojson_boundary', sa.JSON),
+        *(sa.column(column, sa.Float) for column in BBOX_COLUMNS)
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(properties.c.id, properties.c.geojson_boundary)
+        .where(properties.c.geojson_boundary.isnot(None))
+    ).all()
+    updates = []
+    for property_id, boundary in rows:
+        geom = _to_shape(boundary)
+        if geom is not None:
+            updates.append({'pid': property_id, **dict(zip(BBOX_COLUMNS, geom.bounds))})
+    if updates:
+        bind.execute(
+            properties.update()
+            .where(properties.c.id == sa.bindparam('pid'))
+            .values({column: sa.bindparam(column) for column in BBOX_COLUMNS}),
+            updates,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Plain ALTER TABLE (SQLite >= 3.35): a batch table copy would drop the search triggers
+    for column in reversed(BBOX_COLUMNS):
+        op.execute(f'ALTER TABLE properties DROP COLUMN {column}')
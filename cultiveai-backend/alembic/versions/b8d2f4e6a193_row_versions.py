@@ -0,0 +1,33 @@
+"""row versions
+
+Revision ID: b8d2f4e6a193
+Revises: a3c7e2f9d815
+Create Date: 2026-10-19 21:12:30.448172
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d2f4e6a193'
+down_revision: Union[str, Sequence[str], None] = 'a3c7e2f9d815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('clients', 'properties')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Plain ALTER TABLE (SQLite >= 3.35): a batch table copy would drop the search triggers
+    for table in TABLES:
+        op.execute(f'ALTER TABLE {table} DROP COLUMN version')
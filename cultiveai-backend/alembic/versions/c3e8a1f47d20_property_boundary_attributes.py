@@ -0,0 +1,130 @@
+"""property boundary attributes
+
+Revision ID: c3e8a1f47d20
+Revises: b71c4e0d9a53
+Create Date: 2026-10-19 18:04:51.230417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+import shapely
+from shapely.errors import GEOSException
+from shapely.geometry import shape
+from shapely.ops import unary_union
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8a1f47d20'
+down_revision: Union[str, Sequence[str], None] = 'b71c4e0d9a53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NEW_COLUMNS = (
+    ('boundary_area_hectares', sa.Float),
+    ('centroid_lon', sa.Float),
+    ('centroid_lat', sa.Float),
+    ('vertex_count', sa.Integer),
+)
+
+# Geometry helpers as of this revision, copied from app/services/geometry_service.py so that
+# later changes there do not change what this migration backfills
+
+
+def _to_shape(geojson):
+    """A GeoJSON FeatureCollection, Feature or bare geometry as one shapely geometry (None if unparsable)."""
+    if not geojson or not isinstance(geojson, dict):
+        return None
+    try:
+        kind = geojson.get('type')
+        if kind == 'FeatureCollection':
+            geoms = [shape(f['geometry']) for f in geojson.get('features', []) if f.get('geometry')]
+        elif kind == 'Feature':
+            geoms = [shape(geojson['geometry'])] if geojson.get('geometry') else []
+        else:
+            geoms = [shape(geojson)]
+        if not geoms:
+            return None
+        geom = geoms[0] if len(geoms) == 1 else unary_union(geoms)
+        if not geom.is_valid:
+            geom = shapely.make_valid(geom)
+        return None if geom.is_empty else geom
+    except (GEOSException, KeyError, TypeError, ValueError, AttributeError):
+        return None
+
+
+# WGS84 equatorial radius, the sphere Leaflet.draw's geodesicArea uses in the map
+EARTH_RADIUS_M = 6378137.0
+
+
+def _ring_area_m2(coords: np.ndarray) -> float:
+    lon, lat = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+    excess = (lon[1:] - lon[:-1]) * (2 + np.sin(lat[:-1]) + np.sin(lat[1:]))
+    return abs(float(excess.sum())) * EARTH_RADIUS_M ** 2 / 2
+
+
+def _geodesic_area_m2(geom) -> float:
+    area = 0.0
+    for part in shapely.get_parts(geom):
+        if part.geom_type == 'Polygon':
+            area += _ring_area_m2(np.asarray(part.exterior.coords))
+            area -= sum(_ring_area_m2(np.asarray(ring.coords)) for ring in part.interiors)
+        elif part.geom_type in ('MultiPolygon', 'GeometryCollection'):
+            area += _geodesic_area_m2(part)
+    return area
+
+
+def _boundary_attributes(geom) -> dict:
+    centroid = geom.centroid
+    return {
+        'boundary_area_hectares': round(_geodesic_area_m2(geom) / 10000, 4),
+        'centroid_lon': centroid.x,
+        'centroid_lat': centroid.y,
+        'vertex_count': int(shapely.get_num_coordinates(geom)),
+    }
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column, type_ in NEW_COLUMNS:
+        op.add_column('properties', sa.Column(column, type_(), nullable=True))
+
+    # Backfill from the stored GeoJSON; a missing total_area_hectares gets the computed area
+    properties = sa.table(
+        'properties', sa.column('id', sa.Integer), sa.column('geojson_boundary', sa.JSON),
+        sa.column('total_area_hectares', sa.Float),
+        *(sa.column(column, type_) for column, type_ in NEW_COLUMNS)
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(properties.c.id, properties.c.geojson_boundary, properties.c.total_area_hectares)
+        .where(properties.c.geojson_boundary.isnot(None))
+    ).all()
+    updates = []
+    for property_id, boundary, total_area in rows:
+        geom = _to_shape(boundary)
+        if geom is None:
+            continue
+        attributes = _boundary_attributes(geom)
+        values = {column: attributes[column] for column, _ in NEW_COLUMNS}
+        values['total_area'] = total_area if total_area is not None else attributes['boundary_area_hectares']
+        updates.append({'pid': property_id, **values})
+    if updates:
+        bind.execute(
+            properties.update()
+            .where(properties.c.id == sa.bindparam('pid'))
+            .values({
+                'total_area_hectares': sa.bindparam('total_area'),
+                **{column: sa.bindparam(column) for column, _ in NEW_COLUMNS},
+            }),
+            updates,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Plain ALTER TABLE (SQLite >= 3.35): a batch table copy would drop the search triggers
+    for column, _ in reversed(NEW_COLUMNS):
+        op.execute(f'ALTER TABLE properties DROP COLUMN {column}')
@@ -0,0 +1,117 @@
+"""client digits trigram search
+
+Revision ID: c8f2d6a9e417
+Revises: a8d4e1f7c035
+Create Date: 2026-10-20 04:11:37.902518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f2d6a9e417'
+down_revision: Union[str, Sequence[str], None] = 'a8d4e1f7c035'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Search structures as of this revision, copied from app/db/search_index.py so that
+# later changes there do not change what this migration creates.
+# PostgreSQL already matches digits anywhere (LIKE '%...%' on trigram indexes): SQLite only.
+
+
+def _sqlite_digits(column: str) -> str:
+    expr = f"coalesce({column}, '')"
+    for char in (".", "-", "/", "(", ")", " ", "+"):
+        expr = f"replace({expr}, '{char}', '')"
+    return expr
+
+
+CLIENT_TEXT = "{row}.name, {row}.email, {row}.city"
+CLIENT_DIGITS = _sqlite_digits("{row}.document") + ", " + _sqlite_digits("{row}.phone")
+CLIENT_TRIGGERS = ('clients_fts_ai', 'clients_fts_ad', 'clients_fts_au')
+
+UPGRADE = [
+    """CREATE VIRTUAL TABLE clients_fts USING fts5(
+        name, email, city,
+        content='', prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE VIRTUAL TABLE clients_digits_fts USING fts5(
+        document_digits, phone_digits, content='', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER clients_fts_ai AFTER INSERT ON clients BEGIN
+        INSERT INTO clients_fts(rowid, name, email, city)
+        VALUES (new.id, {CLIENT_TEXT.format(row="new")});
+        INSERT INTO clients_digits_fts(rowid, document_digits, phone_digits)
+        VALUES (new.id, {CLIENT_DIGITS.format(row="new")});
+    END""",
+    f"""CREATE TRIGGER clients_fts_ad AFTER DELETE ON clients BEGIN
+        INSERT INTO clients_fts(clients_fts, rowid, name, email, city)
+        VALUES ('delete', old.id, {CLIENT_TEXT.format(row="old")});
+        INSERT INTO clients_digits_fts(clients_digits_fts, rowid, document_digits, phone_digits)
+        VALUES ('delete', old.id, {CLIENT_DIGITS.format(row="old")});
+    END""",
+    f"""CREATE TRIGGER clients_fts_au AFTER UPDATE ON clients BEGIN
+        INSERT INTO clients_fts(clients_fts, rowid, name, email, city)
+        VALUES ('delete', old.id, {CLIENT_TEXT.format(row="old")});
+        INSERT INTO clients_fts(rowid, name, email, city)
+        VALUES (new.id, {CLIENT_TEXT.format(row="new")});
+        INSERT INTO clients_digits_fts(clients_digits_fts, rowid, document_digits, phone_digits)
+        VALUES ('delete', old.id, {CLIENT_DIGITS.format(row="old")});
+        INSERT INTO clients_digits_fts(rowid, document_digits, phone_digits)
+        VALUES (new.id, {CLIENT_DIGITS.format(row="new")});
+    END""",
+    f"""INSERT INTO clients_fts(rowid, name, email, city)
+        SELECT clients.id, {CLIENT_TEXT.format(row="clients")} FROM clients""",
+    f"""INSERT INTO clients_digits_fts(rowid, document_digits, phone_digits)
+        SELECT clients.id, {CLIENT_DIGITS.format(row="clients")} FROM clients""",
+]
+
+# The single prefix-matched table of 32af3e91ac9f
+OLD_VALUES = CLIENT_TEXT + ", " + CLIENT_DIGITS
+DOWNGRADE = [
+    """CREATE VIRTUAL TABLE clients_fts USING fts5(
+        name, email, city, document_digits, phone_digits,
+        content='', prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER clients_fts_ai AFTER INSERT ON clients BEGIN
+        INSERT INTO clients_fts(rowid, name, email, city, document_digits, phone_digits)
+        VALUES (new.id, {OLD_VALUES.format(row="new")});
+    END""",
+    f"""CREATE TRIGGER clients_fts_ad AFTER DELETE ON clients BEGIN
+        INSERT INTO clients_fts(clients_fts, rowid, name, email, city, document_digits, phone_digits)
+        VALUES ('delete', old.id, {OLD_VALUES.format(row="old")});
+    END""",
+    f"""CREATE TRIGGER clients_fts_au AFTER UPDATE ON clients BEGIN
+        INSERT INTO clients_fts(clients_fts, rowid, name, email, city, document_digits, phone_digits)
+        VALUES ('delete', old.id, {OLD_VALUES.format(row="old")});
+        INSERT INTO clients_fts(rowid, name, email, city, document_digits, phone_digits)
+        VALUES (new.id, {OLD_VALUES.format(row="new")});
+    END""",
+    f"""INSERT INTO clients_fts(rowid, name, email, city, document_digits, phone_digits)
+        SELECT clients.id, {OLD_VALUES.format(row="clients")} FROM clients""",
+]
+
+
+def _rebuild(statements) -> None:
+    # Contentless tables cannot drop a column: rebuild the clients index from the table
+    for trigger in CLIENT_TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS clients_digits_fts')
+    op.execute('DROP TABLE IF EXISTS clients_fts')
+    for statement in statements:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        _rebuild(UPGRADE)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        _rebuild(DOWNGRADE)
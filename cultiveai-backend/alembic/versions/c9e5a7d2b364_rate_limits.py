@@ -0,0 +1,42 @@
+"""rate limits
+
+Revision ID: c9e5a7d2b364
+Revises: b8d2f4e6a193
+Create Date: 2026-10-19 22:40:12.518903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e5a7d2b364'
+down_revision: Union[str, Sequence[str], None] = 'b8d2f4e6a193'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'rate_limits',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('route_class', sa.String(length=20), nullable=False),
+        sa.Column('per_minute', sa.Float(), nullable=True),
+        sa.Column('burst', sa.Float(), nullable=True),
+        sa.Column('concurrency', sa.Integer(), nullable=True),
+        sa.Column('weight', sa.Float(), nullable=True),
+        sa.Column('tokens', sa.Float(), server_default='0', nullable=False),
+        sa.Column('refilled_at', sa.Float(), server_default='0', nullable=False),
+        sa.Column('in_flight', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('admitted_at', sa.Float(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'route_class'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rate_limits')
@@ -0,0 +1,121 @@
+"""shared geometries table
+
+Revision ID: d5f0b2c86e14
+Revises: c3e8a1f47d20
+Create Date: 2026-10-19 18:21:06.874105
+
+"""
+import hashlib
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f0b2c86e14'
+down_revision: Union[str, Sequence[str], None] = 'c3e8a1f47d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+# (table, old JSON column, new foreign key column)
+REFERENCES = (
+    ('properties', 'geojson_boundary', 'boundary_geometry_id'),
+    ('analysis_reports', 'aoi_geojson', 'aoi_geometry_id'),
+)
+
+geometries = sa.table(
+    'geometries', sa.column('id', sa.Integer), sa.column('hash', sa.String), sa.column('geojson', sa.JSON)
+)
+
+
+def _geometry_hash(geojson) -> str:
+    """Content address of a GeoJSON document, as app.crud.crud_geometry computed it at this revision."""
+    canonical = json.dumps(geojson, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _batches(bind, table, columns):
+    """Rows of `table` in id order, BATCH_SIZE at a time (reports can be large)."""
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, *columns).where(table.c.id > last_id).order_by(table.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'geometries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('geojson', sa.JSON(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('hash'),
+    )
+    op.create_index(op.f('ix_geometries_id'), 'geometries', ['id'], unique=False)
+    bind = op.get_bind()
+    for table_name, _, fk_column in REFERENCES:
+        if bind.dialect.name == 'sqlite':
+            # SQLite accepts an inline REFERENCES on ADD COLUMN, but not ALTER ... ADD CONSTRAINT
+            op.execute(f'ALTER TABLE {table_name} ADD COLUMN {fk_column} INTEGER REFERENCES geometries (id)')
+        else:
+            op.add_column(table_name, sa.Column(fk_column, sa.Integer(), nullable=True))
+            op.create_foreign_key(f'{table_name}_{fk_column}_fkey', table_name, 'geometries', [fk_column], ['id'])
+        op.create_index(op.f(f'ix_{table_name}_{fk_column}'), table_name, [fk_column], unique=False)
+
+    # Move every document into geometries, storing each distinct one once
+    known = {}
+    for table_name, json_column, fk_column in REFERENCES:
+        table = sa.table(table_name, sa.column('id', sa.Integer), sa.column(json_column, sa.JSON),
+                         sa.column(fk_column, sa.Integer))
+        for rows in _batches(bind, table, [table.c[json_column]]):
+            updates = []
+            for row_id, geojson in rows:
+                if geojson is None:
+                    continue
+                digest = _geometry_hash(geojson)
+                if digest not in known:
+                    known[digest] = bind.execute(
+                        geometries.insert().values(hash=digest, geojson=geojson).returning(geometries.c.id)
+                    ).scalar_one()
+                updates.append({'rid': row_id, 'gid': known[digest]})
+            if updates:
+                bind.execute(
+                    table.update().where(table.c.id == sa.bindparam('rid')).values({fk_column: sa.bindparam('gid')}),
+                    updates,
+                )
+
+    if bind.dialect.name == 'postgresql':
+        # SQLite cannot add NOT NULL to an existing column without a table copy (which drops the search triggers)
+        op.alter_column('analysis_reports', 'aoi_geometry_id', existing_type=sa.Integer(), nullable=False)
+    for table_name, json_column, _ in REFERENCES:
+        # Plain ALTER TABLE (SQLite >= 3.35): a batch table copy would drop the search triggers
+        op.execute(f'ALTER TABLE {table_name} DROP COLUMN {json_column}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    for table_name, json_column, fk_column in REFERENCES:
+        op.add_column(table_name, sa.Column(json_column, sa.JSON(), nullable=True))
+        table = sa.table(table_name, sa.column('id', sa.Integer), sa.column(json_column, sa.JSON),
+                         sa.column(fk_column, sa.Integer))
+        bind.execute(table.update().values({
+            json_column: sa.select(geometries.c.geojson).where(geometries.c.id == table.c[fk_column]).scalar_subquery()
+        }))
+        if bind.dialect.name == 'postgresql' and json_column == 'aoi_geojson':
+            op.alter_column(table_name, json_column, existing_type=sa.JSON(), nullable=False)
+        op.drop_index(op.f(f'ix_{table_name}_{fk_column}'), table_name=table_name)
+        op.execute(f'ALTER TABLE {table_name} DROP COLUMN {fk_column}')
+    op.drop_index(op.f('ix_geometries_id'), table_name='geometries')
+    op.drop_table('geometries')
@@ -0,0 +1,101 @@
+"""geometry simplifications
+
+Revision ID: e6b3d9f2a471
+Revises: d4a8f1c6e927
+Create Date: 2026-10-20 00:41:12.508316
+
+"""
+import math
+from typing import Sequence, Union
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+import shapely
+from shapely.errors import GEOSException
+from shapely.geometry import mapping, shape
+from shapely.ops import unary_union
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b3d9f2a471'
+down_revision: Union[str, Sequence[str], None] = 'd4a8f1c6e927'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Simplification as of this revision, copied from app/services/geometry_service.py so that
+# later changes there do not change what this migration backfills
+SIMPLIFY_ZOOMS = (4, 6, 8, 10, 12, 14)
+MAX_SIMPLIFIED_FRACTION = 0.8
+
+
+def _to_shape(geojson):
+    """A GeoJSON FeatureCollection, Feature or bare geometry as one shapely geometry (None if unparsable)."""
+    if not geojson or not isinstance(geojson, dict):
+        return None
+    try:
+        kind = geojson.get('type')
+        if kind == 'FeatureCollection':
+            geoms = [shape(f['geometry']) for f in geojson.get('features', []) if f.get('geometry')]
+        elif kind == 'Feature':
+            geoms = [shape(geojson['geometry'])] if geojson.get('geometry') else []
+        else:
+            geoms = [shape(geojson)]
+        if not geoms:
+            return None
+        geom = geoms[0] if len(geoms) == 1 else unary_union(geoms)
+        if not geom.is_valid:
+            geom = shapely.make_valid(geom)
+        return None if geom.is_empty else geom
+    except (GEOSException, KeyError, TypeError, ValueError, AttributeError):
+        return None
+
+
+def _simplifications(geom) -> dict:
+    """GeoJSON geometry of `geom` per SIMPLIFY_ZOOMS level, within half a pixel at that zoom."""
+    vertices = shapely.get_num_coordinates(geom)
+    levels = {}
+    for zoom in SIMPLIFY_ZOOMS:
+        tolerance = 360.0 / (256 * 2 ** zoom) / 2
+        simplified = shapely.simplify(geom, tolerance, preserve_topology=True)
+        if shapely.get_num_coordinates(simplified) < vertices * MAX_SIMPLIFIED_FRACTION:
+            decimals = math.ceil(-math.log10(tolerance / 10))
+            levels[zoom] = mapping(shapely.transform(simplified, lambda coords: np.round(coords, decimals)))
+    return levels
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    simplifications = op.create_table(
+        'geometry_simplifications',
+        sa.Column('geometry_id', sa.Integer(), nullable=False),
+        sa.Column('zoom', sa.Integer(), nullable=False),
+        sa.Column('geojson', sa.JSON(), nullable=False),
+        sa.ForeignKeyConstraint(['geometry_id'], ['geometries.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('geometry_id', 'zoom'),
+    )
+
+    # Backfill the property boundaries
+    geometries = sa.table('geometries', sa.column('id', sa.Integer), sa.column('geojson', sa.JSON))
+    properties = sa.table('properties', sa.column('boundary_geometry_id', sa.Integer))
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(geometries.c.id, geometries.c.geojson)
+        .where(geometries.c.id.in_(sa.select(properties.c.boundary_geometry_id)))
+    ).all()
+    inserts = []
+    for geometry_id, geojson in rows:
+        geom = _to_shape(geojson)
+        if geom is None:
+            continue
+        inserts += [
+            {'geometry_id': geometry_id, 'zoom': zoom, 'geojson': simplified}
+            for zoom, simplified in _simplifications(geom).items()
+        ]
+    if inserts:
+        bind.execute(simplifications.insert(), inserts)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('geometry_simplifications')
@@ -0,0 +1,111 @@
+"""dashboard summaries
+
+Revision ID: e7a4c91b3f25
+Revises: d5f0b2c86e14
+Create Date: 2026-10-19 19:02:37.514086
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a4c91b3f25'
+down_revision: Union[str, Sequence[str], None] = 'd5f0b2c86e14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _class_areas(degradation_summary, aoi_area_hectares) -> dict:
+    """Hectares per degradation class of one report, as app.crud.crud_dashboard computed them at this revision."""
+    areas = {}
+    for item in degradation_summary or []:
+        class_name, area = item.get('class_name'), item.get('area_hectares')
+        if area is None and aoi_area_hectares:
+            area = (item.get('percentage') or 0) / 100 * aoi_area_hectares
+        if class_name and area:
+            areas[class_name] = areas.get(class_name, 0.0) + area
+    return areas
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    summaries = op.create_table(
+        'dashboard_summaries',
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('clients_count', sa.Integer(), nullable=False),
+        sa.Column('properties_count', sa.Integer(), nullable=False),
+        sa.Column('reports_count', sa.Integer(), nullable=False),
+        sa.Column('analyzed_hectares', sa.Float(), nullable=False),
+        sa.Column('class_areas', sa.JSON(), nullable=False),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('owner_id'),
+    )
+    # Latest report of a property; its leading column still serves property_id lookups
+    op.create_index(
+        'ix_analysis_reports_property_id_created_at', 'analysis_reports',
+        ['property_id', 'created_at', 'id'], unique=False,
+    )
+    op.drop_index(op.f('ix_analysis_reports_property_id'), table_name='analysis_reports')
+
+    # Backfill one row per user from the base tables
+    users = sa.table('users', sa.column('id', sa.Integer))
+    clients = sa.table('clients', sa.column('id', sa.Integer), sa.column('owner_id', sa.Integer))
+    properties = sa.table('properties', sa.column('id', sa.Integer), sa.column('client_id', sa.Integer))
+    reports = sa.table(
+        'analysis_reports', sa.column('id', sa.Integer), sa.column('owner_id', sa.Integer),
+        sa.column('property_id', sa.Integer), sa.column('created_at', sa.DateTime),
+        sa.column('aoi_area_hectares', sa.Float), sa.column('degradation_summary', sa.JSON),
+    )
+    bind = op.get_bind()
+    rows = {user_id: {
+        'owner_id': user_id, 'clients_count': 0, 'properties_count': 0, 'reports_count': 0,
+        'analyzed_hectares': 0.0, 'class_areas': {},
+    } for user_id in bind.execute(sa.select(users.c.id)).scalars()}
+    for owner_id, count in bind.execute(
+        sa.select(clients.c.owner_id, sa.func.count()).group_by(clients.c.owner_id)
+    ):
+        rows[owner_id]['clients_count'] = count
+    for owner_id, count in bind.execute(
+        sa.select(clients.c.owner_id, sa.func.count())
+        .select_from(properties.join(clients, properties.c.client_id == clients.c.id))
+        .group_by(clients.c.owner_id)
+    ):
+        rows[owner_id]['properties_count'] = count
+    for owner_id, count, hectares in bind.execute(
+        sa.select(reports.c.owner_id, sa.func.count(), sa.func.coalesce(sa.func.sum(reports.c.aoi_area_hectares), 0.0))
+        .where(reports.c.owner_id.isnot(None))
+        .group_by(reports.c.owner_id)
+    ):
+        rows[owner_id]['reports_count'] = count
+        rows[owner_id]['analyzed_hectares'] = round(hectares, 4)
+
+    newer = reports.alias('newer')
+    latest = bind.execute(
+        sa.select(reports.c.owner_id, reports.c.aoi_area_hectares, reports.c.degradation_summary).where(
+            reports.c.property_id.isnot(None),
+            reports.c.owner_id.isnot(None),
+            ~sa.exists().where(
+                newer.c.property_id == reports.c.property_id,
+                sa.tuple_(newer.c.created_at, newer.c.id) > sa.tuple_(reports.c.created_at, reports.c.id),
+            ),
+        )
+    )
+    for owner_id, aoi_area_hectares, degradation_summary in latest:
+        areas = rows[owner_id]['class_areas']
+        for class_name, area in _class_areas(degradation_summary, aoi_area_hectares).items():
+            areas[class_name] = areas.get(class_name, 0.0) + area
+    for row in rows.values():
+        row['class_areas'] = {name: round(area, 4) for name, area in row['class_areas'].items() if round(area, 2) > 0}
+    if rows:
+        op.bulk_insert(summaries, list(rows.values()))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_analysis_reports_property_id'), 'analysis_reports', ['property_id'], unique=False)
+    op.drop_index('ix_analysis_reports_property_id_created_at', table_name='analysis_reports')
+    op.drop_table('dashboard_summaries')
@@ -0,0 +1,71 @@
+"""on delete cascade
+
+Revision ID: f1b9d3a7c462
+Revises: e7a4c91b3f25
+Create Date: 2026-10-19 19:40:12.308561
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b9d3a7c462'
+down_revision: Union[str, Sequence[str], None] = 'e7a4c91b3f25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, referred table): ownership chains removed along with their parent
+CASCADES = (
+    ('clients', 'owner_id', 'users'),
+    ('properties', 'client_id', 'clients'),
+    ('analysis_reports', 'owner_id', 'users'),
+    ('analysis_reports', 'property_id', 'properties'),
+    ('dashboard_summaries', 'owner_id', 'users'),
+)
+
+# Names PostgreSQL gave the constraints; on SQLite the reflected ones are unnamed and get this name
+FK_NAME = '%(table_name)s_%(column_0_name)s_fkey'
+
+
+def _replace_foreign_keys(ondelete, upgrade: bool) -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        # SQLite cannot alter a constraint: copy each table (alembic's connection runs
+        # with foreign_keys off, so dropping the old copy cascades nothing). The search
+        # triggers refer to these tables and would block the renames: drop them and
+        # recreate them afterwards from their saved SQL.
+        tables = dict.fromkeys(table for table, _, _ in CASCADES)
+        triggers = bind.execute(sa.text(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name IN ('clients', 'properties')"
+        )).all()
+        for trigger, _ in triggers:
+            op.execute(f'DROP TRIGGER {trigger}')
+        for table in tables:
+            with op.batch_alter_table(table, recreate='always', naming_convention={'fk': FK_NAME}) as batch:
+                for fk_table, column, referred in CASCADES:
+                    if fk_table == table:
+                        name = f'{table}_{column}_fkey'
+                        batch.drop_constraint(name, type_='foreignkey')
+                        batch.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+                if table == 'analysis_reports':
+                    # NOT NULL that d5f0b2c86e14 could only set on PostgreSQL, now that the table is copied
+                    batch.alter_column('aoi_geometry_id', existing_type=sa.Integer(), nullable=not upgrade)
+        for _, sql in triggers:
+            op.execute(sql)
+    else:
+        for table, column, referred in CASCADES:
+            name = f'{table}_{column}_fkey'
+            op.drop_constraint(name, table, type_='foreignkey')
+            op.create_foreign_key(name, table, referred, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _replace_foreign_keys('CASCADE', upgrade=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_foreign_keys(None, upgrade=False)
@@ -0,0 +1,49 @@
+"""change reports
+
+Revision ID: f3c7a2e5b918
+Revises: e6b3d9f2a471
+Create Date: 2026-10-20 02:13:36.184027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c7a2e5b918'
+down_revision: Union[str, Sequence[str], None] = 'e6b3d9f2a471'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'change_reports',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('aoi_geometry_id', sa.Integer(), nullable=False),
+        sa.Column('aoi_area_hectares', sa.Float(), nullable=True),
+        sa.Column('before_period', sa.JSON(), nullable=True),
+        sa.Column('after_period', sa.JSON(), nullable=True),
+        sa.Column('ndvi_stats', sa.JSON(), nullable=True),
+        sa.Column('transitions', sa.JSON(), nullable=True),
+        sa.Column('map_layers_urls', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['aoi_geometry_id'], ['geometries.id']),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_change_reports_id'), 'change_reports', ['id'], unique=False)
+    op.create_index(op.f('ix_change_reports_owner_id'), 'change_reports', ['owner_id'], unique=False)
+    op.create_index(op.f('ix_change_reports_aoi_geometry_id'), 'change_reports', ['aoi_geometry_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_change_reports_aoi_geometry_id'), table_name='change_reports')
+    op.drop_index(op.f('ix_change_reports_owner_id'), table_name='change_reports')
+    op.drop_index(op.f('ix_change_reports_id'), table_name='change_reports')
+    op.drop_table('change_reports')
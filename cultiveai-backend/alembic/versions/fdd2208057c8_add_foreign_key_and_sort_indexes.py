@@ -0,0 +1,41 @@
+"""add foreign key and sort indexes
+
+Revision ID: fdd2208057c8
+Revises: 32af3e91ac9f
+Create Date: 2026-10-19 09:34:52.004118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fdd2208057c8'
+down_revision: Union[str, Sequence[str], None] = '32af3e91ac9f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # crud_client.get_clients / get_clients_count
+    op.create_index('ix_clients_owner_id_name', 'clients', ['owner_id', 'name', 'id'], unique=False, if_not_exists=True)
+    # crud_property.get_properties(client_id=...), get_client_properties_count, cascades
+    op.create_index('ix_properties_client_id_name', 'properties', ['client_id', 'name', 'id'], unique=False, if_not_exists=True)
+    # crud_analysis.get_user_reports / get_user_report_summaries / get_user_reports_count
+    op.create_index(
+        'ix_analysis_reports_owner_id_created_at', 'analysis_reports',
+        ['owner_id', 'created_at', 'id'], unique=False, if_not_exists=True
+    )
+    # crud_property.get_property_reports_count, cascades
+    op.create_index(op.f('ix_analysis_reports_property_id'), 'analysis_reports', ['property_id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_analysis_reports_property_id'), table_name='analysis_reports')
+    op.drop_index('ix_analysis_reports_owner_id_created_at', table_name='analysis_reports')
+    op.drop_index('ix_properties_client_id_name', table_name='properties')
+    op.drop_index('ix_clients_owner_id_name', table_name='clients')
@@ -1,43 +1,82 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from .. import models, schemas, crud
 from ..core.config import SECRET_KEY, ALGORITHM
-from ..db.session import SessionLocal
+from ..db.session import AsyncSessionLocal
+from ..services import admission
+from ..services.auth_cache import auth_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"/api/v1/auth/login")
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> models.User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+async def authenticate_token(db: AsyncSession, token: str) -> Optional[models.User]:
+    """User of a valid access token, or None. Served from the per-worker auth cache when possible."""
+    user = await auth_cache.get(db, token)
+    if user is not None:
+        return user
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        token_type: str = payload.get("type", "access")
-        if email is None or token_type != "access":
-            raise credentials_exception
-        token_data = schemas.TokenData(email=email, token_type=token_type)
     except JWTError:
-        raise credentials_exception
-    user = crud.crud_user.get_user_by_email(db, email=token_data.email)
+        return None
+    email: str = payload.get("sub")
+    token_type: str = payload.get("type", "access")
+    if email is None or token_type != "access":
+        return None
+    token_data = schemas.TokenData(email=email, token_type=token_type)
+    user = await crud.crud_user.get_user_by_email(db, email=token_data.email)
+    if user is not None:
+        auth_cache.put(token, user, payload["exp"])
+    return user
+
+
+async def get_current_user(db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)) -> models.User:
+    """
+    The authenticated user. On a cache hit it is not attached to `db`:
+    load it again (crud_user.get_user_by_id) before modifying it.
+    """
+    user = await authenticate_token(db, token)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is disabled"
         )
-    return user
\ No newline at end of file
+    return user
+
+
+@asynccontextmanager
+async def admitted(db: AsyncSession, user_id: int, route_class: str) -> AsyncIterator[None]:
+    """Run the block under the user's admission limits (services/admission); 429/503 with Retry-After if refused."""
+    # A queued request should not hold a pooled connection; `db` reconnects on its next query
+    await db.close()
+    try:
+        async with admission.admit(user_id, route_class):
+            yield
+    except admission.AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+def admission_for(route_class: str):
+    """Route dependency holding an admission of `route_class` for the current user until the response."""
+    async def dependency(
+        db: AsyncSession = Depends(get_db), current_user: models.User = Depends(get_current_user)
+    ):
+        async with admitted(db, current_user.id, route_class):
+            yield
+    return dependency
\ No newline at end of file
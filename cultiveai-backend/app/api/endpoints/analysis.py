@@ -1,41 +1,53 @@
-from fastapi import APIRouter, HTTPException, Body, Depends, Response, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Body, Depends, Header, Request, Response, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from ... import schemas, crud, models
-from ...core import security
-from ...services import gee_service, ai_service, report_service
-from .. import deps
+from ...core import metrics
+from ...services import gee_service, ai_service, report_service, geometry_service, single_flight, tile_cache
+from ...services.spatial_index import property_index
+from ...db.query_stats import query_budget
+from .. import deps, etags
 
 router = APIRouter()
 
-@router.post("/", response_model=schemas.AnalysisResponse)
-def create_analysis(
-    geojson: schemas.GeoJSONInput = Body(...),
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user)
-):
+async def _run_analysis(db: AsyncSession, owner_id: int, aoi: dict, linked_property: Optional[models.Property]):
+    """Earth Engine, Gemini and the HTML report for `aoi`, saved as a new report of the user."""
     try:
-        gee_results = gee_service.run_analysis(geojson.dict())
+        # Earth Engine, Gemini and Jinja calls are blocking: keep them off the event loop
+        with metrics.ANALYSIS_STAGE.labels("gee").time():
+            gee_results = await run_in_threadpool(
+                gee_service.run_analysis, aoi, linked_property.paddocks if linked_property else None
+            )
 
-        ai_desc = ai_service.generate_ai_description(
-            ndvi_stats=gee_results['ndvi_stats'],
-            pixel_counts_dict=gee_results['pixel_counts_for_ai'],
-            aoi_area_sqm=gee_results['aoi_area_hectares'] * 10000
-        )
+        with metrics.ANALYSIS_STAGE.labels("ai").time():
+            ai_desc = await run_in_threadpool(
+                ai_service.generate_ai_description,
+                ndvi_stats=gee_results['ndvi_stats'],
+                pixel_counts_dict=gee_results['pixel_counts_for_ai'],
+                aoi_area_sqm=gee_results['aoi_area_hectares'] * 10000,
+                paddock_summary=gee_results['paddock_summary'],
+            )
         
         del gee_results['pixel_counts_for_ai']
         gee_results['ai_description'] = ai_desc
 
-        html_report = report_service.generate_html_report(gee_results)
+        with metrics.ANALYSIS_STAGE.labels("render").time():
+            html_report = await run_in_threadpool(report_service.generate_html_report, {
+                **gee_results,
+                'property_name': linked_property.name if linked_property else None,
+            })
         gee_results['report_html'] = html_report
         # Remove thumbnail_urls - only needed for the HTML report, not stored in DB
         gee_results.pop('thumbnail_urls', None)
+        gee_results['property_id'] = linked_property.id if linked_property else None
 
-        db_report = crud.crud_analysis.create_analysis_report(
-            db=db, 
-            report_data=gee_results,
-            owner_id=current_user.id
-        )
+        with metrics.ANALYSIS_STAGE.labels("save").time():
+            db_report = await crud.crud_analysis.create_analysis_report(
+                db=db, 
+                report_data=gee_results,
+                owner_id=owner_id
+            )
         
         return db_report
 
@@ -45,87 +57,232 @@ def create_analysis(
         print(f"ERRO GERAL na análise: {e}")
         raise HTTPException(status_code=500, detail=f"Ocorreu um erro interno: {e}")
 
+
+@router.post("/", response_model=schemas.AnalysisResponse)
+@query_budget(20)
+async def create_analysis(
+    response: Response,
+    background_tasks: BackgroundTasks,
+    geojson: schemas.GeoJSONInput = Body(...),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """
+    Analyze an area. A retry with the same Idempotency-Key returns the
+    original report, and identical requests running at once (same area and
+    property, from any worker) share one computation (services/single_flight).
+    """
+    linked_property = None
+    if geojson.property_id is not None:
+        linked_property = await crud.crud_property.get_property(
+            db, property_id=geojson.property_id, owner_id=current_user.id
+        )
+        if not linked_property:
+            raise HTTPException(status_code=404, detail="Propriedade não encontrada")
+
+    aoi = geojson.dict(exclude={"property_id"})
+    fingerprint = single_flight.fingerprint(aoi, geojson.property_id)
+    if idempotency_key:
+        recorded = await crud.crud_analysis.get_idempotency_key(db, current_user.id, idempotency_key)
+        if recorded:
+            recorded_fingerprint, report_id = recorded
+            if recorded_fingerprint != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key já usada em outra análise")
+            response.headers["Idempotent-Replayed"] = "true"
+            return await crud.crud_analysis.get_analysis_report(db, report_id)
+
+    created = None
+
+    async def compute() -> int:
+        nonlocal created, linked_property
+        if linked_property is None:
+            # Before admission: it closes `db`, which must not reconnect for the long run
+            aoi_shape = geometry_service.to_shape(aoi)
+            if aoi_shape is not None:
+                linked_property = await property_index.best_match(db, current_user.id, aoi_shape)
+        async with deps.admitted(db, current_user.id, "analysis"):
+            created = await _run_analysis(db, current_user.id, aoi, linked_property)
+        return created.id
+
+    report_id, shared = await single_flight.run(current_user.id, fingerprint, compute)
+    if idempotency_key:
+        await crud.crud_analysis.save_idempotency_key(db, current_user.id, idempotency_key, fingerprint, report_id)
+    if shared:
+        return await crud.crud_analysis.get_analysis_report(db, report_id)
+    # After the response: the map's first view, from the tile cache
+    background_tasks.add_task(tile_cache.seed, report_id, aoi)
+    return created
+
+@router.post("/change", response_model=schemas.ChangeReport)
+@query_budget(8)
+async def create_change_report(
+    background_tasks: BackgroundTasks,
+    change_input: schemas.ChangeDetectionInput = Body(...),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """
+    Compare an area's NDVI between two periods: both composites, the NDVI
+    change and the area moving between degradation classes come from a
+    single Earth Engine request. The change map (tile_urls) is made when
+    first drawn.
+    """
+    aoi = change_input.dict(include={"type", "features"})
+    before = change_input.before.model_dump(mode="json")
+    after = change_input.after.model_dump(mode="json")
+    async with deps.admitted(db, current_user.id, "analysis"):
+        try:
+            change_data = await run_in_threadpool(gee_service.run_change_detection, aoi, before, after)
+        except RuntimeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            print(f"ERRO GERAL na comparação: {e}")
+            raise HTTPException(status_code=500, detail=f"Ocorreu um erro interno: {e}")
+    change = await crud.crud_analysis.create_change_report(db, change_data=change_data, owner_id=current_user.id)
+    background_tasks.add_task(tile_cache.seed, change.id, aoi, "change")
+    return change
+
+@router.get("/change/{change_id}", response_model=schemas.ChangeReport)
+@query_budget(3)
+async def get_change_report(
+    change_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    change = await crud.crud_analysis.get_change_report(db, change_id)
+    if not change:
+        raise HTTPException(status_code=404, detail="Comparação não encontrada")
+    if change.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Não autorizado a ver esta comparação")
+    return change
+
+@router.delete("/change/{change_id}", status_code=204)
+@query_budget(5)
+async def delete_change_report(
+    change_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    change = await crud.crud_analysis.get_change_report(db, change_id)
+    if not change:
+        raise HTTPException(status_code=404, detail="Comparação não encontrada")
+    if change.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Não autorizado a excluir esta comparação")
+    await crud.crud_analysis.delete_change_report(db, change)
+    await tile_cache.discard(change_id, "change")
+    return None
+
 @router.get("/{report_id}", response_model=schemas.AnalysisResponse)
-def get_report(
+@query_budget(4)
+async def get_report(
     report_id: int,
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
-    report = crud.crud_analysis.get_analysis_report(db, report_id=report_id)
-    if not report:
+    revision = await crud.crud_analysis.get_report_revision(db, report_id=report_id)
+    if not revision:
         raise HTTPException(status_code=404, detail="Relatório não encontrado")
-    if report.owner_id != current_user.id:
+    owner_id, created_at, version = revision
+    if owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Não autorizado a ver este relatório")
+    # 304 before the AOI, markdown and HTML columns are loaded
+    cached = etags.not_modified(request, response, "report", report_id, created_at, version)
+    if cached:
+        return cached
+    report = await crud.crud_analysis.get_analysis_report(db, report_id=report_id)
+    if not report:
+        raise HTTPException(status_code=404, detail="Relatório não encontrado")
     return report
 
-@router.get("/", response_model=List[schemas.AnalysisResponse])
-def get_all_user_reports(
-    db: Session = Depends(deps.get_db),
+@router.get("/", response_model=schemas.Page[schemas.AnalysisSummary])
+@query_budget(6)
+async def get_all_user_reports(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma-separated extra columns, e.g. ndvi_stats,map_layers_urls"),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
-    reports = crud.crud_analysis.get_user_reports(db, user_id=current_user.id)
-    return reports
+    """List report summaries; heavy columns are only loaded when requested via `fields`."""
+    revision = await crud.crud_analysis.get_reports_revision(db, user_id=current_user.id)
+    cached = etags.not_modified(request, response, "reports", *revision)
+    if cached:
+        return cached
+    extra_fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else []
+    try:
+        reports, total, next_cursor = await crud.crud_analysis.get_user_report_summaries(
+            db, user_id=current_user.id, limit=limit, cursor=cursor, fields=extra_fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": reports, "total": total, "next_cursor": next_cursor}
 
 @router.get("/{report_id}/download")
-def download_report(
+@query_budget(7)
+async def download_report(
     report_id: int,
     token: Optional[str] = Query(None),
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ):
     """Download report HTML. Regenerates HTML from stored analysis data so template updates are always reflected."""
     if not token:
         raise HTTPException(status_code=401, detail="Token required")
 
     # Verify token from query string
-    email = security.verify_token(token, token_type="access")
-    if not email:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    user = crud.crud_user.get_user_by_email(db, email=email)
+    user = await deps.authenticate_token(db, token)
     if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-    report = crud.crud_analysis.get_analysis_report(db, report_id)
-    if not report:
-        raise HTTPException(status_code=404, detail="Relatório não encontrado")
-    if report.owner_id != user.id:
-        raise HTTPException(status_code=403, detail="Não autorizado")
+    async with deps.admitted(db, user.id, "download"):
+        report = await crud.crud_analysis.get_analysis_report(db, report_id)
+        if not report:
+            raise HTTPException(status_code=404, detail="Relatório não encontrado")
+        if report.owner_id != user.id:
+            raise HTTPException(status_code=403, detail="Não autorizado")
 
-    # Build analysis_data dict from stored DB columns for dynamic HTML generation
-    analysis_data = {
-        'aoi_geojson': report.aoi_geojson,
-        'aoi_area_hectares': report.aoi_area_hectares or 0,
-        'analysis_period': report.analysis_period or {},
-        'satellite_image_info': report.satellite_image_info or {},
-        'ndvi_stats': report.ndvi_stats or {},
-        'degradation_summary': report.degradation_summary or [],
-        'ai_description': report.ai_description or '',
-        'map_layers_urls': report.map_layers_urls or {},
-        'created_at': report.created_at,
-    }
+        # Build analysis_data dict from stored DB columns for dynamic HTML generation
+        analysis_data = {
+            'aoi_geojson': report.aoi_geojson,
+            'aoi_area_hectares': report.aoi_area_hectares or 0,
+            'analysis_period': report.analysis_period or {},
+            'satellite_image_info': report.satellite_image_info or {},
+            'ndvi_stats': report.ndvi_stats or {},
+            'degradation_summary': report.degradation_summary or [],
+            'ai_description': report.ai_description or '',
+            'map_layers_urls': report.map_layers_urls or {},
+            'paddock_summary': report.paddock_summary or [],
+            'created_at': report.created_at,
+        }
 
-    # Add property name if linked
-    if report.property_id and report.property:
-        analysis_data['property_name'] = report.property.name
+        # Add property name if linked
+        if report.property_id and report.property:
+            analysis_data['property_name'] = report.property.name
 
-    html_content = report_service.generate_html_report(analysis_data)
+        html_content = await run_in_threadpool(report_service.generate_html_report, analysis_data)
 
-    return Response(content=html_content, media_type="text/html", headers={
-        "Content-Disposition": f"attachment; filename=relatorio_cultiveai_{report_id}.html"
-    })
+        return Response(content=html_content, media_type="text/html", headers={
+            "Content-Disposition": f"attachment; filename=relatorio_cultiveai_{report_id}.html"
+        })
 
 
 @router.delete("/{report_id}", status_code=204)
-def delete_report(
+@query_budget(8)
+async def delete_report(
     report_id: int,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
     """Delete an analysis report."""
-    report = crud.crud_analysis.get_analysis_report(db, report_id)
+    report = await crud.crud_analysis.get_analysis_report(db, report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Relatório não encontrado")
     if report.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Não autorizado a excluir este relatório")
-    crud.crud_analysis.delete_analysis_report(db, report)
+    await crud.crud_analysis.delete_analysis_report(db, report)
+    await tile_cache.discard(report_id)
     return None
\ No newline at end of file
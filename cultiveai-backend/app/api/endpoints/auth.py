@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Body
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from ... import schemas, crud, models
 from ...core import security
+from ...db.query_stats import query_budget
 from .. import deps
 
 router = APIRouter()
@@ -14,22 +15,24 @@ class RefreshTokenRequest(BaseModel):
 
 
 @router.post("/register", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def register_user(user: schemas.UserCreate, db: Session = Depends(deps.get_db)):
+@query_budget(4)
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(deps.get_db)):
     """Register a new user."""
-    db_user = crud.crud_user.get_user_by_email(db, email=user.email)
+    db_user = await crud.crud_user.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return crud.crud_user.create_user(db=db, user=user)
+    return await crud.crud_user.create_user(db=db, user=user)
 
 
 @router.post("/login", response_model=schemas.TokenPair)
-def login_for_access_token(
-    db: Session = Depends(deps.get_db),
+@query_budget(2)
+async def login_for_access_token(
+    db: AsyncSession = Depends(deps.get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
     """Login and get access + refresh tokens."""
-    user = crud.crud_user.get_user_by_email(db, email=form_data.username)
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = await crud.crud_user.get_user_by_email(db, email=form_data.username)
+    if not user or not await security.check_password(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -40,13 +43,15 @@ def login_for_access_token(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is disabled"
         )
+    if security.password_needs_rehash(user.hashed_password):
+        await crud.crud_user.rehash_password(db, user, form_data.password)
     return security.create_token_pair(subject=user.email)
 
 
 @router.post("/refresh", response_model=schemas.TokenPair)
-def refresh_access_token(
+async def refresh_access_token(
     request: RefreshTokenRequest,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ):
     """Get new access + refresh tokens using a valid refresh token."""
     email = security.verify_token(request.refresh_token, token_type="refresh")
@@ -56,7 +61,7 @@ def refresh_access_token(
             detail="Invalid or expired refresh token",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = crud.crud_user.get_user_by_email(db, email=email)
+    user = await crud.crud_user.get_user_by_email(db, email=email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -72,7 +77,8 @@ def refresh_access_token(
 
 
 @router.get("/me", response_model=schemas.User)
-def get_current_user_info(
+@query_budget(2)
+async def get_current_user_info(
     current_user: models.User = Depends(deps.get_current_user)
 ):
     """Get current authenticated user info."""
@@ -80,14 +86,17 @@ def get_current_user_info(
 
 
 @router.put("/me", response_model=schemas.User)
-def update_current_user(
+@query_budget(6)
+async def update_current_user(
     user_update: schemas.UserUpdate,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
     """Update current user's profile."""
     if user_update.email and user_update.email != current_user.email:
-        existing = crud.crud_user.get_user_by_email(db, email=user_update.email)
+        existing = await crud.crud_user.get_user_by_email(db, email=user_update.email)
         if existing:
             raise HTTPException(status_code=400, detail="Email already in use")
-    return crud.crud_user.update_user(db, db_user=current_user, user_update=user_update)
\ No newline at end of file
+    # current_user may be a cached snapshot, not attached to this session
+    db_user = await crud.crud_user.get_user_by_id(db, user_id=current_user.id)
+    return await crud.crud_user.update_user(db, db_user=db_user, user_update=user_update)
\ No newline at end of file
@@ -1,101 +1,158 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, HTTPException, Request, Response, status, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from ... import schemas, crud, models
-from .. import deps
+from ...services import export_service, import_service
+from ...db.query_stats import query_budget
+from .. import deps, etags
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[schemas.Client])
-def list_clients(
-    skip: int = Query(0, ge=0),
+@router.get("/", response_model=schemas.Page[schemas.Client])
+@query_budget(7)
+async def list_clients(
+    request: Request,
+    response: Response,
     limit: int = Query(100, ge=1, le=1000),
     search: Optional[str] = Query(None, min_length=1),
-    db: Session = Depends(deps.get_db),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
-    """List all clients for the current user with optional search."""
-    clients = crud.crud_client.get_clients(
-        db, owner_id=current_user.id, skip=skip, limit=limit, search=search
-    )
+    """List clients for the current user (cursor-paginated) with optional search."""
+    revision = await crud.crud_client.get_clients_revision(db, owner_id=current_user.id)
+    cached = etags.not_modified(request, response, "clients", *revision)
+    if cached:
+        return cached
+    try:
+        clients, total, next_cursor = await crud.crud_client.get_clients(
+            db, owner_id=current_user.id, limit=limit, search=search, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     # Add properties count
+    counts = await crud.crud_client.get_clients_properties_counts(db, [client.id for client in clients])
     for client in clients:
-        client.properties_count = crud.crud_client.get_client_properties_count(db, client.id)
-    return clients
+        client.properties_count = counts[client.id]
+    return {"items": clients, "total": total, "next_cursor": next_cursor}
 
 
 @router.get("/count")
-def get_clients_count(
+@query_budget(3)
+async def get_clients_count(
     search: Optional[str] = Query(None, min_length=1),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
     """Get total count of clients."""
-    count = crud.crud_client.get_clients_count(db, owner_id=current_user.id, search=search)
+    count = await crud.crud_client.get_clients_count(db, owner_id=current_user.id, search=search)
     return {"count": count}
 
 
+@router.get("/export")
+async def export_clients(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """Stream all clients of the current user as NDJSON or CSV."""
+    return StreamingResponse(
+        export_service.export_clients(current_user.id, format),
+        media_type=export_service.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="clientes.{format}"'},
+    )
+
+
 @router.get("/{client_id}", response_model=schemas.Client)
-def get_client(
+@query_budget(4)
+async def get_client(
     client_id: int,
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
     """Get a specific client by ID."""
-    client = crud.crud_client.get_client(db, client_id=client_id, owner_id=current_user.id)
+    revision = await crud.crud_client.get_client_revision(db, client_id=client_id, owner_id=current_user.id)
+    if revision is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client not found"
+        )
+    cached = etags.not_modified(request, response, "client", client_id, *revision)
+    if cached:
+        return cached
+    client = await crud.crud_client.get_client(db, client_id=client_id, owner_id=current_user.id)
     if not client:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Client not found"
         )
-    client.properties_count = crud.crud_client.get_client_properties_count(db, client.id)
+    _, client.properties_count = revision
     return client
 
 
 @router.post("/", response_model=schemas.Client, status_code=status.HTTP_201_CREATED)
-def create_client(
+@query_budget(11)
+async def create_client(
     client: schemas.ClientCreate,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
     """Create a new client."""
-    db_client = crud.crud_client.create_client(db, client=client, owner_id=current_user.id)
+    db_client = await crud.crud_client.create_client(db, client=client, owner_id=current_user.id)
     db_client.properties_count = 0
     return db_client
 
 
+@router.post("/import", response_model=schemas.ImportResult)
+async def import_clients(
+    file: UploadFile = File(..., description="CSV com cabeçalho (nome, documento, telefone, email, endereco, cidade, estado, observacoes)"),
+    dry_run: bool = Query(False, description="Only validate, do not save"),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """Bulk-create clients from a CSV file; invalid rows are skipped and reported."""
+    try:
+        return await import_service.import_clients(db, file.file, owner_id=current_user.id, dry_run=dry_run)
+    except import_service.ImportFormatError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.put("/{client_id}", response_model=schemas.Client)
-def update_client(
+@query_budget(6)
+async def update_client(
     client_id: int,
     client_update: schemas.ClientUpdate,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
     """Update a client."""
-    db_client = crud.crud_client.get_client(db, client_id=client_id, owner_id=current_user.id)
+    db_client = await crud.crud_client.get_client(db, client_id=client_id, owner_id=current_user.id)
     if not db_client:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Client not found"
         )
-    updated = crud.crud_client.update_client(db, db_client=db_client, client_update=client_update)
-    updated.properties_count = crud.crud_client.get_client_properties_count(db, updated.id)
+    updated = await crud.crud_client.update_client(db, db_client=db_client, client_update=client_update)
+    updated.properties_count = await crud.crud_client.get_client_properties_count(db, updated.id)
     return updated
 
 
 @router.delete("/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_client(
+@query_budget(12)
+async def delete_client(
     client_id: int,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
     """Delete a client and all its properties."""
-    db_client = crud.crud_client.get_client(db, client_id=client_id, owner_id=current_user.id)
+    db_client = await crud.crud_client.get_client(db, client_id=client_id, owner_id=current_user.id)
     if not db_client:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Client not found"
         )
-    crud.crud_client.delete_client(db, db_client=db_client)
+    await crud.crud_client.delete_client(db, db_client=db_client)
     return None
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from ... import schemas, crud, models
+from ...core import config
+from ...db.query_stats import query_budget
+from .. import deps
+
+router = APIRouter()
+
+CLASS_ORDER = list(config.DEGRADATION_CLASS_NAMES.values())
+
+
+def _class_distribution(class_areas: dict) -> list:
+    total = sum(class_areas.values())
+    items = [
+        {"class_name": name, "area_hectares": round(area, 2), "percentage": round(area / total * 100, 2)}
+        for name, area in class_areas.items()
+    ]
+    # Legend order (severe degradation first); unknown classes go last
+    items.sort(key=lambda item: CLASS_ORDER.index(item["class_name"])
+               if item["class_name"] in CLASS_ORDER else len(CLASS_ORDER))
+    return items
+
+
+@router.get("/summary", response_model=schemas.DashboardSummary)
+@query_budget(3)
+async def get_dashboard_summary(
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """Portfolio totals, read from the incrementally maintained summary row."""
+    summary = await crud.crud_dashboard.get_dashboard_summary(db, owner_id=current_user.id)
+    return {
+        "clients": summary.clients_count,
+        "properties": summary.properties_count,
+        "reports": summary.reports_count,
+        "analyzed_hectares": round(summary.analyzed_hectares, 2),
+        "class_distribution": _class_distribution(summary.class_areas or {}),
+        "updated_at": summary.updated_at,
+    }
@@ -1,98 +1,223 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+import json
+from fastapi import APIRouter, Depends, File, HTTPException, Request, Response, status, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+import shapely
 from ... import schemas, crud, models
-from .. import deps
+from ...services import export_service, geometry_service, import_service, property_map
+from ...services.spatial_index import property_index
+from ...db.query_stats import query_budget
+from .. import deps, etags
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[schemas.PropertyWithClient])
-def list_properties(
-    skip: int = Query(0, ge=0),
+def _property_with_client(
+    prop: models.Property, reports_count: int, with_boundary: bool = True
+) -> schemas.PropertyWithClient:
+    prop_data = {
+        "id": prop.id,
+        "name": prop.name,
+        "total_area_hectares": prop.total_area_hectares,
+        # Deferred (raiseload) when the listing was asked to leave it out
+        "geojson_boundary": prop.geojson_boundary if with_boundary else None,
+        "paddocks": prop.paddocks if with_boundary else None,
+        "boundary_area_hectares": prop.boundary_area_hectares,
+        "centroid_lon": prop.centroid_lon,
+        "centroid_lat": prop.centroid_lat,
+        "vertex_count": prop.vertex_count,
+        "bbox_min_lon": prop.bbox_min_lon,
+        "bbox_min_lat": prop.bbox_min_lat,
+        "bbox_max_lon": prop.bbox_max_lon,
+        "bbox_max_lat": prop.bbox_max_lat,
+        "city": prop.city,
+        "state": prop.state,
+        "notes": prop.notes,
+        "created_at": prop.created_at,
+        "updated_at": prop.updated_at,
+        "client_id": prop.client_id,
+        "client_name": prop.client.name if prop.client else None,
+        "reports_count": reports_count
+    }
+    return schemas.PropertyWithClient(**prop_data)
+
+
+def _parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid bbox")
+    if min_lon > max_lon or min_lat > max_lat:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid bbox")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+@router.get("/", response_model=schemas.Page[schemas.PropertyWithClient])
+@query_budget(7)
+async def list_properties(
+    request: Request,
+    response: Response,
     limit: int = Query(100, ge=1, le=1000),
     client_id: Optional[int] = Query(None),
     search: Optional[str] = Query(None, min_length=1),
-    db: Session = Depends(deps.get_db),
+    cursor: Optional[str] = Query(None),
+    boundary: bool = Query(True, description="Include geojson_boundary; the derived area/centroid/bbox are always returned"),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
-    """List all properties for the current user with optional filters."""
-    properties = crud.crud_property.get_properties(
-        db, owner_id=current_user.id, skip=skip, limit=limit,
-        client_id=client_id, search=search
-    )
-    result = []
-    for prop in properties:
-        prop_data = {
-            "id": prop.id,
-            "name": prop.name,
-            "total_area_hectares": prop.total_area_hectares,
-            "geojson_boundary": prop.geojson_boundary,
-            "city": prop.city,
-            "state": prop.state,
-            "notes": prop.notes,
-            "created_at": prop.created_at,
-            "updated_at": prop.updated_at,
-            "client_id": prop.client_id,
-            "client_name": prop.client.name if prop.client else None,
-            "reports_count": crud.crud_property.get_property_reports_count(db, prop.id)
-        }
-        result.append(schemas.PropertyWithClient(**prop_data))
-    return result
+    """List properties for the current user (cursor-paginated) with optional filters."""
+    revision = await crud.crud_property.get_properties_revision(db, owner_id=current_user.id)
+    cached = etags.not_modified(request, response, "properties", *revision)
+    if cached:
+        return cached
+    try:
+        properties, total, next_cursor = await crud.crud_property.get_properties(
+            db, owner_id=current_user.id, limit=limit,
+            client_id=client_id, search=search, cursor=cursor, with_boundary=boundary
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    reports_counts = await crud.crud_property.get_properties_reports_counts(db, [prop.id for prop in properties])
+    result = [
+        _property_with_client(prop, reports_counts[prop.id], with_boundary=boundary)
+        for prop in properties
+    ]
+    return {"items": result, "total": total, "next_cursor": next_cursor}
 
 
 @router.get("/count")
-def get_properties_count(
+@query_budget(3)
+async def get_properties_count(
     client_id: Optional[int] = Query(None),
     search: Optional[str] = Query(None, min_length=1),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
     """Get total count of properties."""
-    count = crud.crud_property.get_properties_count(
+    count = await crud.crud_property.get_properties_count(
         db, owner_id=current_user.id, client_id=client_id, search=search
     )
     return {"count": count}
 
 
+@router.get("/export")
+async def export_properties(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|geojson)$"),
+    client_id: Optional[int] = Query(None),
+    boundaries: bool = Query(False, description="Include geojson_boundary (always included in GeoJSON)"),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """Stream all properties of the current user as NDJSON, CSV or a GeoJSON FeatureCollection."""
+    return StreamingResponse(
+        export_service.export_properties(current_user.id, format, client_id=client_id, boundaries=boundaries),
+        media_type=export_service.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="propriedades.{format}"'},
+    )
+
+
+@router.get("/map")
+@query_budget(5)
+async def get_properties_map(
+    request: Request,
+    response: Response,
+    bbox: str = Query(..., description="minLon,minLat,maxLon,maxLat of the map view"),
+    zoom: int = Query(..., ge=0, le=24),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """
+    Property boundaries in the map view as a GeoJSON FeatureCollection,
+    simplified for `zoom`; small properties come as points or clusters
+    with a count (services/property_map).
+    """
+    bounds = _parse_bbox(bbox)
+    revision = await crud.crud_property.get_properties_revision(db, owner_id=current_user.id)
+    cached = etags.not_modified(request, response, "properties-map", bounds, zoom, *revision)
+    if cached:
+        return cached
+    rows = await crud.crud_property.get_map_properties(
+        db, owner_id=current_user.id, bounds=bounds,
+        zoom_level=property_map.zoom_level(zoom), min_extent=property_map.min_extent(zoom)
+    )
+    return property_map.feature_collection(rows, zoom)
+
+
+@router.get("/intersecting", response_model=List[schemas.PropertyIntersection])
+@query_budget(4)
+async def list_intersecting_properties(
+    bbox: Optional[str] = Query(None, description="minLon,minLat,maxLon,maxLat"),
+    geometry: Optional[str] = Query(None, description="GeoJSON geometry, Feature or FeatureCollection"),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """Properties of the current user whose boundary intersects a bbox or geometry, best overlap first."""
+    if (bbox is None) == (geometry is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide exactly one of 'bbox' or 'geometry'"
+        )
+    if bbox is not None:
+        geom = shapely.box(*_parse_bbox(bbox))
+    else:
+        try:
+            geom = geometry_service.to_shape(json.loads(geometry))
+        except ValueError:
+            geom = None
+        if geom is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid geometry")
+
+    matches = await property_index.find_intersecting(db, current_user.id, geom)
+    return [
+        schemas.PropertyIntersection(
+            id=prop.id,
+            name=prop.name,
+            client_id=prop.client_id,
+            client_name=prop.client.name if prop.client else None,
+            overlap_ratio=round(ratio, 4),
+        )
+        for prop, ratio in matches
+    ]
+
+
 @router.get("/{property_id}", response_model=schemas.PropertyWithClient)
-def get_property(
+@query_budget(4)
+async def get_property(
     property_id: int,
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
     """Get a specific property by ID."""
-    prop = crud.crud_property.get_property(db, property_id=property_id, owner_id=current_user.id)
+    revision = await crud.crud_property.get_property_revision(db, property_id=property_id, owner_id=current_user.id)
+    if revision is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Property not found"
+        )
+    # 304 before the boundary GeoJSON is loaded and serialized
+    cached = etags.not_modified(request, response, "property", property_id, *revision)
+    if cached:
+        return cached
+    prop = await crud.crud_property.get_property(db, property_id=property_id, owner_id=current_user.id)
     if not prop:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Property not found"
         )
-    prop_data = {
-        "id": prop.id,
-        "name": prop.name,
-        "total_area_hectares": prop.total_area_hectares,
-        "geojson_boundary": prop.geojson_boundary,
-        "city": prop.city,
-        "state": prop.state,
-        "notes": prop.notes,
-        "created_at": prop.created_at,
-        "updated_at": prop.updated_at,
-        "client_id": prop.client_id,
-        "client_name": prop.client.name if prop.client else None,
-        "reports_count": crud.crud_property.get_property_reports_count(db, prop.id)
-    }
-    return schemas.PropertyWithClient(**prop_data)
+    return _property_with_client(prop, reports_count=revision[-1])
 
 
 @router.post("/", response_model=schemas.Property, status_code=status.HTTP_201_CREATED)
-def create_property(
+@query_budget(11)
+async def create_property(
     property_data: schemas.PropertyCreate,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
     """Create a new property."""
-    db_property = crud.crud_property.create_property(
+    db_property = await crud.crud_property.create_property(
         db, property_data=property_data, owner_id=current_user.id
     )
     if not db_property:
@@ -104,15 +229,36 @@ def create_property(
     return db_property
 
 
+@router.post("/import", response_model=schemas.ImportResult)
+async def import_properties(
+    file: UploadFile = File(..., description="GeoJSON FeatureCollection or KML, one property per feature"),
+    client_id: Optional[int] = Query(None, description="Client for features that do not name one"),
+    format: Optional[str] = Query(None, pattern="^(geojson|kml)$", description="Defaults to the file extension"),
+    dry_run: bool = Query(False, description="Only validate, do not save"),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """Bulk-create properties (with boundaries) from GeoJSON or KML; invalid features are skipped and reported."""
+    file_format = format or ("kml" if (file.filename or "").lower().endswith(".kml") else "geojson")
+    try:
+        return await import_service.import_properties(
+            db, file.file, file_format, owner_id=current_user.id,
+            default_client_id=client_id, dry_run=dry_run
+        )
+    except import_service.ImportFormatError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.put("/{property_id}", response_model=schemas.Property)
-def update_property(
+@query_budget(6)
+async def update_property(
     property_id: int,
     property_update: schemas.PropertyUpdate,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
     """Update a property."""
-    db_property = crud.crud_property.get_property(
+    db_property = await crud.crud_property.get_property(
         db, property_id=property_id, owner_id=current_user.id
     )
     if not db_property:
@@ -120,21 +266,22 @@ def update_property(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Property not found"
         )
-    updated = crud.crud_property.update_property(
+    updated = await crud.crud_property.update_property(
         db, db_property=db_property, property_update=property_update
     )
-    updated.reports_count = crud.crud_property.get_property_reports_count(db, updated.id)
+    updated.reports_count = await crud.crud_property.get_property_reports_count(db, updated.id)
     return updated
 
 
 @router.delete("/{property_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_property(
+@query_budget(11)
+async def delete_property(
     property_id: int,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user)
 ):
     """Delete a property and all its reports."""
-    db_property = crud.crud_property.get_property(
+    db_property = await crud.crud_property.get_property(
         db, property_id=property_id, owner_id=current_user.id
     )
     if not db_property:
@@ -142,5 +289,5 @@ def delete_property(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Property not found"
         )
-    crud.crud_property.delete_property(db, db_property=db_property)
+    await crud.crud_property.delete_property(db, db_property=db_property)
     return None
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, HTTPException, Query, Response
+from ...core.security import verify_tile_signature
+from ...services import tile_cache
+
+router = APIRouter()
+
+
+@router.get("/{report_id}/{layer}/{z}/{x}/{y}.png")
+async def get_tile(
+    report_id: int,
+    layer: str,
+    z: int,
+    x: int,
+    y: int,
+    sig: str = Query(...)
+):
+    """
+    A map tile of a report, through the tile cache (services/tile_cache).
+    The URLs come signed in the report's tile_urls, so the map needs no
+    token and a cached tile costs no database query.
+    """
+    if layer not in tile_cache.LAYERS or not verify_tile_signature(report_id, layer, sig):
+        raise HTTPException(status_code=403, detail="Assinatura inválida")
+    return await _tile(report_id, layer, z, x, y, "report")
+
+
+async def _tile(source_id: int, layer: str, z: int, x: int, y: int, kind: str) -> Response:
+    if not 0 <= z <= tile_cache.MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=404, detail="Tile fora do mapa")
+    try:
+        data = await tile_cache.get_tile(source_id, layer, z, x, y, kind)
+    except tile_cache.TileNotFound:
+        raise HTTPException(status_code=404, detail="Camada não encontrada")
+    except tile_cache.TileUpstreamError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return Response(content=data, media_type="image/png", headers={"Cache-Control": "public, max-age=86400"})
+
+
+@router.get("/change/{change_id}/{layer}/{z}/{x}/{y}.png")
+async def get_change_tile(
+    change_id: int,
+    layer: str,
+    z: int,
+    x: int,
+    y: int,
+    sig: str = Query(...)
+):
+    """A map tile of a change comparison (POST /analysis/change), like get_tile."""
+    if layer not in tile_cache.CHANGE_LAYERS or not verify_tile_signature(change_id, layer, sig, "change"):
+        raise HTTPException(status_code=403, detail="Assinatura inválida")
+    return await _tile(change_id, layer, z, x, y, "change")
@@ -0,0 +1,43 @@
+"""
+Conditional GET for reads that rarely change.
+
+An endpoint first asks crud for the resource's revision (a tuple of row
+versions, counts and max ids, read with one cheap query), derives a weak
+ETag from it and answers 304 when the client already has it, before the
+full rows are loaded and serialized.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+# Per-user data: browsers keep it but must revalidate on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts) -> str:
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison against an If-None-Match header."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def not_modified(request: Request, response: Response, *parts) -> Optional[Response]:
+    """
+    A 304 response if the client's copy matches `parts`; otherwise None, after
+    setting the ETag on `response` so the full answer carries it.
+    """
+    etag = weak_etag(*parts)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,129 @@
+"""
+HTTP compression, both directions.
+
+CompressionMiddleware compresses responses of at least
+COMPRESSION_MINIMUM_SIZE bytes with brotli when the client accepts it and
+the brotli package is installed, otherwise with gzip. Streaming responses
+(exports) are compressed chunk by chunk.
+
+GZipRequestMiddleware accepts request bodies sent with
+Content-Encoding: gzip (large imports and boundaries), inflating them as
+they are read, up to MAX_INFLATED_REQUEST_SIZE bytes.
+"""
+import zlib
+
+import anyio.to_thread
+from fastapi import HTTPException, status
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import BROTLI_QUALITY, COMPRESSION_MINIMUM_SIZE, GZIP_LEVEL, MAX_INFLATED_REQUEST_SIZE
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+# Chunks from this size on are compressed in a worker thread, as Starlette does for gzip
+THREAD_MINIMUM_SIZE = 128 * 1024
+
+
+def accepts_encoding(accept_encoding: str, coding: str) -> bool:
+    """Whether an Accept-Encoding header allows `coding` (q=0 refuses it)."""
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip() == coding:
+            q = params.strip()
+            return not (q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"))
+    return False
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int = BROTLI_QUALITY) -> None:
+        super().__init__(app, minimum_size)
+        self.quality = quality
+        self._compressor = None
+
+    @property
+    def compressor(self):
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=self.quality)
+        return self._compressor
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            return await anyio.to_thread.run_sync(self._compress_body, body, more_body)
+        return self._compress_body(body, more_body)
+
+    def _compress_body(self, body: bytes, more_body: bool) -> bytes:
+        if more_body:
+            return self.compressor.process(body) + self.compressor.flush()
+        return self.compressor.process(body) + self.compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MINIMUM_SIZE) -> None:
+        # gzip -9 (Starlette's default) costs several times -6 for a few percent less output
+        super().__init__(app, minimum_size=minimum_size, compresslevel=GZIP_LEVEL)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("Accept-Encoding", "")
+        responder: ASGIApp
+        if HAS_BROTLI and accepts_encoding(accept_encoding, "br"):
+            responder = BrotliResponder(self.app, self.minimum_size)
+        elif accepts_encoding(accept_encoding, "gzip"):
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
+
+
+class GZipRequestMiddleware:
+    def __init__(self, app: ASGIApp, max_size: int = MAX_INFLATED_REQUEST_SIZE) -> None:
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or Headers(scope=scope).get("content-encoding", "").lower() != "gzip":
+            await self.app(scope, receive, send)
+            return
+
+        # The application sees a plain body of unknown length. The scope is changed in
+        # place: outer middleware reads what the router adds to it (metrics' route)
+        scope["headers"] = [
+            (name, value) for name, value in scope["headers"] if name not in (b"content-encoding", b"content-length")
+        ]
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        inflated = 0
+
+        async def receive_inflated() -> Message:
+            nonlocal inflated
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            too_large = HTTPException(
+                status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                detail=f"Request body larger than {self.max_size} bytes once decompressed",
+            )
+            try:
+                # max_length bounds the output of a small body that inflates to gigabytes
+                body = decompressor.decompress(message.get("body", b""), self.max_size - inflated + 1)
+                inflated += len(body)
+                if inflated > self.max_size or decompressor.unconsumed_tail:
+                    raise too_large
+                if not message.get("more_body", False):
+                    if not decompressor.eof:
+                        raise zlib.error("truncated gzip stream")
+            except zlib.error:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid gzip request body")
+            return {**message, "body": body}
+
+        await self.app(scope, receive_inflated, send)
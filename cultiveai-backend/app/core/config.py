@@ -8,6 +8,29 @@ API_V1_STR: str = "/api/v1"
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./cultiveai.db")
 
+
+def _async_database_url(url: str) -> str:
+    """Same database through an asyncio driver (asyncpg / aiosqlite)."""
+    for prefix, driver in (("postgresql+psycopg2://", "postgresql+asyncpg://"),
+                           ("postgresql://", "postgresql+asyncpg://"),
+                           ("postgres://", "postgresql+asyncpg://"),
+                           ("sqlite://", "sqlite+aiosqlite://")):
+        if url.startswith(prefix):
+            return driver + url[len(prefix):]
+    return url
+
+
+# Used by the API; DATABASE_URL (sync) remains in use for migrations and scripts
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_database_url(DATABASE_URL)
+
+# Connection pool, per process: production runs uvicorn with --workers 4,
+# so the database sees up to 4 * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 5))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GOOGLE_CLOUD_PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT_ID")
 GEMINI_GENERATION_CONFIG = {
@@ -19,6 +42,55 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production"
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
+# Per-worker cache of verified access tokens (app/services/auth_cache.py); TTL 0 disables it
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", 60))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+# bcrypt cost for new hashes; stored hashes with another cost are redone at login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# Processes, per worker, that hash and check passwords; 0 runs bcrypt in the request thread pool
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+
+# Response compression (app/core/compression.py): brotli when installed and accepted, else gzip
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))
+# Largest request body accepted with Content-Encoding: gzip, once decompressed
+MAX_INFLATED_REQUEST_SIZE = int(os.getenv("MAX_INFLATED_REQUEST_SIZE", 100 * 1024 * 1024))
+
+# Development: SQL statement count and time on every response, and a log line for routes over budget
+QUERY_DEBUG = os.getenv("QUERY_DEBUG", "false").lower() in ("1", "true", "yes")
+
+# Admission control of the expensive routes (app/services/admission.py). Per user, shared by all
+# workers through the rate_limits table, whose rows can override these for one account:
+# a token bucket (requests per minute, burst) and a cap on requests running at once
+ANALYSIS_RATE_PER_MINUTE = float(os.getenv("ANALYSIS_RATE_PER_MINUTE", 6))
+ANALYSIS_BURST = float(os.getenv("ANALYSIS_BURST", 3))
+ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSIS_CONCURRENCY", 2))
+DOWNLOAD_RATE_PER_MINUTE = float(os.getenv("DOWNLOAD_RATE_PER_MINUTE", 60))
+DOWNLOAD_BURST = float(os.getenv("DOWNLOAD_BURST", 20))
+DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", 4))
+# Per worker: analyses and downloads served at once; the rest queue, shared fairly between users,
+# for at most ADMISSION_QUEUE_TIMEOUT seconds. Keeps threads and connections free for everything else
+ANALYSIS_WORKER_SLOTS = int(os.getenv("ANALYSIS_WORKER_SLOTS", 4))
+DOWNLOAD_WORKER_SLOTS = int(os.getenv("DOWNLOAD_WORKER_SLOTS", 8))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 30))
+
+# Identical POST /analysis/ requests (same user, area and property) share one computation, across
+# workers, while it runs and for this many seconds after it finished (app/services/single_flight.py)
+ANALYSIS_COALESCE_SECONDS = float(os.getenv("ANALYSIS_COALESCE_SECONDS", 60))
+# How long an Idempotency-Key of POST /analysis/ keeps returning its report
+IDEMPOTENCY_KEY_TTL = float(os.getenv("IDEMPOTENCY_KEY_TTL", 24 * 3600))
+
+# Map tiles served by /tiles (app/services/tile_cache.py): Earth Engine tiles kept on disk, shared by
+# the workers, least recently used removed past TILE_CACHE_MAX_BYTES
+TILE_CACHE_DIR = os.getenv("TILE_CACHE_DIR", "./tile_cache")
+TILE_CACHE_MAX_BYTES = int(os.getenv("TILE_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+TILE_UPSTREAM_TIMEOUT = float(os.getenv("TILE_UPSTREAM_TIMEOUT", 20))
+# Tiles fetched in the background right after an analysis, over its AOI: zoom levels (e.g. "12-15",
+# empty disables), layers and a cap on their number
+TILE_SEED_ZOOMS = os.getenv("TILE_SEED_ZOOMS", "")
+TILE_SEED_LAYERS = [layer.strip() for layer in os.getenv("TILE_SEED_LAYERS", "ndvi").split(",") if layer.strip()]
+TILE_SEED_MAX_TILES = int(os.getenv("TILE_SEED_MAX_TILES", 200))
 
 SENTINEL2_COLLECTION_ID = 'COPERNICUS/S2_SR_HARMONIZED'
 CLOUD_FILTER_PERCENTAGE = 20
@@ -31,6 +103,11 @@ NDVI_VIS_PARAMS = {
     'min': -0.2, 'max': 0.8,
     'palette': ['#d73027', '#fc8d59', '#fee08b', '#d9ef8b', '#91cf60', '#1a9850']
 }
+# NDVI after minus before (POST /analysis/change): loss in red, gain in green
+NDVI_CHANGE_VIS_PARAMS = {
+    'min': -0.4, 'max': 0.4,
+    'palette': ['#a50026', '#f46d43', '#fee08b', '#ffffff', '#d9ef8b', '#66bd63', '#006837']
+}
 DEGRADATION_COLORS = {
     '0': '#CCCCCC', '1': '#a50026', '2': '#d73027',
     '3': '#fdae61', '4': '#66bd63', '5': '#1a9641'
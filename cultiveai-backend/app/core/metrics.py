@@ -0,0 +1,121 @@
+"""
+Prometheus metrics, served at /metrics.
+
+In production the uvicorn workers share PROMETHEUS_MULTIPROC_DIR (emptied
+before they start, see the Dockerfile): each one writes its samples to
+memory-mapped files there and /metrics merges them, so whichever worker
+answers the scrape reports totals for all of them. Without the variable
+(development, scripts) the metrics are those of the current process.
+
+Recording a sample is a dict lookup plus an mmap write; statements are
+counted per request by app/db/query_stats.py.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..db.query_stats import track_queries
+
+# External calls take from tens of milliseconds to minutes
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+GEE_CALLS = Counter("gee_calls_total", "Earth Engine calls by type and outcome", ["call", "outcome"])
+GEE_LATENCY = Histogram("gee_call_duration_seconds", "Earth Engine call latency", ["call"], buckets=SLOW_BUCKETS)
+GEMINI_LATENCY = Histogram("gemini_request_duration_seconds", "Gemini generate_content latency", buckets=SLOW_BUCKETS)
+GEMINI_FALLBACKS = Counter(
+    "gemini_fallbacks_total", "AI descriptions replaced by the local fallback text", ["reason"]
+)
+GEMINI_QUOTA_ERRORS = Counter("gemini_quota_errors_total", "Gemini calls refused for quota or rate limit")
+REPORT_RENDER = Histogram("report_render_duration_seconds", "HTML report rendering time")
+ANALYSIS_STAGE = Histogram(
+    "analysis_stage_duration_seconds", "Time of each stage of POST /analysis/", ["stage"], buckets=SLOW_BUCKETS
+)
+ADMISSIONS = Counter(
+    "admission_decisions_total", "Analysis and download requests by admission outcome", ["route_class", "outcome"]
+)
+ADMISSION_WAIT = Histogram(
+    "admission_queue_wait_seconds", "Time admitted requests waited for a worker slot", ["route_class"],
+    buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+TILE_REQUESTS = Counter(
+    "tile_requests_total", "Map tiles served by /tiles, by outcome (hit: from the disk cache)", ["outcome"]
+)
+DB_QUERIES = Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+DB_TIME = Histogram("db_time_per_request_seconds", "Time spent in SQL statements per HTTP request", ["route"])
+
+
+@contextmanager
+def gee_call(call: str):
+    """Time an Earth Engine call (getInfo, getMapId, getThumbURL) and count it by outcome."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        GEE_CALLS.labels(call, "error").inc()
+        raise
+    finally:
+        GEE_LATENCY.labels(call).observe(time.perf_counter() - start)
+    GEE_CALLS.labels(call, "ok").inc()
+
+
+def _route_template(scope: Scope) -> str:
+    """The matched path template, prefix included, as the router left it on the scope."""
+    # Routers included with a prefix keep their own relative path on scope["route"];
+    # FastAPI records the full one alongside
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    if context is not None:
+        return context.path
+    # Absent for 404s
+    return getattr(scope.get("route"), "path", "unmatched")
+
+
+class MetricsMiddleware:
+    """Latency and SQL statements per route template (not per raw path, which would explode the labels)."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                elapsed = time.perf_counter() - start
+                route = _route_template(scope)
+                REQUEST_LATENCY.labels(scope["method"], route, str(status_code)).observe(elapsed)
+                DB_QUERIES.labels(route).observe(stats.queries)
+                DB_TIME.labels(route).observe(stats.seconds)
+
+
+def render() -> bytes:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
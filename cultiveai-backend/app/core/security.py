@@ -1,8 +1,20 @@
+import asyncio
+import hashlib
+import hmac
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union, Optional
+from typing import Any, Callable, Union, Optional
 from jose import jwt, JWTError
 import bcrypt
-from .config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS
+from fastapi.concurrency import run_in_threadpool
+from .config import (
+    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS,
+    BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS,
+)
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
 
 
 def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
@@ -46,6 +58,16 @@ def verify_token(token: str, token_type: str = "access") -> Optional[str]:
         return None
 
 
+def tile_signature(report_id: int, layer: str, kind: str = "report") -> str:
+    """Signs a report's (or change comparison's) tile URLs, so map tiles need no token and their URLs do not expire."""
+    message = f"tiles:{report_id}:{layer}" if kind == "report" else f"tiles:{kind}:{report_id}:{layer}"
+    return hmac.new(SECRET_KEY.encode(), message.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def verify_tile_signature(report_id: int, layer: str, signature: str, kind: str = "report") -> bool:
+    return hmac.compare_digest(tile_signature(report_id, layer, kind), signature)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash."""
     password_bytes = plain_password.encode('utf-8')
@@ -53,9 +75,54 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(password_bytes, hashed_bytes)
 
 
-def get_password_hash(password: str) -> str:
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
     """Hash a password."""
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
\ No newline at end of file
+    return hashed.decode('utf-8')
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True when a hash was made with another bcrypt cost than BCRYPT_ROUNDS."""
+    # $2b$<rounds>$<salt and hash>
+    parts = hashed_password.split('$')
+    return len(parts) < 4 or not parts[2].isdigit() or int(parts[2]) != BCRYPT_ROUNDS
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        # spawn: forking would copy the event loop, open connections and threads into the children
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context('spawn')
+        )
+    return _hash_pool
+
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+
+async def _run_hashing(fn: Callable, *args):
+    """Run bcrypt outside the request thread pool, which CRUD requests need."""
+    if PASSWORD_HASH_WORKERS <= 0:
+        return await run_in_threadpool(fn, *args)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_hash_pool(), fn, *args)
+    except BrokenProcessPool:
+        # A child died (e.g. killed for memory): start a new pool for the next call
+        shutdown_hash_pool()
+        raise
+
+
+async def hash_password(password: str) -> str:
+    # Rounds passed explicitly: the pool's processes have their own copy of this module
+    return await _run_hashing(get_password_hash, password, BCRYPT_ROUNDS)
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hashing(verify_password, plain_password, hashed_password)
\ No newline at end of file
@@ -1,3 +1,3 @@
 # cultiveai-backend/app/crud/__init__.py
 
-from . import crud_user, crud_analysis, crud_client, crud_property
\ No newline at end of file
+from . import crud_user, crud_analysis, crud_client, crud_property, crud_geometry, crud_dashboard
\ No newline at end of file
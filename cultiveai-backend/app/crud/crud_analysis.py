@@ -1,32 +1,241 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+import time
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from typing import List, Optional, Sequence, Tuple
 from .. import models, schemas
+from ..core.config import IDEMPOTENCY_KEY_TTL
+from . import crud_dashboard, crud_geometry
+from .pagination import paginate
 
 
-def get_analysis_report(db: Session, report_id: int):
-    return db.query(models.AnalysisReport).filter(models.AnalysisReport.id == report_id).first()
+async def get_analysis_report(db: AsyncSession, report_id: int):
+    return await db.scalar(select(models.AnalysisReport).options(
+        joinedload(models.AnalysisReport.property)
+    ).where(models.AnalysisReport.id == report_id))
 
 
-def get_user_reports(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.AnalysisReport).filter(
+async def get_report_revision(db: AsyncSession, report_id: int) -> Optional[Tuple]:
+    """(owner_id, created_at, version) of a report, or None; the version moves when a tile URL is refreshed."""
+    report = models.AnalysisReport
+    row = (await db.execute(select(report.owner_id, report.created_at, report.version).where(
+        report.id == report_id
+    ))).first()
+    return tuple(row) if row else None
+
+
+async def get_tile_source(db: AsyncSession, report_id: int) -> Optional[Tuple[dict, dict, dict]]:
+    """(map_layers_urls, satellite_image_info, aoi_geojson) of a report: what its map tiles are made from."""
+    report = models.AnalysisReport
+    row = (await db.execute(
+        select(report.map_layers_urls, report.satellite_image_info, models.Geometry.geojson)
+        .join(models.Geometry, report.aoi_geometry_id == models.Geometry.id)
+        .where(report.id == report_id)
+    )).first()
+    return tuple(row) if row else None
+
+
+async def set_map_layer_url(db: AsyncSession, report_id: int, layer_key: str, url: str) -> None:
+    """Replace one tile URL template of a report (its map token expired)."""
+    report = models.AnalysisReport
+    urls = await db.scalar(select(report.map_layers_urls).where(report.id == report_id).with_for_update())
+    if urls is None:
+        await db.rollback()
+        return
+    await db.execute(update(report).where(report.id == report_id).values(
+        map_layers_urls={**urls, layer_key: url}, version=report.version + 1
+    ))
+    await db.commit()
+
+
+async def get_reports_revision(db: AsyncSession, user_id: int) -> Tuple:
+    """
+    Changes whenever a report of the user is created, deleted or gets a new
+    tile URL (map_layers_urls), or a property is renamed (property_name).
+    """
+    reports = select(
+        func.count(models.AnalysisReport.id), func.max(models.AnalysisReport.id),
+        func.sum(models.AnalysisReport.version),
+    ).where(models.AnalysisReport.owner_id == user_id)
+    properties = select(func.sum(models.Property.version)).join(models.Client).where(
+        models.Client.owner_id == user_id
+    )
+    return (*(await db.execute(reports)).one(), await db.scalar(properties))
+
+
+async def get_user_reports(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> Tuple[List[models.AnalysisReport], int, Optional[str]]:
+    query = select(models.AnalysisReport).where(
         models.AnalysisReport.owner_id == user_id
-    ).order_by(models.AnalysisReport.created_at.desc()).offset(skip).limit(limit).all()
+    )
+    return await paginate(
+        db, query, [models.AnalysisReport.created_at, models.AnalysisReport.id],
+        limit=limit, cursor=cursor, descending=True
+    )
+
+
+# Heavier columns a caller may opt into on the summary listing via `fields=`
+SUMMARY_EXTRA_FIELDS = (
+    "aoi_geojson", "analysis_period", "satellite_image_info", "ndvi_stats",
+    "degradation_summary", "ai_description", "map_layers_urls", "paddock_summary",
+)
+
+
+def _dominant_class(degradation_summary) -> Optional[str]:
+    if not degradation_summary:
+        return None
+    top = max(degradation_summary, key=lambda item: item.get("percentage") or 0)
+    return top.get("class_name")
+
+
+async def get_user_report_summaries(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Sequence[str] = ()
+) -> Tuple[List[dict], int, Optional[str]]:
+    """
+    Slim report listing: selects only the card columns (plus any `fields`)
+    instead of hydrating full AnalysisReport rows with GeoJSON, markdown and HTML.
+    """
+    unknown = set(fields) - set(SUMMARY_EXTRA_FIELDS)
+    if unknown:
+        raise ValueError(f"Invalid fields: {', '.join(sorted(unknown))}")
+
+    report = models.AnalysisReport
+    columns = [
+        report.id, report.created_at, report.title, report.property_id,
+        models.Property.name.label("property_name"), report.aoi_area_hectares,
+        report.ndvi_stats, report.degradation_summary,
+    ]
+    columns += [
+        models.Geometry.geojson.label("aoi_geojson") if field == "aoi_geojson" else getattr(report, field)
+        for field in fields if field not in ("ndvi_stats", "degradation_summary")
+    ]
+    query = select(*columns).outerjoin(
+        models.Property, report.property_id == models.Property.id
+    ).where(report.owner_id == user_id)
+    if "aoi_geojson" in fields:
+        query = query.join(models.Geometry, report.aoi_geometry_id == models.Geometry.id)
+
+    rows, total, next_cursor = await paginate(
+        db, query, [report.created_at, report.id], limit=limit, cursor=cursor, descending=True
+    )
 
+    summaries = []
+    for data in rows:
+        data["ndvi_mean"] = (data["ndvi_stats"] or {}).get("mean")
+        data["dominant_class"] = _dominant_class(data["degradation_summary"])
+        for field in ("ndvi_stats", "degradation_summary"):
+            if field not in fields:
+                del data[field]
+        summaries.append(data)
+    return summaries, total, next_cursor
 
-def get_user_reports_count(db: Session, user_id: int) -> int:
-    return db.query(func.count(models.AnalysisReport.id)).filter(
+
+async def get_user_reports_count(db: AsyncSession, user_id: int) -> int:
+    return await db.scalar(select(func.count(models.AnalysisReport.id)).where(
         models.AnalysisReport.owner_id == user_id
-    ).scalar()
+    ))
 
 
-def create_analysis_report(db: Session, report_data: dict, owner_id: int):
-    db_report = models.AnalysisReport(**report_data, owner_id=owner_id)
+async def create_analysis_report(db: AsyncSession, report_data: dict, owner_id: int):
+    data = dict(report_data)
+    aoi_geojson = data.pop("aoi_geojson")
+    summary = await crud_dashboard.lock(db, owner_id)
+    db_report = models.AnalysisReport(**data, owner_id=owner_id)
+    db_report.aoi_geometry = await crud_geometry.get_or_create(db, aoi_geojson)
     db.add(db_report)
-    db.commit()
-    db.refresh(db_report)
+    await db.flush()
+    await crud_dashboard.apply(db, owner_id, await crud_dashboard.report_delta(db, db_report, 1), summary)
+    await db.commit()
+    await db.refresh(db_report)
     return db_report
 
 
-def delete_analysis_report(db: Session, report: models.AnalysisReport) -> None:
-    db.delete(report)
-    db.commit()
\ No newline at end of file
+async def delete_analysis_report(db: AsyncSession, report: models.AnalysisReport) -> None:
+    geometry_id = report.aoi_geometry_id
+    summary = await crud_dashboard.lock(db, report.owner_id)
+    delta = await crud_dashboard.report_delta(db, report, -1)
+    await db.delete(report)
+    await db.flush()
+    await crud_geometry.prune(db, [geometry_id])
+    await crud_dashboard.apply(db, report.owner_id, delta, summary)
+    await db.commit()
+
+
+async def create_change_report(db: AsyncSession, change_data: dict, owner_id: int) -> models.ChangeReport:
+    data = dict(change_data)
+    aoi_geojson = data.pop("aoi_geojson")
+    db_change = models.ChangeReport(**data, owner_id=owner_id, map_layers_urls={})
+    db_change.aoi_geometry = await crud_geometry.get_or_create(db, aoi_geojson)
+    db.add(db_change)
+    await db.commit()
+    await db.refresh(db_change)
+    return db_change
+
+
+async def get_change_report(db: AsyncSession, change_id: int) -> Optional[models.ChangeReport]:
+    return await db.get(models.ChangeReport, change_id)
+
+
+async def get_change_tile_source(db: AsyncSession, change_id: int) -> Optional[Tuple[dict, dict, dict, dict]]:
+    """(map_layers_urls, before_period, after_period, aoi_geojson) of a change comparison."""
+    change = models.ChangeReport
+    row = (await db.execute(
+        select(change.map_layers_urls, change.before_period, change.after_period, models.Geometry.geojson)
+        .join(models.Geometry, change.aoi_geometry_id == models.Geometry.id)
+        .where(change.id == change_id)
+    )).first()
+    return tuple(row) if row else None
+
+
+async def set_change_map_layer_url(db: AsyncSession, change_id: int, layer_key: str, url: str) -> None:
+    """Replace one tile URL template of a change comparison (made on first use, or its map token expired)."""
+    change = models.ChangeReport
+    urls = await db.scalar(select(change.map_layers_urls).where(change.id == change_id).with_for_update())
+    if urls is None:
+        await db.rollback()
+        return
+    await db.execute(update(change).where(change.id == change_id).values(
+        map_layers_urls={**urls, layer_key: url}, version=change.version + 1
+    ))
+    await db.commit()
+
+
+async def delete_change_report(db: AsyncSession, change: models.ChangeReport) -> None:
+    geometry_id = change.aoi_geometry_id
+    await db.delete(change)
+    await db.flush()
+    await crud_geometry.prune(db, [geometry_id])
+    await db.commit()
+
+
+async def get_idempotency_key(db: AsyncSession, owner_id: int, key: str) -> Optional[Tuple[str, int]]:
+    """(fingerprint, report_id) recorded for the user's Idempotency-Key, unless expired."""
+    keys = models.IdempotencyKey
+    row = (await db.execute(select(keys.fingerprint, keys.report_id).where(
+        keys.owner_id == owner_id, keys.key == key, keys.created_at >= time.time() - IDEMPOTENCY_KEY_TTL
+    ))).first()
+    return tuple(row) if row else None
+
+
+async def save_idempotency_key(db: AsyncSession, owner_id: int, key: str, fingerprint: str, report_id: int) -> None:
+    """Record the report of an Idempotency-Key (replacing an expired record); the first record wins."""
+    keys = models.IdempotencyKey
+    now = time.time()
+    await db.execute(delete(keys).where(keys.owner_id == owner_id, keys.created_at < now - IDEMPOTENCY_KEY_TTL))
+    dialect = db.bind.dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        raise NotImplementedError(f"Unsupported dialect: {dialect}")
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    await db.execute(insert(keys).values(
+        owner_id=owner_id, key=key, fingerprint=fingerprint, report_id=report_id, created_at=now
+    ).on_conflict_do_nothing(index_elements=["owner_id", "key"]))
+    await db.commit()
\ No newline at end of file
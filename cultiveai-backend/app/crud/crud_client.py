@@ -1,82 +1,139 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Sequence, Tuple
 from .. import models, schemas
+from . import crud_dashboard, crud_geometry
+from .pagination import paginate
+from .search import search_clients
+from ..services.spatial_index import property_index
 
 
-def get_client(db: Session, client_id: int, owner_id: int) -> Optional[models.Client]:
-    return db.query(models.Client).filter(
+async def get_client(db: AsyncSession, client_id: int, owner_id: int) -> Optional[models.Client]:
+    return await db.scalar(select(models.Client).where(
         models.Client.id == client_id,
         models.Client.owner_id == owner_id
-    ).first()
+    ))
 
 
-def get_clients(
-    db: Session,
+async def get_clients(
+    db: AsyncSession,
     owner_id: int,
-    skip: int = 0,
     limit: int = 100,
-    search: Optional[str] = None
-) -> List[models.Client]:
-    query = db.query(models.Client).filter(models.Client.owner_id == owner_id)
+    search: Optional[str] = None,
+    cursor: Optional[str] = None
+) -> Tuple[List[models.Client], int, Optional[str]]:
+    query = select(models.Client).where(models.Client.owner_id == owner_id)
+    sort_columns, descending = [models.Client.name, models.Client.id], False
 
     if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (models.Client.name.ilike(search_filter)) |
-            (models.Client.document.ilike(search_filter)) |
-            (models.Client.email.ilike(search_filter)) |
-            (models.Client.city.ilike(search_filter))
-        )
+        query, sort_columns, descending = search_clients(db, query, search)
 
-    return query.order_by(models.Client.name).offset(skip).limit(limit).all()
+    return await paginate(db, query, sort_columns, limit=limit, cursor=cursor, descending=descending)
 
 
-def get_clients_count(db: Session, owner_id: int, search: Optional[str] = None) -> int:
-    query = db.query(func.count(models.Client.id)).filter(models.Client.owner_id == owner_id)
+async def get_client_revision(db: AsyncSession, client_id: int, owner_id: int) -> Optional[Tuple]:
+    """What GET /clients/{id} depends on (row version, properties count), or None if not found."""
+    properties_count = select(func.count(models.Property.id)).where(
+        models.Property.client_id == models.Client.id
+    ).scalar_subquery()
+    row = (await db.execute(select(models.Client.version, properties_count).where(
+        models.Client.id == client_id,
+        models.Client.owner_id == owner_id
+    ))).first()
+    return tuple(row) if row else None
+
+
+async def get_clients_revision(db: AsyncSession, owner_id: int) -> Tuple:
+    """Changes whenever a client of the owner is created, updated or deleted, or a property of theirs changes."""
+    clients = select(
+        func.count(models.Client.id), func.max(models.Client.id), func.sum(models.Client.version)
+    ).where(models.Client.owner_id == owner_id)
+    # The version sum also moves when a property changes client, which count and max id miss
+    properties = select(
+        func.count(models.Property.id), func.max(models.Property.id), func.sum(models.Property.version)
+    ).join(models.Client).where(models.Client.owner_id == owner_id)
+    return (*(await db.execute(clients)).one(), *(await db.execute(properties)).one())
+
+
+async def get_clients_count(db: AsyncSession, owner_id: int, search: Optional[str] = None) -> int:
+    query = select(func.count(models.Client.id)).where(models.Client.owner_id == owner_id)
 
     if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (models.Client.name.ilike(search_filter)) |
-            (models.Client.document.ilike(search_filter)) |
-            (models.Client.email.ilike(search_filter)) |
-            (models.Client.city.ilike(search_filter))
-        )
+        query, _, _ = search_clients(db, query, search)
 
-    return query.scalar()
+    return await db.scalar(query)
 
 
-def create_client(db: Session, client: schemas.ClientCreate, owner_id: int) -> models.Client:
+async def create_client(db: AsyncSession, client: schemas.ClientCreate, owner_id: int) -> models.Client:
     db_client = models.Client(
         **client.model_dump(),
         owner_id=owner_id
     )
     db.add(db_client)
-    db.commit()
-    db.refresh(db_client)
+    await db.flush()
+    await crud_dashboard.apply(db, owner_id, crud_dashboard.SummaryDelta(clients=1))
+    await db.commit()
+    await db.refresh(db_client)
     return db_client
 
 
-def update_client(
-    db: Session,
+async def update_client(
+    db: AsyncSession,
     db_client: models.Client,
     client_update: schemas.ClientUpdate
 ) -> models.Client:
     update_data = client_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_client, field, value)
-    db.commit()
-    db.refresh(db_client)
+    db_client.version = models.Client.version + 1
+    await db.commit()
+    await db.refresh(db_client)
     return db_client
 
 
-def delete_client(db: Session, db_client: models.Client) -> None:
-    db.delete(db_client)
-    db.commit()
+async def delete_client(db: AsyncSession, db_client: models.Client) -> None:
+    owner_id = db_client.owner_id
+    properties = (await db.execute(
+        select(models.Property.boundary_geometry_id, models.Property.paddocks_geometry_id)
+        .where(models.Property.client_id == db_client.id)
+    )).all()
+    geometry_ids = [*(geometry_id for row in properties for geometry_id in row), *(await db.scalars(
+        select(models.AnalysisReport.aoi_geometry_id).join(models.Property)
+        .where(models.Property.client_id == db_client.id)
+    ))]
+    summary = await crud_dashboard.lock(db, owner_id)
+    delta = await crud_dashboard.properties_delta(
+        db, select(models.Property.id).where(models.Property.client_id == db_client.id)
+    )
+    delta.clients = -1
+    await db.delete(db_client)
+    await db.flush()
+    await crud_geometry.prune(db, geometry_ids)
+    await crud_dashboard.apply(db, owner_id, delta, summary)
+    await db.commit()
+    property_index.mark_dirty(owner_id)
+
+
+async def insert_clients_batch(db: AsyncSession, rows: List[dict], owner_id: int) -> None:
+    """Insert already-validated clients with one executemany; the caller commits."""
+    await db.execute(insert(models.Client), rows)
+    await crud_dashboard.apply(db, owner_id, crud_dashboard.SummaryDelta(clients=len(rows)))
 
 
-def get_client_properties_count(db: Session, client_id: int) -> int:
-    return db.query(func.count(models.Property.id)).filter(
+async def get_client_properties_count(db: AsyncSession, client_id: int) -> int:
+    return await db.scalar(select(func.count(models.Property.id)).where(
         models.Property.client_id == client_id
-    ).scalar()
+    ))
+
+
+async def get_clients_properties_counts(db: AsyncSession, client_ids: Sequence[int]) -> Dict[int, int]:
+    """Properties count per client for a whole page, in a single grouped query."""
+    if not client_ids:
+        return {}
+    result = await db.execute(
+        select(models.Property.client_id, func.count(models.Property.id))
+        .where(models.Property.client_id.in_(client_ids))
+        .group_by(models.Property.client_id)
+    )
+    counts = dict(result.all())
+    return {client_id: counts.get(client_id, 0) for client_id in client_ids}
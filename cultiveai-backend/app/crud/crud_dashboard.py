@@ -0,0 +1,167 @@
+"""
+Incremental maintenance of dashboard_summaries.
+
+Every write that changes a user's totals computes a SummaryDelta and
+applies it to the user's row in the same transaction, so reading the
+dashboard is a primary-key lookup whatever the size of the portfolio.
+Writers that compute their delta from the base tables take the row lock
+(lock()) first, so concurrent writes of one user see each other's rows;
+taking it before any geometry lock also keeps the lock order the same
+in every transaction.
+The class distribution only counts the latest report of each property
+(by created_at, id): adding or deleting that report swaps its areas with
+those of the report it replaces.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import exists, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from .. import models
+
+
+@dataclass
+class SummaryDelta:
+    clients: int = 0
+    properties: int = 0
+    reports: int = 0
+    hectares: float = 0.0
+    class_areas: Dict[str, float] = field(default_factory=dict)  # signed hectares per class
+
+    def add_areas(self, areas: Dict[str, float], sign: int = 1) -> None:
+        for class_name, area in areas.items():
+            self.class_areas[class_name] = self.class_areas.get(class_name, 0.0) + sign * area
+
+
+def class_areas(degradation_summary: Any, aoi_area_hectares: Optional[float] = None) -> Dict[str, float]:
+    """Hectares per degradation class of one report."""
+    areas: Dict[str, float] = {}
+    for item in degradation_summary or []:
+        class_name, area = item.get("class_name"), item.get("area_hectares")
+        if area is None and aoi_area_hectares:
+            area = (item.get("percentage") or 0) / 100 * aoi_area_hectares
+        if class_name and area:
+            areas[class_name] = areas.get(class_name, 0.0) + area
+    return areas
+
+
+def _sum_areas(rows: Iterable) -> Dict[str, float]:
+    total = SummaryDelta()
+    for aoi_area_hectares, degradation_summary in rows:
+        total.add_areas(class_areas(degradation_summary, aoi_area_hectares))
+    return total.class_areas
+
+
+def latest_reports_query(*criteria):
+    """Area and classes of the latest report of each property, filtered by `criteria`."""
+    report, newer = models.AnalysisReport, aliased(models.AnalysisReport)
+    return select(report.aoi_area_hectares, report.degradation_summary).where(
+        report.property_id.isnot(None),
+        ~exists().where(
+            newer.property_id == report.property_id,
+            tuple_(newer.created_at, newer.id) > tuple_(report.created_at, report.id),
+        ),
+        *criteria,
+    )
+
+
+async def report_delta(db: AsyncSession, report: models.AnalysisReport, sign: int) -> SummaryDelta:
+    """
+    Change caused by adding (sign=1, call after the insert is flushed) or
+    deleting (sign=-1, call before the delete) a report.
+    """
+    delta = SummaryDelta(reports=sign, hectares=sign * (report.aoi_area_hectares or 0.0))
+    if report.property_id is None:
+        return delta
+    latest = (await db.execute(
+        select(models.AnalysisReport.id, models.AnalysisReport.aoi_area_hectares,
+               models.AnalysisReport.degradation_summary)
+        .where(models.AnalysisReport.property_id == report.property_id)
+        .order_by(models.AnalysisReport.created_at.desc(), models.AnalysisReport.id.desc())
+        .limit(2)
+    )).all()
+    if latest and latest[0].id == report.id:
+        delta.add_areas(class_areas(report.degradation_summary, report.aoi_area_hectares), sign)
+        if len(latest) > 1:
+            delta.add_areas(class_areas(latest[1].degradation_summary, latest[1].aoi_area_hectares), -sign)
+    return delta
+
+
+async def properties_delta(db: AsyncSession, property_ids) -> SummaryDelta:
+    """Change caused by deleting the given properties with their reports (call before the delete)."""
+    report = models.AnalysisReport
+    properties = await db.scalar(select(func.count(models.Property.id)).where(models.Property.id.in_(property_ids)))
+    reports, hectares = (await db.execute(
+        select(func.count(report.id), func.coalesce(func.sum(report.aoi_area_hectares), 0.0))
+        .where(report.property_id.in_(property_ids))
+    )).one()
+    delta = SummaryDelta(properties=-properties, reports=-reports, hectares=-hectares)
+    rows = await db.execute(latest_reports_query(report.property_id.in_(property_ids)))
+    delta.add_areas(_sum_areas(rows.all()), -1)
+    return delta
+
+
+async def rebuild(db: AsyncSession, owner_id: int) -> models.DashboardSummary:
+    """Recompute a user's row from the base tables (first use, or repair); the caller commits."""
+    report = models.AnalysisReport
+    clients = await db.scalar(select(func.count(models.Client.id)).where(models.Client.owner_id == owner_id))
+    properties = await db.scalar(
+        select(func.count(models.Property.id)).join(models.Client).where(models.Client.owner_id == owner_id)
+    )
+    reports, hectares = (await db.execute(
+        select(func.count(report.id), func.coalesce(func.sum(report.aoi_area_hectares), 0.0))
+        .where(report.owner_id == owner_id)
+    )).one()
+    areas = _sum_areas((await db.execute(latest_reports_query(report.owner_id == owner_id))).all())
+
+    summary = await db.get(models.DashboardSummary, owner_id)
+    if summary is None:
+        summary = models.DashboardSummary(owner_id=owner_id)
+        db.add(summary)
+    summary.clients_count = clients
+    summary.properties_count = properties
+    summary.reports_count = reports
+    summary.analyzed_hectares = round(hectares, 4)
+    summary.class_areas = {name: round(area, 4) for name, area in areas.items() if round(area, 2) > 0}
+    await db.flush()
+    return summary
+
+
+async def lock(db: AsyncSession, owner_id: int) -> Optional[models.DashboardSummary]:
+    """Lock the user's row until the caller commits, or None when it does not exist yet."""
+    return await db.scalar(
+        select(models.DashboardSummary).where(models.DashboardSummary.owner_id == owner_id)
+        .with_for_update().execution_options(populate_existing=True)
+    )
+
+
+async def apply(
+    db: AsyncSession, owner_id: int, delta: SummaryDelta, summary: Optional[models.DashboardSummary] = None
+) -> None:
+    """Add `delta` to the user's row (`summary` as returned by lock(), if the caller took it)."""
+    if summary is None:
+        summary = await lock(db, owner_id)
+    if summary is None:
+        # The base tables already include this change
+        await rebuild(db, owner_id)
+        return
+    summary.clients_count += delta.clients
+    summary.properties_count += delta.properties
+    summary.reports_count += delta.reports
+    summary.analyzed_hectares = round(summary.analyzed_hectares + delta.hectares, 4)
+    areas = dict(summary.class_areas or {})
+    for class_name, area in delta.class_areas.items():
+        areas[class_name] = round(areas.get(class_name, 0.0) + area, 4)
+    # Float sums leave crumbs behind when a class disappears
+    summary.class_areas = {name: area for name, area in areas.items() if round(area, 2) > 0}
+
+
+async def get_dashboard_summary(db: AsyncSession, owner_id: int) -> models.DashboardSummary:
+    summary = await db.get(models.DashboardSummary, owner_id)
+    if summary is None:
+        summary = await rebuild(db, owner_id)
+        await db.commit()
+        await db.refresh(summary)
+    return summary
@@ -0,0 +1,121 @@
+import hashlib
+import json
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, exists, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from .. import models
+from ..services import geometry_service
+
+
+def geometry_hash(geojson: Any) -> str:
+    """Content address of a GeoJSON document: key order and whitespace do not matter."""
+    canonical = json.dumps(geojson, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _insert(db: AsyncSession, model=models.Geometry):
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise NotImplementedError(f"Unsupported dialect: {dialect}")
+
+
+async def get_or_create_ids(db: AsyncSession, geojsons: Sequence[Any]) -> List[Optional[int]]:
+    """
+    Geometry id for each document (None for None), inserting only shapes not
+    stored yet. The rows stay locked until the transaction ends, so a
+    concurrent prune() cannot delete a geometry this one is about to reference.
+    """
+    hashes = [geometry_hash(geojson) if geojson is not None else None for geojson in geojsons]
+    by_hash: Dict[str, Any] = {h: geojson for h, geojson in zip(hashes, geojsons) if h is not None}
+    if not by_hash:
+        return [None] * len(hashes)
+
+    if db.bind.dialect.name == "sqlite":
+        # No row locks: write first, so the database lock is held from the lookup to the
+        # commit. The no-op update makes RETURNING give the ids of shapes already stored.
+        upsert = sqlite.insert(models.Geometry).values(
+            [{"hash": h, "geojson": geojson} for h, geojson in by_hash.items()]
+        )
+        upsert = upsert.on_conflict_do_update(
+            index_elements=["hash"], set_={"hash": upsert.excluded.hash}
+        ).returning(models.Geometry.hash, models.Geometry.id)
+        ids = dict((await db.execute(upsert)).all())
+        return [ids[h] if h is not None else None for h in hashes]
+
+    def locked(hashes):
+        # FOR KEY SHARE on PostgreSQL: waits for a prune() holding the row, which then is gone
+        return select(models.Geometry.hash, models.Geometry.id).where(
+            models.Geometry.hash.in_(hashes)
+        ).order_by(models.Geometry.id).with_for_update(read=True, key_share=True)
+
+    ids = dict((await db.execute(locked(by_hash))).all())
+    missing = [{"hash": h, "geojson": by_hash[h]} for h in by_hash if h not in ids]
+    if missing:
+        # A concurrent request may insert the same shape: keep whichever row won
+        await db.execute(_insert(db).on_conflict_do_nothing(index_elements=["hash"]), missing)
+        ids.update((await db.execute(locked([row["hash"] for row in missing]))).all())
+    return [ids[h] if h is not None else None for h in hashes]
+
+
+async def get_or_create(db: AsyncSession, geojson: Any) -> Optional[models.Geometry]:
+    if geojson is None:
+        return None
+    [geometry_id] = await get_or_create_ids(db, [geojson])
+    return await db.get(models.Geometry, geometry_id)
+
+
+def _simplification_rows(geometries: Dict[int, Any]) -> List[dict]:
+    rows = []
+    for geometry_id, geojson in geometries.items():
+        geom = geometry_service.to_shape(geojson)
+        if geom is not None:
+            rows += [
+                {"geometry_id": geometry_id, "zoom": zoom, "geojson": simplified}
+                for zoom, simplified in geometry_service.simplifications(geom).items()
+            ]
+    return rows
+
+
+async def simplify(db: AsyncSession, geometries: Dict[int, Any]) -> None:
+    """Store the map simplifications of property boundaries ({geometry id: GeoJSON}) that lack them."""
+    geometries = {geometry_id: geojson for geometry_id, geojson in geometries.items() if geometry_id is not None}
+    if not geometries:
+        return
+    done = set(await db.scalars(
+        select(models.GeometrySimplification.geometry_id).distinct()
+        .where(models.GeometrySimplification.geometry_id.in_(geometries))
+    ))
+    pending = {geometry_id: geojson for geometry_id, geojson in geometries.items() if geometry_id not in done}
+    # Tens of milliseconds for a boundary of thousands of vertices
+    rows = await run_in_threadpool(_simplification_rows, pending) if pending else []
+    if rows:
+        await db.execute(
+            _insert(db, models.GeometrySimplification).on_conflict_do_nothing(index_elements=["geometry_id", "zoom"]),
+            rows,
+        )
+
+
+async def prune(db: AsyncSession, geometry_ids: Iterable[Optional[int]]) -> None:
+    """Delete the given geometries if no property, report or change comparison references them any more."""
+    geometry_ids = {geometry_id for geometry_id in geometry_ids if geometry_id is not None}
+    if not geometry_ids:
+        return
+    if db.bind.dialect.name == "postgresql":
+        # Lock, then check in a new statement: its snapshot sees the references committed
+        # by a get_or_create_ids() that held these rows (SQLite serializes all writers)
+        await db.execute(
+            select(models.Geometry.id).where(models.Geometry.id.in_(geometry_ids))
+            .order_by(models.Geometry.id).with_for_update()
+        )
+    await db.execute(delete(models.Geometry).where(
+        models.Geometry.id.in_(geometry_ids),
+        ~exists().where(models.Property.boundary_geometry_id == models.Geometry.id),
+        ~exists().where(models.Property.paddocks_geometry_id == models.Geometry.id),
+        ~exists().where(models.AnalysisReport.aoi_geometry_id == models.Geometry.id),
+        ~exists().where(models.ChangeReport.aoi_geometry_id == models.Geometry.id),
+    ))
@@ -1,106 +1,251 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
+from sqlalchemy import and_, case, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, contains_eager, raiseload
+from typing import Dict, List, Optional, Sequence, Tuple
 from .. import models, schemas
+from . import crud_dashboard, crud_geometry
+from .pagination import paginate
+from .search import search_properties
+from ..services import geometry_service
+from ..services.spatial_index import property_index
+
+
+def _owned_properties(owner_id: int):
+    # The join to Client both scopes by owner and populates Property.client,
+    # which cannot be lazy-loaded under the async session
+    return select(models.Property).join(models.Client).options(
+        contains_eager(models.Property.client)
+    ).where(models.Client.owner_id == owner_id)
+
+
+async def get_property(db: AsyncSession, property_id: int, owner_id: int) -> Optional[models.Property]:
+    return await db.scalar(_owned_properties(owner_id).where(models.Property.id == property_id))
+
+
+async def get_property_revision(db: AsyncSession, property_id: int, owner_id: int) -> Optional[Tuple]:
+    """
+    What GET /properties/{id} depends on (row version, client version for
+    client_name, reports count), or None if not found.
+    """
+    reports_count = select(func.count(models.AnalysisReport.id)).where(
+        models.AnalysisReport.property_id == models.Property.id
+    ).scalar_subquery()
+    row = (await db.execute(
+        select(models.Property.version, models.Client.version, reports_count).join(models.Client).where(
+            models.Property.id == property_id,
+            models.Client.owner_id == owner_id
+        )
+    )).first()
+    return tuple(row) if row else None
+
+
+async def get_properties_revision(db: AsyncSession, owner_id: int) -> Tuple:
+    """Changes whenever a property listing of the owner could: properties, their clients' names, reports counts."""
+    properties = select(
+        func.count(models.Property.id), func.max(models.Property.id),
+        func.sum(models.Property.version), func.sum(models.Client.version)
+    ).join(models.Client).where(models.Client.owner_id == owner_id)
+    reports = select(func.count(models.AnalysisReport.id), func.max(models.AnalysisReport.id)).where(
+        models.AnalysisReport.owner_id == owner_id
+    )
+    return (*(await db.execute(properties)).one(), *(await db.execute(reports)).one())
 
 
-def get_property(db: Session, property_id: int, owner_id: int) -> Optional[models.Property]:
-    return db.query(models.Property).join(models.Client).filter(
-        models.Property.id == property_id,
-        models.Client.owner_id == owner_id
-    ).first()
-
-
-def get_properties(
-    db: Session,
+async def get_properties(
+    db: AsyncSession,
     owner_id: int,
-    skip: int = 0,
     limit: int = 100,
     client_id: Optional[int] = None,
-    search: Optional[str] = None
-) -> List[models.Property]:
-    query = db.query(models.Property).join(models.Client).filter(
-        models.Client.owner_id == owner_id
-    )
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    with_boundary: bool = True
+) -> Tuple[List[models.Property], int, Optional[str]]:
+    query = _owned_properties(owner_id)
+    if not with_boundary:
+        # Skip loading and decoding the boundary JSON; the derived columns stay available
+        query = query.options(raiseload(models.Property.boundary_geometry), raiseload(models.Property.paddocks_geometry))
 
     if client_id:
-        query = query.filter(models.Property.client_id == client_id)
+        query = query.where(models.Property.client_id == client_id)
 
+    sort_columns, descending = [models.Property.name, models.Property.id], False
     if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (models.Property.name.ilike(search_filter)) |
-            (models.Property.city.ilike(search_filter)) |
-            (models.Client.name.ilike(search_filter))
-        )
+        query, sort_columns, descending = search_properties(db, query, search)
 
-    return query.order_by(models.Property.name).offset(skip).limit(limit).all()
+    return await paginate(db, query, sort_columns, limit=limit, cursor=cursor, descending=descending)
 
 
-def get_properties_count(
-    db: Session,
+async def get_properties_count(
+    db: AsyncSession,
     owner_id: int,
     client_id: Optional[int] = None,
     search: Optional[str] = None
 ) -> int:
-    query = db.query(func.count(models.Property.id)).join(models.Client).filter(
+    query = select(func.count(models.Property.id)).join(models.Client).where(
         models.Client.owner_id == owner_id
     )
 
     if client_id:
-        query = query.filter(models.Property.client_id == client_id)
+        query = query.where(models.Property.client_id == client_id)
 
     if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (models.Property.name.ilike(search_filter)) |
-            (models.Property.city.ilike(search_filter)) |
-            (models.Client.name.ilike(search_filter))
-        )
+        query, _, _ = search_properties(db, query, search)
 
-    return query.scalar()
+    return await db.scalar(query)
 
 
-def create_property(
-    db: Session,
+async def get_map_properties(
+    db: AsyncSession,
+    owner_id: int,
+    bounds: Tuple[float, float, float, float],
+    zoom_level: Optional[int],
+    min_extent: float
+) -> List[Tuple]:
+    """
+    (id, name, client_id, centroid_lon, centroid_lat, boundary) of the owner's
+    properties whose bbox meets `bounds` (min_lon, min_lat, max_lon, max_lat).
+    boundary is the simplification stored for `zoom_level` (the boundary as
+    saved if there is none, or for zoom_level None), and None for properties
+    narrower than `min_extent` degrees, whose JSON is then not read at all.
+    """
+    prop = models.Property
+    min_lon, min_lat, max_lon, max_lat = bounds
+    large = or_(prop.bbox_max_lon - prop.bbox_min_lon >= min_extent, prop.bbox_max_lat - prop.bbox_min_lat >= min_extent)
+    query = select(prop.id, prop.name, prop.client_id, prop.centroid_lon, prop.centroid_lat).join(models.Client).join(
+        models.Geometry, prop.boundary_geometry_id == models.Geometry.id
+    ).where(
+        models.Client.owner_id == owner_id,
+        prop.bbox_max_lon >= min_lon, prop.bbox_min_lon <= max_lon,
+        prop.bbox_max_lat >= min_lat, prop.bbox_min_lat <= max_lat,
+    )
+    if zoom_level is None:
+        boundary = models.Geometry.geojson
+    else:
+        simplified = aliased(models.GeometrySimplification)
+        query = query.outerjoin(simplified, and_(
+            simplified.geometry_id == prop.boundary_geometry_id, simplified.zoom == zoom_level
+        ))
+        boundary = func.coalesce(simplified.geojson, models.Geometry.geojson)
+    query = query.add_columns(case((large, boundary), else_=None).label("boundary")).order_by(prop.id)
+    return (await db.execute(query)).all()
+
+
+def sync_boundary_attributes(db_property: models.Property) -> None:
+    """Store bbox, geodesic area, centroid and vertex count of geojson_boundary in their columns."""
+    geom = geometry_service.to_shape(db_property.geojson_boundary)
+    for column, value in geometry_service.boundary_attributes(geom).items():
+        setattr(db_property, column, value)
+    if db_property.total_area_hectares is None:
+        db_property.total_area_hectares = db_property.boundary_area_hectares
+
+
+async def create_property(
+    db: AsyncSession,
     property_data: schemas.PropertyCreate,
     owner_id: int
 ) -> Optional[models.Property]:
     # Verify client belongs to owner
-    client = db.query(models.Client).filter(
+    client = await db.scalar(select(models.Client).where(
         models.Client.id == property_data.client_id,
         models.Client.owner_id == owner_id
-    ).first()
+    ))
 
     if not client:
         return None
 
-    db_property = models.Property(**property_data.model_dump())
+    data = property_data.model_dump()
+    boundary = data.pop("geojson_boundary")
+    paddocks = data.pop("paddocks")
+    summary = await crud_dashboard.lock(db, owner_id)
+    db_property = models.Property(**data)
+    db_property.boundary_geometry = await crud_geometry.get_or_create(db, boundary)
+    db_property.paddocks_geometry = await crud_geometry.get_or_create(db, paddocks)
+    sync_boundary_attributes(db_property)
+    if db_property.boundary_geometry is not None:
+        await crud_geometry.simplify(db, {db_property.boundary_geometry.id: boundary})
     db.add(db_property)
-    db.commit()
-    db.refresh(db_property)
+    await db.flush()
+    await crud_dashboard.apply(db, owner_id, crud_dashboard.SummaryDelta(properties=1), summary)
+    await db.commit()
+    await db.refresh(db_property)
+    property_index.mark_dirty(owner_id)
     return db_property
 
 
-def update_property(
-    db: Session,
+async def update_property(
+    db: AsyncSession,
     db_property: models.Property,
     property_update: schemas.PropertyUpdate
 ) -> models.Property:
+    owner_id = db_property.client.owner_id
     update_data = property_update.model_dump(exclude_unset=True)
+    old_geometry_ids = []
+    if "geojson_boundary" in update_data:
+        old_geometry_ids.append(db_property.boundary_geometry_id)
+        boundary = update_data.pop("geojson_boundary")
+        db_property.boundary_geometry = await crud_geometry.get_or_create(db, boundary)
+        sync_boundary_attributes(db_property)
+        if db_property.boundary_geometry is not None:
+            await crud_geometry.simplify(db, {db_property.boundary_geometry.id: boundary})
+    if "paddocks" in update_data:
+        old_geometry_ids.append(db_property.paddocks_geometry_id)
+        db_property.paddocks_geometry = await crud_geometry.get_or_create(db, update_data.pop("paddocks"))
     for field, value in update_data.items():
         setattr(db_property, field, value)
-    db.commit()
-    db.refresh(db_property)
+    db_property.version = models.Property.version + 1
+    if any(geometry_id is not None for geometry_id in old_geometry_ids):
+        await db.flush()
+        await crud_geometry.prune(db, old_geometry_ids)
+    await db.commit()
+    await db.refresh(db_property)
+    property_index.mark_dirty(owner_id)
     return db_property
 
 
-def delete_property(db: Session, db_property: models.Property) -> None:
-    db.delete(db_property)
-    db.commit()
+async def delete_property(db: AsyncSession, db_property: models.Property) -> None:
+    owner_id = db_property.client.owner_id
+    geometry_ids = [db_property.boundary_geometry_id, db_property.paddocks_geometry_id, *(await db.scalars(
+        select(models.AnalysisReport.aoi_geometry_id).where(models.AnalysisReport.property_id == db_property.id)
+    ))]
+    summary = await crud_dashboard.lock(db, owner_id)
+    delta = await crud_dashboard.properties_delta(db, [db_property.id])
+    await db.delete(db_property)
+    await db.flush()
+    await crud_geometry.prune(db, geometry_ids)
+    await crud_dashboard.apply(db, owner_id, delta, summary)
+    await db.commit()
+    property_index.mark_dirty(owner_id)
+
+
+async def insert_properties_batch(db: AsyncSession, rows: List[dict], owner_id: int) -> None:
+    """Insert already-validated properties with one executemany; the caller commits."""
+    boundaries = [row.pop("geojson_boundary") for row in rows]
+    # Files carry no paddocks
+    for row in rows:
+        row.pop("paddocks", None)
+    summary = await crud_dashboard.lock(db, owner_id)
+    geometry_ids = await crud_geometry.get_or_create_ids(db, boundaries)
+    for row, geometry_id in zip(rows, geometry_ids):
+        row["boundary_geometry_id"] = geometry_id
+    await crud_geometry.simplify(db, dict(zip(geometry_ids, boundaries)))
+    await db.execute(insert(models.Property), rows)
+    await crud_dashboard.apply(db, owner_id, crud_dashboard.SummaryDelta(properties=len(rows)), summary)
+
+
+async def get_property_reports_count(db: AsyncSession, property_id: int) -> int:
+    return await db.scalar(select(func.count(models.AnalysisReport.id)).where(
+        models.AnalysisReport.property_id == property_id
+    ))
 
 
-def get_property_reports_count(db: Session, property_id: int) -> int:
-    return db.query(func.count(models.AnalysisReport.id)).filter(
-        models.AnalysisReport.property_id == property_id
-    ).scalar()
+async def get_properties_reports_counts(db: AsyncSession, property_ids: Sequence[int]) -> Dict[int, int]:
+    """Reports count per property for a whole page, in a single grouped query."""
+    if not property_ids:
+        return {}
+    result = await db.execute(
+        select(models.AnalysisReport.property_id, func.count(models.AnalysisReport.id))
+        .where(models.AnalysisReport.property_id.in_(property_ids))
+        .group_by(models.AnalysisReport.property_id)
+    )
+    counts = dict(result.all())
+    return {property_id: counts.get(property_id, 0) for property_id in property_ids}
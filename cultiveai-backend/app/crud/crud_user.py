@@ -1,35 +1,58 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from .. import models, schemas
-from ..core.security import get_password_hash
+from ..core.security import hash_password
+from ..services.auth_cache import auth_cache
 
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(models.User).filter(models.User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str):
+    return await db.scalar(select(models.User).where(models.User.email == email))
 
 
-def get_user_by_id(db: Session, user_id: int):
-    return db.query(models.User).filter(models.User.id == user_id).first()
+async def get_user_by_id(db: AsyncSession, user_id: int):
+    return await db.scalar(select(models.User).where(models.User.id == user_id))
 
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = get_password_hash(user.password)
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
+    hashed_password = await hash_password(user.password)
     db_user = models.User(
         email=user.email,
         hashed_password=hashed_password,
         full_name=user.full_name
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.flush()
+    db.add(models.DashboardSummary(owner_id=db_user.id, class_areas={}))
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
-def update_user(db: Session, db_user: models.User, user_update: schemas.UserUpdate):
+async def update_user(db: AsyncSession, db_user: models.User, user_update: schemas.UserUpdate):
     update_data = user_update.model_dump(exclude_unset=True)
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        update_data["hashed_password"] = await hash_password(update_data.pop("password"))
     for field, value in update_data.items():
         setattr(db_user, field, value)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
\ No newline at end of file
+    await auth_cache.bump_version(db)
+    await db.commit()
+    auth_cache.invalidate_user(db_user.id)
+    await db.refresh(db_user)
+    return db_user
+
+
+async def set_user_active(db: AsyncSession, db_user: models.User, is_active: bool) -> models.User:
+    """Activate or deactivate a user; a deactivated user's cached tokens stop working on every worker."""
+    db_user.is_active = int(is_active)
+    await auth_cache.bump_version(db)
+    await db.commit()
+    auth_cache.invalidate_user(db_user.id)
+    await db.refresh(db_user)
+    return db_user
+
+
+async def rehash_password(db: AsyncSession, db_user: models.User, password: str) -> None:
+    """Store a new hash of a just verified password, e.g. after BCRYPT_ROUNDS changed."""
+    # Hashes are not part of the auth cache snapshots: no version bump needed
+    db_user.hashed_password = await hash_password(password)
+    await db.commit()
@@ -0,0 +1,116 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from sqlalchemy import DateTime, Select, func, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(keys: Sequence[Any], total: int) -> str:
+    """Encode the sort key of the last row (plus the total) as an opaque cursor."""
+    payload = {
+        "k": [k.isoformat() if isinstance(k, datetime) else k for k in keys],
+        "t": total,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[List[Any], int]:
+    """Decode a cursor created by encode_cursor. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        keys, total = list(payload["k"]), int(payload["t"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    # Only what encode_cursor writes: a tampered key must not reach the query
+    if any(isinstance(key, bool) or not isinstance(key, (str, int, float, type(None))) for key in keys):
+        raise ValueError("Invalid cursor")
+    return keys, total
+
+
+def _key_matches(column, value) -> bool:
+    """Whether a cursor key has the Python type of its sort column (untyped expressions accept any)."""
+    try:
+        expected = column.type.python_type
+    except NotImplementedError:
+        return True
+    if expected is datetime:
+        expected = str
+    elif expected is float:
+        expected = (int, float)
+    return isinstance(value, expected)
+
+
+def _bind_key(db: AsyncSession, column, value):
+    if value is not None and not _key_matches(column, value):
+        raise ValueError("Invalid cursor")
+    if value is None or not isinstance(column.type, DateTime):
+        return literal(value)
+    try:
+        value = datetime.fromisoformat(value)
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
+    if db.bind.dialect.name == "sqlite":
+        # SQLite stores server_default timestamps as 'YYYY-MM-DD HH:MM:SS' text,
+        # so bind the same textual form to keep the row comparison exact.
+        text = value.strftime("%Y-%m-%d %H:%M:%S")
+        if value.microsecond:
+            text += f".{value.microsecond:06d}"
+        return literal(text)
+    return literal(value, type_=column.type)
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    sort_columns: Sequence[Any],
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = False
+) -> Tuple[List[Any], int, Optional[str]]:
+    """
+    Keyset pagination over a stable, unique sort key (e.g. name + id).
+
+    Returns (items, total, next_cursor). Entity queries yield model instances,
+    column queries yield dicts. The total is counted once, on the first page,
+    and carried inside the cursor afterwards so deeper pages never re-count.
+    """
+    total = None
+    if cursor:
+        keys, total = decode_cursor(cursor)
+        if len(keys) != len(sort_columns):
+            raise ValueError("Invalid cursor")
+        row = tuple_(*sort_columns)
+        bound = tuple_(*[_bind_key(db, col, key) for col, key in zip(sort_columns, keys)])
+        stmt = stmt.where(row < bound if descending else row > bound)
+
+    if total is None:
+        total = await db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+
+    order_by = [col.desc() for col in sort_columns] if descending else list(sort_columns)
+    stmt = stmt.order_by(None).order_by(*order_by)
+
+    descriptions = stmt.column_descriptions
+    entity_query = len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]
+    key_labels = [f"_cursor_key_{i}" for i in range(len(sort_columns))]
+    result = await db.execute(stmt.add_columns(
+        *[col.label(label) for col, label in zip(sort_columns, key_labels)]
+    ).limit(limit + 1))
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]._mapping
+        next_cursor = encode_cursor([last[label] for label in key_labels], total)
+
+    if entity_query:
+        items = [row[0] for row in rows]
+    else:
+        items = [
+            {key: value for key, value in row._mapping.items() if key not in key_labels}
+            for row in rows
+        ]
+    return items, total, next_cursor
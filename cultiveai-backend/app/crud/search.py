@@ -0,0 +1,134 @@
+import re
+import unicodedata
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import Select, false, func, literal_column, or_, select, text, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models
+from ..db import search_index
+
+MIN_DIGITS = 3
+
+
+def normalize_text(value: str) -> str:
+    """Lowercase and strip accents ("São José" -> "sao jose")."""
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def digits_only(value: str) -> str:
+    return re.sub(r"\D", "", value)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _fts_match(term: str, numeric: bool = False) -> Optional[str]:
+    """Build an FTS5 MATCH expression with every word as a prefix."""
+    normalized = normalize_text(term)
+    tokens = re.findall(r"\w+", normalized)
+    # "(62) 9812-3456" is a phone/document lookup, not a list of words
+    if not tokens or (numeric and not re.search(r"[^\W\d_]", normalized)):
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _fts_select(table: str, match: str) -> Select:
+    return select(
+        literal_column("rowid").label("id"), literal_column("rank").label("rank")
+    ).select_from(text(table)).where(
+        text(f"{table} MATCH :{table}_match").bindparams(**{f"{table}_match": match})
+    )
+
+
+def _fts_hits(table: str, match: str):
+    # LIMIT -1 keeps SQLite from flattening the subquery into the outer join,
+    # which would re-run the MATCH once per candidate row (e.g. in COUNT(*))
+    return _fts_select(table, match).limit(-1).subquery()
+
+
+def _client_hits(term: str):
+    """Matching client ids and ranks: words in clients_fts, digits anywhere in clients_digits_fts."""
+    digits = digits_only(term)
+    numeric = len(digits) >= MIN_DIGITS
+    words = _fts_match(term, numeric)
+    if not numeric:
+        return _fts_hits("clients_fts", words) if words else None
+    digit_hits = _fts_select("clients_digits_fts", f'{{document_digits phone_digits}} : "{digits}"')
+    if not words:
+        return digit_hits.limit(-1).subquery()
+    hits = union_all(_fts_select("clients_fts", words), digit_hits).subquery()
+    # Ranks of the two tables are on different scales; a client in both keeps its best
+    return select(hits.c.id, func.min(hits.c.rank).label("rank")).group_by(hits.c.id).subquery()
+
+
+def search_clients(db: AsyncSession, query: Select, term: str) -> Tuple[Select, List[Any], bool]:
+    """
+    Filter a clients query by a relevance-ranked, accent-insensitive search.
+    Returns (query, sort_columns, descending) for use with paginate().
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        hits = _client_hits(term)
+        if hits is None:
+            return query.filter(false()), [models.Client.name, models.Client.id], False
+        query = query.join(hits, hits.c.id == models.Client.id)
+        return query, [hits.c.rank, models.Client.id], False
+
+    if dialect == "postgresql":
+        normalized = normalize_text(term)
+        text_expr = literal_column(search_index.PG_CLIENT_TEXT)
+        conditions = [text_expr.ilike(f"%{_escape_like(normalized)}%", escape="\\")]
+        digits = digits_only(term)
+        if len(digits) >= MIN_DIGITS:
+            conditions.append(literal_column(search_index.PG_CLIENT_DOCUMENT).like(f"%{digits}%"))
+            conditions.append(literal_column(search_index.PG_CLIENT_PHONE).like(f"%{digits}%"))
+        rank = func.word_similarity(normalized, text_expr).label("rank")
+        return query.filter(or_(*conditions)), [rank, models.Client.id], True
+
+    search_filter = f"%{term}%"
+    query = query.filter(
+        (models.Client.name.ilike(search_filter)) |
+        (models.Client.document.ilike(search_filter)) |
+        (models.Client.email.ilike(search_filter)) |
+        (models.Client.city.ilike(search_filter))
+    )
+    return query, [models.Client.name, models.Client.id], False
+
+
+def search_properties(db: AsyncSession, query: Select, term: str) -> Tuple[Select, List[Any], bool]:
+    """
+    Filter a properties query (already joined to Client) by property name,
+    city or client name. Returns (query, sort_columns, descending).
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        match = _fts_match(term)
+        if not match:
+            return query.filter(false()), [models.Property.name, models.Property.id], False
+        hits = _fts_hits("properties_fts", match)
+        query = query.join(hits, hits.c.id == models.Property.id)
+        return query, [hits.c.rank, models.Property.id], False
+
+    if dialect == "postgresql":
+        normalized = normalize_text(term)
+        pattern = f"%{_escape_like(normalized)}%"
+        property_expr = literal_column(search_index.PG_PROPERTY_TEXT)
+        client_expr = literal_column(search_index.PG_CLIENT_NAME)
+        query = query.filter(or_(
+            property_expr.ilike(pattern, escape="\\"),
+            client_expr.ilike(pattern, escape="\\"),
+        ))
+        rank = func.greatest(
+            func.word_similarity(normalized, property_expr),
+            func.word_similarity(normalized, client_expr),
+        ).label("rank")
+        return query, [rank, models.Property.id], True
+
+    search_filter = f"%{term}%"
+    query = query.filter(
+        (models.Property.name.ilike(search_filter)) |
+        (models.Property.city.ilike(search_filter)) |
+        (models.Client.name.ilike(search_filter))
+    )
+    return query, [models.Property.name, models.Property.id], False
@@ -1,5 +1,10 @@
 from .base_class import Base
 from ..models.user import User
+from ..models.geometry import Geometry, GeometrySimplification
 from ..models.client import Client
 from ..models.property import Property
-from ..models.analysis import AnalysisReport
\ No newline at end of file
+from ..models.analysis import AnalysisReport, ChangeReport
+from ..models.dashboard import DashboardSummary
+from ..models.auth_state import AuthState
+from ..models.rate_limit import RateLimit
+from ..models.analysis_request import AnalysisFlight, IdempotencyKey
\ No newline at end of file
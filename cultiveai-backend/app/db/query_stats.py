@@ -0,0 +1,131 @@
+"""
+SQL statements and their time, per HTTP request.
+
+instrument_engine hooks the engine so each statement adds to the
+QueryStats of the request (or check) that runs it. Routes declare how
+many statements they may issue with @query_budget(n): a fixed number,
+whatever the size of the result, so a per-row query (N+1) breaks it.
+
+With QUERY_DEBUG on (development), QueryDebugMiddleware adds the counts
+to every response (X-Query-Count, X-Query-Time-Ms) and logs the routes
+that went over budget. check_query_budgets.py runs every budgeted route
+against a small and a large dataset and fails on any overrun.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class QueryStats:
+    __slots__ = ("queries", "seconds", "started_at")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        self.started_at = 0.0
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+# A request's session runs one statement at a time, so one start time per request is enough
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats.started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += time.perf_counter() - stats.started_at
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count statements and their time toward the request that runs them."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """The stats of the enclosing request, or new ones when there is none."""
+    stats = _current.get()
+    if stats is not None:
+        yield stats
+        return
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def assert_max_queries(budget: int, label: str = "block") -> Iterator[QueryStats]:
+    """Fail with QueryBudgetExceeded if the block runs more than `budget` statements."""
+    with track_queries() as stats:
+        before = stats.queries
+        yield stats
+        used = stats.queries - before
+    if used > budget:
+        raise QueryBudgetExceeded(f"{label} ran {used} SQL statements, budget is {budget}")
+
+
+def query_budget(max_queries: int) -> Callable:
+    """
+    Declare the most SQL statements a route may run: the worst case, with a
+    cold token cache and, for a user's first write, the dashboard row built.
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.query_budget = max_queries
+        return endpoint
+    return decorator
+
+
+def budget_of(scope: Scope) -> Optional[int]:
+    """Budget of the endpoint the router matched, if it declares one."""
+    return getattr(scope.get("endpoint"), "query_budget", None)
+
+
+class QueryDebugMiddleware:
+    """Development aid: query counts on every response, and a log line for each overrun."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            before_queries, before_seconds = stats.queries, stats.seconds
+
+            async def send_with_counts(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    queries = stats.queries - before_queries
+                    headers = MutableHeaders(scope=message)
+                    headers["X-Query-Count"] = str(queries)
+                    headers["X-Query-Time-Ms"] = f"{(stats.seconds - before_seconds) * 1000:.1f}"
+                    budget = budget_of(scope)
+                    if budget is not None:
+                        headers["X-Query-Budget"] = str(budget)
+                        if queries > budget:
+                            print(f"AVISO: {scope['method']} {scope['path']} executou {queries} "
+                                  f"consultas SQL (orcamento {budget})")
+                await send(message)
+
+            await self.app(scope, receive, send_with_counts)
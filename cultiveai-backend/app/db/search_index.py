@@ -0,0 +1,134 @@
+"""
+Full-text search indexes for clients and properties.
+
+- SQLite: contentless FTS5 shadow tables (accent folding via the unicode61
+  tokenizer; client document/phone digits in a trigram table, so any part
+  of a number matches) kept in sync by triggers.
+- PostgreSQL: unaccent + pg_trgm GIN expression indexes. The indexed
+  expressions are shared with app.crud.search so the planner can use them.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+# Indexed expressions (PostgreSQL). Must match the expressions used in queries.
+PG_CLIENT_TEXT = "f_unaccent(lower(clients.name || ' ' || coalesce(clients.email, '') || ' ' || coalesce(clients.city, '')))"
+PG_CLIENT_NAME = "f_unaccent(lower(clients.name))"
+PG_CLIENT_DOCUMENT = "regexp_replace(coalesce(clients.document, ''), '\\D', '', 'g')"
+PG_CLIENT_PHONE = "regexp_replace(coalesce(clients.phone, ''), '\\D', '', 'g')"
+PG_PROPERTY_TEXT = "f_unaccent(lower(properties.name || ' ' || coalesce(properties.city, '')))"
+
+
+def _sqlite_digits(column: str) -> str:
+    expr = f"coalesce({column}, '')"
+    for char in (".", "-", "/", "(", ")", " ", "+"):
+        expr = f"replace({expr}, '{char}', '')"
+    return expr
+
+
+_SQLITE_CLIENT_TEXT = "{row}.name, {row}.email, {row}.city"
+_SQLITE_CLIENT_DIGITS = _sqlite_digits("{row}.document") + ", " + _sqlite_digits("{row}.phone")
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5(
+        name, email, city,
+        content='', prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    # Substring matches on digits ("98123" finds "62981234567"), like LIKE '%...%' on PostgreSQL
+    """CREATE VIRTUAL TABLE IF NOT EXISTS clients_digits_fts USING fts5(
+        document_digits, phone_digits, content='', tokenize='trigram'
+    )""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS properties_fts USING fts5(
+        name, city, client_name,
+        content='', prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS clients_fts_ai AFTER INSERT ON clients BEGIN
+        INSERT INTO clients_fts(rowid, name, email, city)
+        VALUES (new.id, {_SQLITE_CLIENT_TEXT.format(row="new")});
+        INSERT INTO clients_digits_fts(rowid, document_digits, phone_digits)
+        VALUES (new.id, {_SQLITE_CLIENT_DIGITS.format(row="new")});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS clients_fts_ad AFTER DELETE ON clients BEGIN
+        INSERT INTO clients_fts(clients_fts, rowid, name, email, city)
+        VALUES ('delete', old.id, {_SQLITE_CLIENT_TEXT.format(row="old")});
+        INSERT INTO clients_digits_fts(clients_digits_fts, rowid, document_digits, phone_digits)
+        VALUES ('delete', old.id, {_SQLITE_CLIENT_DIGITS.format(row="old")});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS clients_fts_au AFTER UPDATE ON clients BEGIN
+        INSERT INTO clients_fts(clients_fts, rowid, name, email, city)
+        VALUES ('delete', old.id, {_SQLITE_CLIENT_TEXT.format(row="old")});
+        INSERT INTO clients_fts(rowid, name, email, city)
+        VALUES (new.id, {_SQLITE_CLIENT_TEXT.format(row="new")});
+        INSERT INTO clients_digits_fts(clients_digits_fts, rowid, document_digits, phone_digits)
+        VALUES ('delete', old.id, {_SQLITE_CLIENT_DIGITS.format(row="old")});
+        INSERT INTO clients_digits_fts(rowid, document_digits, phone_digits)
+        VALUES (new.id, {_SQLITE_CLIENT_DIGITS.format(row="new")});
+    END""",
+    # Properties index the owning client's name, so keep it in sync on renames
+    """CREATE TRIGGER IF NOT EXISTS clients_fts_au_name AFTER UPDATE OF name ON clients
+    WHEN old.name IS NOT new.name BEGIN
+        INSERT INTO properties_fts(properties_fts, rowid, name, city, client_name)
+        SELECT 'delete', p.id, p.name, p.city, old.name FROM properties p WHERE p.client_id = old.id;
+        INSERT INTO properties_fts(rowid, name, city, client_name)
+        SELECT p.id, p.name, p.city, new.name FROM properties p WHERE p.client_id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS clients_fts_bd BEFORE DELETE ON clients BEGIN
+        INSERT INTO properties_fts(properties_fts, rowid, name, city, client_name)
+        SELECT 'delete', p.id, p.name, p.city, old.name FROM properties p WHERE p.client_id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS properties_fts_ai AFTER INSERT ON properties BEGIN
+        INSERT INTO properties_fts(rowid, name, city, client_name)
+        SELECT new.id, new.name, new.city, c.name FROM clients c WHERE c.id = new.client_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS properties_fts_ad AFTER DELETE ON properties BEGIN
+        INSERT INTO properties_fts(properties_fts, rowid, name, city, client_name)
+        SELECT 'delete', old.id, old.name, old.city, c.name FROM clients c WHERE c.id = old.client_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS properties_fts_au AFTER UPDATE ON properties BEGIN
+        INSERT INTO properties_fts(properties_fts, rowid, name, city, client_name)
+        SELECT 'delete', old.id, old.name, old.city, c.name FROM clients c WHERE c.id = old.client_id;
+        INSERT INTO properties_fts(rowid, name, city, client_name)
+        SELECT new.id, new.name, new.city, c.name FROM clients c WHERE c.id = new.client_id;
+    END""",
+]
+
+SQLITE_BACKFILL = [
+    f"""INSERT INTO clients_fts(rowid, name, email, city)
+        SELECT clients.id, {_SQLITE_CLIENT_TEXT.format(row="clients")} FROM clients""",
+    f"""INSERT INTO clients_digits_fts(rowid, document_digits, phone_digits)
+        SELECT clients.id, {_SQLITE_CLIENT_DIGITS.format(row="clients")} FROM clients""",
+    """INSERT INTO properties_fts(rowid, name, city, client_name)
+        SELECT p.id, p.name, p.city, c.name FROM properties p JOIN clients c ON c.id = p.client_id""",
+]
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # unaccent() is only STABLE; an IMMUTABLE wrapper is required for indexing
+    """CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS
+        $$ SELECT public.unaccent('public.unaccent', $1) $$
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT""",
+    f"CREATE INDEX IF NOT EXISTS ix_clients_search_trgm ON clients USING gin (({PG_CLIENT_TEXT}) gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS ix_clients_name_trgm ON clients USING gin (({PG_CLIENT_NAME}) gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS ix_clients_document_trgm ON clients USING gin (({PG_CLIENT_DOCUMENT}) gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS ix_clients_phone_trgm ON clients USING gin (({PG_CLIENT_PHONE}) gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS ix_properties_search_trgm ON properties USING gin (({PG_PROPERTY_TEXT}) gin_trgm_ops)",
+]
+
+
+def install_search_index(bind) -> None:
+    """Create the dialect-specific search structures (idempotent)."""
+    dialect = bind.dialect.name
+    if dialect == "sqlite":
+        is_new = not inspect(bind).has_table("clients_fts")
+        statements = SQLITE_DDL + (SQLITE_BACKFILL if is_new else [])
+    elif dialect == "postgresql":
+        statements = POSTGRES_DDL
+    else:
+        return
+    if isinstance(bind, Engine):
+        with bind.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+    else:
+        for statement in statements:
+            bind.execute(text(statement))
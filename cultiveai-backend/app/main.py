@@ -1,9 +1,13 @@
 import os
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from .core.config import PROJECT_NAME, API_V1_STR
-from .api.endpoints import auth, analysis, clients, properties
+from .core.config import PROJECT_NAME, API_V1_STR, QUERY_DEBUG
+from .core.compression import CompressionMiddleware, GZipRequestMiddleware
+from .core import metrics
+from .db import query_stats
+from .db.session import async_engine
+from .api.endpoints import auth, analysis, clients, dashboard, properties, tiles
 
 app = FastAPI(
     title=PROJECT_NAME,
@@ -20,18 +24,26 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(GZipRequestMiddleware)
+if QUERY_DEBUG:
+    app.add_middleware(query_stats.QueryDebugMiddleware)
+# Outermost, so request latency includes compression
+app.add_middleware(metrics.MetricsMiddleware)
+query_stats.instrument_engine(async_engine.sync_engine)
 
 app.include_router(auth.router, prefix=f"{API_V1_STR}/auth", tags=["auth"])
 app.include_router(clients.router, prefix=f"{API_V1_STR}/clients", tags=["clients"])
 app.include_router(properties.router, prefix=f"{API_V1_STR}/properties", tags=["properties"])
 app.include_router(analysis.router, prefix=f"{API_V1_STR}/analysis", tags=["analysis"])
+app.include_router(dashboard.router, prefix=f"{API_V1_STR}/dashboard", tags=["dashboard"])
+app.include_router(tiles.router, prefix=f"{API_V1_STR}/tiles", tags=["tiles"])
 
 
-@app.on_event("startup")
-def on_startup():
-    from .db.base import Base
-    from .db.session import engine
-    Base.metadata.create_all(bind=engine)
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """Prometheus scrape endpoint; only reachable inside the deployment (nginx proxies /api/ alone)."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
 
 
 @app.get("/")
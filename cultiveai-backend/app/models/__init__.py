@@ -1,4 +1,9 @@
 from .user import User
+from .geometry import Geometry, GeometrySimplification
 from .client import Client
 from .property import Property
-from .analysis import AnalysisReport
\ No newline at end of file
+from .analysis import AnalysisReport, ChangeReport
+from .dashboard import DashboardSummary
+from .auth_state import AuthState
+from .rate_limit import RateLimit
+from .analysis_request import AnalysisFlight, IdempotencyKey
\ No newline at end of file
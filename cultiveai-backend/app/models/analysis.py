@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, JSON, DateTime, ForeignKey, Text
+import builtins
+from sqlalchemy import Column, Integer, String, Float, JSON, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db.base_class import Base
@@ -6,19 +7,28 @@ from ..db.base_class import Base
 
 class AnalysisReport(Base):
     __tablename__ = "analysis_reports"
+    __table_args__ = (
+        # Report listing: WHERE owner_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_analysis_reports_owner_id_created_at", "owner_id", "created_at", "id"),
+        # Latest report of a property (dashboard class distribution)
+        Index("ix_analysis_reports_property_id_created_at", "property_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped by crud when a tile URL is replaced; ETags use it
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     title = Column(String(255), nullable=True)
-    owner_id = Column(Integer, ForeignKey("users.id"))
-    property_id = Column(Integer, ForeignKey("properties.id"), nullable=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    property_id = Column(Integer, ForeignKey("properties.id", ondelete="CASCADE"), nullable=True)
 
     owner = relationship("User", back_populates="reports")
     property = relationship("Property", back_populates="reports")
 
-    aoi_geojson = Column(JSON, nullable=False)
+    aoi_geometry_id = Column(Integer, ForeignKey("geometries.id"), nullable=False, index=True)
+    aoi_geometry = relationship("Geometry", lazy="joined")
     aoi_area_hectares = Column(Float)
     analysis_period = Column(JSON)
     satellite_image_info = Column(JSON)
@@ -26,4 +36,35 @@ class AnalysisReport(Base):
     degradation_summary = Column(JSON)
     ai_description = Column(Text)
     map_layers_urls = Column(JSON)
-    report_html = Column(Text)
\ No newline at end of file
+    report_html = Column(Text)
+    # One entry per paddock of the property (zonal mode), most degraded first
+    paddock_summary = Column(JSON, nullable=True)
+
+    @builtins.property  # plain `property` is the relationship above
+    def aoi_geojson(self):
+        return self.aoi_geometry.geojson if self.aoi_geometry is not None else None
+
+
+class ChangeReport(Base):
+    """NDVI change of an area between two periods (POST /analysis/change)."""
+    __tablename__ = "change_reports"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    aoi_geometry_id = Column(Integer, ForeignKey("geometries.id"), nullable=False, index=True)
+    aoi_geometry = relationship("Geometry", lazy="joined")
+    aoi_area_hectares = Column(Float)
+    before_period = Column(JSON)
+    after_period = Column(JSON)
+    ndvi_stats = Column(JSON)
+    transitions = Column(JSON)
+    # Made by the tile cache on first use
+    map_layers_urls = Column(JSON)
+    # Bumped by crud when a tile URL is set or replaced
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    @builtins.property
+    def aoi_geojson(self):
+        return self.aoi_geometry.geojson if self.aoi_geometry is not None else None
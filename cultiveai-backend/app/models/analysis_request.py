@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from ..db.base_class import Base
+
+
+class AnalysisFlight(Base):
+    """
+    The analysis running, or just finished, for one user and request
+    fingerprint; identical requests wait on it (see services/single_flight).
+    """
+    __tablename__ = "analysis_flights"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    fingerprint = Column(String(64), primary_key=True)
+    started_at = Column(Float, nullable=False)  # epoch seconds; also identifies the run
+    finished_at = Column(Float, nullable=True)
+    report_id = Column(Integer, ForeignKey("analysis_reports.id", ondelete="CASCADE"), nullable=True)
+
+
+class IdempotencyKey(Base):
+    """Report created for an Idempotency-Key of POST /analysis/, replayed on retries."""
+    __tablename__ = "idempotency_keys"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    report_id = Column(Integer, ForeignKey("analysis_reports.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(Float, nullable=False)  # epoch seconds
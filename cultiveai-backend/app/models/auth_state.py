@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, BigInteger
+from ..db.base_class import Base
+
+
+class AuthState(Base):
+    """Single row (id=1) whose version changes whenever a user does; see services/auth_cache."""
+    __tablename__ = "auth_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
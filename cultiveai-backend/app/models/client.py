@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db.base_class import Base
@@ -6,10 +6,16 @@ from ..db.base_class import Base
 
 class Client(Base):
     __tablename__ = "clients"
+    __table_args__ = (
+        # Listing order: WHERE owner_id = ? ORDER BY name, id
+        Index("ix_clients_owner_id_name", "owner_id", "name", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped by crud on every update; ETags use it (updated_at has 1 s resolution on SQLite)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     name = Column(String(255), nullable=False)
     document = Column(String(20), nullable=True)  # CPF or CNPJ
@@ -20,7 +26,8 @@ class Client(Base):
     state = Column(String(2), nullable=True)
     notes = Column(String(1000), nullable=True)
 
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     owner = relationship("User", back_populates="clients")
 
-    properties = relationship("Property", back_populates="client", cascade="all, delete-orphan")
+    # Children are removed by ON DELETE CASCADE, without loading them first
+    properties = relationship("Property", back_populates="client", cascade="all, delete-orphan", passive_deletes=True)
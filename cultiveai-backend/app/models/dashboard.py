@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, Float, JSON, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from ..db.base_class import Base
+
+
+class DashboardSummary(Base):
+    """Per-user portfolio totals, updated by crud_dashboard on every write that changes them."""
+    __tablename__ = "dashboard_summaries"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    clients_count = Column(Integer, nullable=False, default=0)
+    properties_count = Column(Integer, nullable=False, default=0)
+    reports_count = Column(Integer, nullable=False, default=0)
+    analyzed_hectares = Column(Float, nullable=False, default=0.0)  # sum of aoi_area_hectares of all reports
+    # Hectares per degradation class, over the latest report of each property
+    class_areas = Column(JSON, nullable=False, default=dict)
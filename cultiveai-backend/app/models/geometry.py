@@ -0,0 +1,25 @@
+from sqlalchemy import Column, ForeignKey, Integer, String, JSON, DateTime
+from sqlalchemy.sql import func
+from ..db.base_class import Base
+
+
+class Geometry(Base):
+    """A GeoJSON document stored once and shared by properties and reports."""
+    __tablename__ = "geometries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # sha256 of the canonical JSON (sorted keys, no whitespace), see crud_geometry
+    hash = Column(String(64), nullable=False, unique=True)
+    geojson = Column(JSON, nullable=False)
+
+
+class GeometrySimplification(Base):
+    """A property boundary simplified for the map at one zoom level (geometry_service.simplifications)."""
+    __tablename__ = "geometry_simplifications"
+
+    geometry_id = Column(Integer, ForeignKey("geometries.id", ondelete="CASCADE"), primary_key=True)
+    zoom = Column(Integer, primary_key=True)
+    # Bare GeoJSON geometry
+    geojson = Column(JSON, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, JSON, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db.base_class import Base
@@ -6,19 +6,48 @@ from ..db.base_class import Base
 
 class Property(Base):
     __tablename__ = "properties"
+    __table_args__ = (
+        # Per-client listing and properties_count: WHERE client_id = ? ORDER BY name, id
+        Index("ix_properties_client_id_name", "client_id", "name", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped by crud on every update; ETags use it (updated_at has 1 s resolution on SQLite)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     name = Column(String(255), nullable=False)
     total_area_hectares = Column(Float, nullable=True)
-    geojson_boundary = Column(JSON, nullable=True)
+    # Boundary GeoJSON lives in the shared geometries table (see crud_geometry)
+    boundary_geometry_id = Column(Integer, ForeignKey("geometries.id"), nullable=True, index=True)
+    boundary_geometry = relationship("Geometry", lazy="joined", foreign_keys=[boundary_geometry_id])
+    # Paddocks (piquetes): a FeatureCollection of polygons with a "name" each, analysed one by one
+    paddocks_geometry_id = Column(Integer, ForeignKey("geometries.id"), nullable=True, index=True)
+    paddocks_geometry = relationship("Geometry", lazy="joined", foreign_keys=[paddocks_geometry_id])
+    # Bounding box of geojson_boundary, kept in sync by crud_property
+    bbox_min_lon = Column(Float, nullable=True)
+    bbox_min_lat = Column(Float, nullable=True)
+    bbox_max_lon = Column(Float, nullable=True)
+    bbox_max_lat = Column(Float, nullable=True)
+    # Derived from geojson_boundary on save, so readers need not parse it
+    boundary_area_hectares = Column(Float, nullable=True)  # geodesic, vs the user-entered total_area_hectares
+    centroid_lon = Column(Float, nullable=True)
+    centroid_lat = Column(Float, nullable=True)
+    vertex_count = Column(Integer, nullable=True)
     city = Column(String(100), nullable=True)
     state = Column(String(2), nullable=True)
     notes = Column(String(1000), nullable=True)
 
-    client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
+    client_id = Column(Integer, ForeignKey("clients.id", ondelete="CASCADE"), nullable=False)
     client = relationship("Client", back_populates="properties")
 
-    reports = relationship("AnalysisReport", back_populates="property", cascade="all, delete-orphan")
+    reports = relationship("AnalysisReport", back_populates="property", cascade="all, delete-orphan", passive_deletes=True)
+
+    @property
+    def geojson_boundary(self):
+        return self.boundary_geometry.geojson if self.boundary_geometry is not None else None
+
+    @property
+    def paddocks(self):
+        return self.paddocks_geometry.geojson if self.paddocks_geometry is not None else None
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from ..db.base_class import Base
+
+
+class RateLimit(Base):
+    """
+    Admission state of one user on one class of expensive routes, shared by
+    the uvicorn workers (see services/admission). The limit columns, when
+    set, override that user's defaults from config.
+    """
+    __tablename__ = "rate_limits"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    route_class = Column(String(20), primary_key=True)  # "analysis" or "download"
+
+    # Per-account limits; null means the default
+    per_minute = Column(Float, nullable=True)
+    burst = Column(Float, nullable=True)
+    concurrency = Column(Integer, nullable=True)
+    weight = Column(Float, nullable=True)  # share of the worker queue relative to other users (default 1)
+
+    # Token bucket (epoch seconds; a new row starts full) and requests running now
+    tokens = Column(Float, nullable=False, server_default="0")
+    refilled_at = Column(Float, nullable=False, server_default="0")
+    in_flight = Column(Integer, nullable=False, server_default="0")
+    admitted_at = Column(Float, nullable=False, server_default="0")
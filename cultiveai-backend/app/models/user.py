@@ -14,5 +14,5 @@ class User(Base):
     full_name = Column(String(255), nullable=True)
     is_active = Column(Integer, default=1)
 
-    reports = relationship("AnalysisReport", back_populates="owner", cascade="all, delete-orphan")
-    clients = relationship("Client", back_populates="owner", cascade="all, delete-orphan")
\ No newline at end of file
+    reports = relationship("AnalysisReport", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
+    clients = relationship("Client", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
\ No newline at end of file
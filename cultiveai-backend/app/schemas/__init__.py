@@ -2,6 +2,10 @@
 
 from .user import User, UserCreate, UserUpdate
 from .token import Token, TokenData, TokenPair
-from .analysis import GeoJSONInput, AnalysisResultBase, AnalysisReportCreate, AnalysisReport, AnalysisResponse
+from .analysis import GeoJSONInput, AnalysisResultBase, AnalysisReportCreate, AnalysisReport, AnalysisResponse, AnalysisSummary, AnalysisPeriod, ChangeDetectionInput, ChangeReport
 from .client import Client, ClientCreate, ClientUpdate, ClientWithProperties
-from .property import Property, PropertyCreate, PropertyUpdate, PropertyWithClient
\ No newline at end of file
+from .property import Property, PropertyCreate, PropertyUpdate, PropertyWithClient, PropertyIntersection
+from .pagination import Page
+from .importing import ImportRowError, ImportResult
+
+from .dashboard import ClassArea, DashboardSummary
\ No newline at end of file
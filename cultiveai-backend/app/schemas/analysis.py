@@ -1,10 +1,12 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationInfo, computed_field, field_validator
 from typing import Dict, Any, List, Optional
-from datetime import datetime
+from datetime import date, datetime
+from ..core.security import tile_signature
 
 class GeoJSONInput(BaseModel):
     type: str = Field(..., example="FeatureCollection")
     features: List[Dict[str, Any]] = Field(..., min_items=1)
+    property_id: Optional[int] = None
 
 class AnalysisResultBase(BaseModel):
     aoi_area_hectares: float
@@ -14,6 +16,9 @@ class AnalysisResultBase(BaseModel):
     degradation_summary: List[Dict[str, Any]]
     ai_description: str
     map_layers_urls: Dict[str, Optional[str]]
+    # Per paddock of the property, most degraded first: name, area_hectares, ndvi_min/mean/max,
+    # class_percentages (classes 1-5) and degraded_percentage (classes 1 and 2)
+    paddock_summary: Optional[List[Dict[str, Any]]] = None
 
 class AnalysisReportCreate(AnalysisResultBase):
     aoi_geojson: Dict[str, Any]
@@ -23,10 +28,78 @@ class AnalysisReport(AnalysisResultBase):
     id: int
     created_at: datetime
     owner_id: int
+    property_id: Optional[int] = None
     aoi_geojson: Dict[str, Any]
 
     class Config:
         from_attributes = True
 
 class AnalysisResponse(AnalysisReport):
-    pass
\ No newline at end of file
+    @computed_field
+    @property
+    def tile_urls(self) -> Dict[str, str]:
+        """map_layers_urls through the API's tile cache (/tiles), relative to the API base URL; these do not expire."""
+        urls = {}
+        for key, url in (self.map_layers_urls or {}).items():
+            if url and key.endswith("_url"):
+                layer = key[:-len("_url")]
+                urls[key] = f"/tiles/{self.id}/{layer}/{{z}}/{{x}}/{{y}}.png?sig={tile_signature(self.id, layer)}"
+        return urls
+
+class AnalysisSummary(BaseModel):
+    id: int
+    created_at: datetime
+    title: Optional[str] = None
+    property_id: Optional[int] = None
+    property_name: Optional[str] = None
+    aoi_area_hectares: Optional[float] = None
+    ndvi_mean: Optional[float] = None
+    dominant_class: Optional[str] = None
+
+    class Config:
+        # Columns requested through `fields=` are passed through as extras
+        extra = "allow"
+
+class AnalysisPeriod(BaseModel):
+    start_date: date
+    end_date: date
+
+    @field_validator("end_date")
+    @classmethod
+    def validate_end_date(cls, v, info: ValidationInfo):
+        start_date = info.data.get("start_date")
+        if start_date is not None and v <= start_date:
+            raise ValueError("A data final deve ser posterior à inicial")
+        return v
+
+class ChangeDetectionInput(BaseModel):
+    type: str = Field(..., example="FeatureCollection")
+    features: List[Dict[str, Any]] = Field(..., min_items=1)
+    before: AnalysisPeriod
+    after: AnalysisPeriod
+
+class ChangeReport(BaseModel):
+    id: int
+    created_at: datetime
+    owner_id: int
+    aoi_geojson: Dict[str, Any]
+    aoi_area_hectares: float
+    # start_date, end_date and the number of scenes in the composite
+    before_period: Dict[str, Any]
+    after_period: Dict[str, Any]
+    # before, after and change (after minus before): min, mean and max
+    ndvi_stats: Dict[str, Dict[str, Optional[float]]]
+    # Area moving from one degradation class to another, largest first
+    transitions: List[Dict[str, Any]]
+
+    class Config:
+        from_attributes = True
+
+    @computed_field
+    @property
+    def tile_urls(self) -> Dict[str, str]:
+        """The change map through the API's tile cache (/tiles/change), relative to the API base URL."""
+        return {
+            "ndvi_change_url": f"/tiles/change/{self.id}/ndvi_change/{{z}}/{{x}}/{{y}}.png"
+                               f"?sig={tile_signature(self.id, 'ndvi_change', 'change')}"
+        }
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+
+class ClassArea(BaseModel):
+    class_name: str
+    area_hectares: float
+    percentage: float
+
+
+class DashboardSummary(BaseModel):
+    clients: int
+    properties: int
+    reports: int
+    analyzed_hectares: float
+    # Latest report of each property, weighted by area
+    class_distribution: List[ClassArea]
+    updated_at: Optional[datetime] = None
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+
+class ImportResult(BaseModel):
+    total_rows: int
+    created: int
+    failed: int
+    errors: List[ImportRowError]
+    dry_run: bool = False
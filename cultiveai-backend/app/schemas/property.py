@@ -7,16 +7,51 @@ VALID_STATES = {
     "MT","MS","MG","PA","PB","PR","PE","PI","RJ","RN",
     "RS","RO","RR","SC","SP","SE","TO"
 }
+MAX_PADDOCKS = 500
+
+
+def normalize_paddocks(v):
+    """A FeatureCollection of uniquely named polygons, reduced to name and geometry; None when empty."""
+    if v is None:
+        return None
+    if not isinstance(v, dict) or v.get("type") != "FeatureCollection" or not isinstance(v.get("features"), list):
+        raise ValueError("Os piquetes devem ser um GeoJSON FeatureCollection")
+    if not v["features"]:
+        return None
+    if len(v["features"]) > MAX_PADDOCKS:
+        raise ValueError(f"No máximo {MAX_PADDOCKS} piquetes por propriedade")
+    features = []
+    names = set()
+    for feature in v["features"]:
+        feature = feature if isinstance(feature, dict) else {}
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") not in ("Polygon", "MultiPolygon"):
+            raise ValueError("Cada piquete deve ser um polígono")
+        name = str((feature.get("properties") or {}).get("name") or "").strip()
+        if not name:
+            raise ValueError("Cada piquete precisa de um nome (properties.name)")
+        if name in names:
+            raise ValueError(f"Piquete repetido: {name}")
+        names.add(name)
+        features.append({"type": "Feature", "properties": {"name": name}, "geometry": geometry})
+    return {"type": "FeatureCollection", "features": features}
 
 
 class PropertyBase(BaseModel):
     name: str
     total_area_hectares: Optional[float] = None
     geojson_boundary: Optional[Any] = None
+    # Piquetes: FeatureCollection of polygons, each with properties.name
+    paddocks: Optional[Any] = None
     city: Optional[str] = None
     state: Optional[str] = None
     notes: Optional[str] = None
 
+    @field_validator("paddocks")
+    @classmethod
+    def validate_paddocks(cls, v):
+        return normalize_paddocks(v)
+
     @field_validator("state")
     @classmethod
     def validate_state(cls, v):
@@ -35,10 +70,17 @@ class PropertyUpdate(BaseModel):
     name: Optional[str] = None
     total_area_hectares: Optional[float] = None
     geojson_boundary: Optional[Any] = None
+    # Piquetes: FeatureCollection of polygons, each with properties.name
+    paddocks: Optional[Any] = None
     city: Optional[str] = None
     state: Optional[str] = None
     notes: Optional[str] = None
 
+    @field_validator("paddocks")
+    @classmethod
+    def validate_paddocks(cls, v):
+        return normalize_paddocks(v)
+
     @field_validator("state")
     @classmethod
     def validate_state(cls, v):
@@ -55,6 +97,15 @@ class Property(PropertyBase):
     updated_at: Optional[datetime] = None
     client_id: int
     reports_count: Optional[int] = 0
+    # Derived from geojson_boundary when it is saved
+    boundary_area_hectares: Optional[float] = None
+    centroid_lon: Optional[float] = None
+    centroid_lat: Optional[float] = None
+    vertex_count: Optional[int] = None
+    bbox_min_lon: Optional[float] = None
+    bbox_min_lat: Optional[float] = None
+    bbox_max_lon: Optional[float] = None
+    bbox_max_lat: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -62,3 +113,11 @@ class Property(PropertyBase):
 
 class PropertyWithClient(Property):
     client_name: Optional[str] = None
+
+
+class PropertyIntersection(BaseModel):
+    id: int
+    name: str
+    client_id: int
+    client_name: Optional[str] = None
+    overlap_ratio: float
@@ -0,0 +1,223 @@
+"""
+Admission control for the expensive routes (POST /analysis/, downloads).
+
+Two checks, in order:
+
+1. Per user, shared by every uvicorn worker through the rate_limits table:
+   a token bucket (RATE_PER_MINUTE, BURST) and a cap on requests running
+   at once (CONCURRENCY). Both are decided by one conditional UPDATE, so
+   concurrent workers cannot admit past them. A rejection carries the
+   seconds until a retry can succeed.
+2. Per worker: at most WORKER_SLOTS requests of the class run at once. The
+   others wait in a FairQueue, where users take turns in proportion to
+   their weight however many requests each has queued, so one user's
+   flood only delays that user. Past ADMISSION_QUEUE_TIMEOUT the request
+   is turned away.
+
+Limits come from config unless the user's rate_limits row overrides them.
+A worker that dies mid-request leaves its count in in_flight; counts are
+ignored once the user has not been admitted for LEASE_SECONDS.
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Tuple
+
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .. import models
+from ..core import metrics
+from ..core.config import (
+    ANALYSIS_RATE_PER_MINUTE, ANALYSIS_BURST, ANALYSIS_CONCURRENCY, ANALYSIS_WORKER_SLOTS,
+    DOWNLOAD_RATE_PER_MINUTE, DOWNLOAD_BURST, DOWNLOAD_CONCURRENCY, DOWNLOAD_WORKER_SLOTS,
+    ADMISSION_QUEUE_TIMEOUT,
+)
+from ..db.session import AsyncSessionLocal
+
+# Longer than any analysis runs
+LEASE_SECONDS = 600.0
+# Suggested wait when the user is at the concurrency cap (when a slot frees up is unknown)
+CONCURRENCY_RETRY_AFTER = 5
+
+
+@dataclass(frozen=True)
+class Limits:
+    per_minute: float
+    burst: float
+    concurrency: int
+    worker_slots: int
+
+
+LIMITS = {
+    "analysis": Limits(ANALYSIS_RATE_PER_MINUTE, ANALYSIS_BURST, ANALYSIS_CONCURRENCY, ANALYSIS_WORKER_SLOTS),
+    "download": Limits(DOWNLOAD_RATE_PER_MINUTE, DOWNLOAD_BURST, DOWNLOAD_CONCURRENCY, DOWNLOAD_WORKER_SLOTS),
+}
+
+
+class AdmissionRejected(Exception):
+    """`status_code` 429 (the user's limits) or 503 (the worker queue), and seconds until a retry."""
+
+    def __init__(self, status_code: int, retry_after: float, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.detail = detail
+
+
+class FairQueue:
+    """
+    At most `slots` holders at once. Waiters are served by start-time fair
+    queuing: each request of a user starts 1/weight of virtual time after
+    that user's previous one, and the earliest start goes first.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.busy = 0
+        self._virtual_time = 0.0
+        self._finish: Dict[int, float] = {}
+        self._waiting: List[Tuple[float, int, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    def _start_tag(self, user_id: int, weight: float) -> float:
+        start = max(self._virtual_time, self._finish.get(user_id, 0.0))
+        self._finish[user_id] = start + 1.0 / weight
+        if len(self._finish) > 10000:
+            self._finish = {u: f for u, f in self._finish.items() if f > self._virtual_time}
+        return start
+
+    async def acquire(self, user_id: int, weight: float, timeout: float) -> bool:
+        """Wait for a slot; False if none came within `timeout` seconds."""
+        tag = self._start_tag(user_id, weight)
+        if self.busy < self.slots and not self._waiting:
+            self.busy += 1
+            self._virtual_time = tag
+            return True
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (tag, next(self._order), future))
+        try:
+            done, _ = await asyncio.wait({future}, timeout=timeout)
+        except asyncio.CancelledError:
+            self._abandon(future)
+            raise
+        if not done:
+            self._abandon(future)
+            return False
+        return True
+
+    def _abandon(self, future: asyncio.Future) -> None:
+        if future.done() and not future.cancelled():
+            # Granted just as the waiter gave up
+            self.release()
+        else:
+            future.cancel()
+
+    def release(self) -> None:
+        self.busy -= 1
+        while self._waiting:
+            tag, _, future = heapq.heappop(self._waiting)
+            if not future.cancelled():
+                self.busy += 1
+                self._virtual_time = tag
+                future.set_result(None)
+                return
+
+
+_queues = {route_class: FairQueue(limits.worker_slots) for route_class, limits in LIMITS.items()}
+
+
+def _limit(row, limits: Limits, name: str):
+    value = getattr(row, name)
+    return getattr(limits, name) if value is None else value
+
+
+async def _take(user_id: int, route_class: str) -> float:
+    """Spend a token and a concurrency unit of the user; their queue weight, or AdmissionRejected."""
+    limits = LIMITS[route_class]
+    table = models.RateLimit
+    key = (table.user_id == user_id, table.route_class == route_class)
+    async with AsyncSessionLocal() as db:
+        for _ in range(2):
+            now = time.time()
+            rate = func.coalesce(table.per_minute, limits.per_minute)
+            refilled = table.tokens + (now - table.refilled_at) * rate / 60.0
+            burst = func.coalesce(table.burst, limits.burst)
+            tokens = case((refilled > burst, burst), else_=refilled)
+            in_flight = case((table.admitted_at < now - LEASE_SECONDS, 0), else_=table.in_flight)
+            weight = await db.scalar(
+                update(table)
+                .where(*key, tokens >= 1, in_flight < func.coalesce(table.concurrency, limits.concurrency))
+                .values(tokens=tokens - 1, refilled_at=now, in_flight=in_flight + 1, admitted_at=now)
+                .returning(func.coalesce(table.weight, 1.0))
+            )
+            if weight is not None:
+                await db.commit()
+                return weight
+
+            row = (await db.execute(
+                select(table.per_minute, table.burst, table.tokens, table.refilled_at).where(*key)
+            )).one_or_none()
+            if row is None:
+                try:
+                    await db.execute(insert(table).values(
+                        user_id=user_id, route_class=route_class,
+                        tokens=limits.burst - 1, refilled_at=now, in_flight=1, admitted_at=now,
+                    ))
+                    await db.commit()
+                    return 1.0
+                except IntegrityError:
+                    # Another worker created it first
+                    await db.rollback()
+                    continue
+            await db.rollback()
+
+            rate = _limit(row, limits, "per_minute")
+            available = min(_limit(row, limits, "burst"), row.tokens + (now - row.refilled_at) * rate / 60.0)
+            if available < 1:
+                metrics.ADMISSIONS.labels(route_class, "rate_limited").inc()
+                raise AdmissionRejected(
+                    429, (1 - available) * 60.0 / rate if rate > 0 else LEASE_SECONDS,
+                    "Limite de requisições atingido; tente novamente em instantes",
+                )
+            metrics.ADMISSIONS.labels(route_class, "concurrency").inc()
+            raise AdmissionRejected(
+                429, CONCURRENCY_RETRY_AFTER, "Há requisições suas em andamento; aguarde a conclusão delas",
+            )
+    raise AdmissionRejected(429, CONCURRENCY_RETRY_AFTER, "Limite de requisições atingido")
+
+
+async def _give_back(user_id: int, route_class: str) -> None:
+    table = models.RateLimit
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(table)
+            .where(table.user_id == user_id, table.route_class == route_class)
+            .values(in_flight=case((table.in_flight > 0, table.in_flight - 1), else_=0))
+        )
+        await db.commit()
+
+
+@asynccontextmanager
+async def admit(user_id: int, route_class: str) -> AsyncIterator[None]:
+    """Hold one admission of `route_class` for the user, or raise AdmissionRejected."""
+    weight = await _take(user_id, route_class)
+    try:
+        queue = _queues[route_class]
+        start = time.perf_counter()
+        if not await queue.acquire(user_id, weight, ADMISSION_QUEUE_TIMEOUT):
+            metrics.ADMISSIONS.labels(route_class, "queue_timeout").inc()
+            raise AdmissionRejected(503, ADMISSION_QUEUE_TIMEOUT, "Servidor ocupado; tente novamente em instantes")
+        metrics.ADMISSION_WAIT.labels(route_class).observe(time.perf_counter() - start)
+        metrics.ADMISSIONS.labels(route_class, "admitted").inc()
+        try:
+            yield
+        finally:
+            queue.release()
+    finally:
+        # Still runs if the client went away mid-request
+        await asyncio.shield(_give_back(user_id, route_class))
@@ -1,13 +1,15 @@
 import google.generativeai as genai
-from ..core import config
+from ..core import config, metrics
 
 genai.configure(api_key=config.GEMINI_API_KEY)
 model = genai.GenerativeModel(
     model_name=config.GEMINI_MODEL_NAME,
     generation_config=config.GEMINI_GENERATION_CONFIG
 )
+# Paddocks listed in the prompt, most degraded first
+PROMPT_PADDOCKS = 10
 
-def generate_ai_description(ndvi_stats: dict, pixel_counts_dict: dict, aoi_area_sqm: float, location_context: str = "uma área rural no Brasil"):
+def generate_ai_description(ndvi_stats: dict, pixel_counts_dict: dict, aoi_area_sqm: float, location_context: str = "uma área rural no Brasil", paddock_summary: list = None):
     if not ndvi_stats or not pixel_counts_dict:
         return "Não foi possível gerar uma descrição detalhada devido à falta de dados de NDVI ou contagem de pixels."
 
@@ -30,6 +32,15 @@ def generate_ai_description(ndvi_stats: dict, pixel_counts_dict: dict, aoi_area_
             class_name = config.DEGRADATION_CLASS_NAMES.get(str(int(float(class_id_str))), f"Classe {class_id_str}")
             percentage = (count / total_pixels) * 100
             prompt_parts.append(f"  - {class_name}: {percentage:.2f}%\n")
+
+    if paddock_summary:
+        # Already ranked; the most degraded are where to intervene first
+        prompt_parts.append(f"- **Piquetes mais degradados** (de {len(paddock_summary)}):\n")
+        for paddock in paddock_summary[:PROMPT_PADDOCKS]:
+            ndvi_mean = f"{paddock['ndvi_mean']:.3f}" if paddock['ndvi_mean'] is not None else "n/d"
+            prompt_parts.append(
+                f"  - {paddock['name']}: {paddock['degraded_percentage']:.1f}% com degradação severa ou moderada, NDVI médio {ndvi_mean}\n"
+            )
     
     prompt_parts.append(
         "\n**Diagnóstico e Recomendações:**\n"
@@ -38,7 +49,8 @@ def generate_ai_description(ndvi_stats: dict, pixel_counts_dict: dict, aoi_area_
     )
 
     try:
-        response = model.generate_content("".join(prompt_parts))
+        with metrics.GEMINI_LATENCY.time():
+            response = model.generate_content("".join(prompt_parts))
         return response.text
     except Exception as e:
         error_msg = str(e).lower()
@@ -46,9 +58,12 @@ def generate_ai_description(ndvi_stats: dict, pixel_counts_dict: dict, aoi_area_
 
         # Tratamento especifico para erro de quota
         if "429" in str(e) or "quota" in error_msg or "rate limit" in error_msg:
+            metrics.GEMINI_QUOTA_ERRORS.inc()
+            metrics.GEMINI_FALLBACKS.labels("quota").inc()
             return generate_fallback_description(ndvi_stats, pixel_counts_dict, aoi_area_sqm)
 
         # Outros erros
+        metrics.GEMINI_FALLBACKS.labels("error").inc()
         return generate_fallback_description(ndvi_stats, pixel_counts_dict, aoi_area_sqm)
 
 
@@ -0,0 +1,103 @@
+"""
+Per-worker cache of verified access tokens.
+
+Maps a token whose signature was already checked to a snapshot of its
+user's columns, so an authenticated request needs neither jwt.decode nor
+the users lookup. Entries live AUTH_CACHE_TTL seconds, never past the
+token's own exp, and at most AUTH_CACHE_SIZE are kept (least recently
+used evicted first).
+
+crud_user bumps the one-row auth_state version whenever a user changes
+and, once committed, drops that user's entries here. Other uvicorn
+workers re-read the version at most every VERSION_TTL seconds and clear
+their cache when it moved, so changes reach them within that time.
+
+Writes to the snapshot columns outside crud_user (is_active above all,
+e.g. from a shell or a script) must do the same: call bump_version in
+their transaction and invalidate_user after the commit, as
+crud_user.set_user_active does. Otherwise a deactivated user keeps
+authenticating from the cached snapshot for up to AUTH_CACHE_TTL.
+"""
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..core.config import AUTH_CACHE_SIZE, AUTH_CACHE_TTL
+
+# Seconds between reads of the shared version stamp
+VERSION_TTL = 2.0
+
+# Password hashes stay out of the cache
+_SNAPSHOT_COLUMNS = ("id", "email", "full_name", "is_active", "created_at")
+
+
+class AuthCache:
+    def __init__(self, max_size: int = AUTH_CACHE_SIZE, ttl: float = AUTH_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        # token -> (user snapshot, expiry)
+        self._entries: OrderedDict = OrderedDict()
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    async def _sync_version(self, db: AsyncSession) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < VERSION_TTL:
+            return
+        self._checked_at = now
+        version = await db.scalar(select(models.AuthState.version).where(models.AuthState.id == 1)) or 0
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    async def get(self, db: AsyncSession, token: str) -> Optional[models.User]:
+        """A fresh, session-less User for a cached token, or None."""
+        if not self.enabled:
+            return None
+        await self._sync_version(db)
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        values, expires_at = entry
+        if time.time() >= expires_at:
+            del self._entries[token]
+            return None
+        self._entries.move_to_end(token)
+        return models.User(**values)
+
+    def put(self, token: str, user: models.User, token_exp: float) -> None:
+        if not self.enabled:
+            return
+        values = {column: getattr(user, column) for column in _SNAPSHOT_COLUMNS}
+        self._entries[token] = (values, min(time.time() + self.ttl, token_exp))
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        for token in [token for token, (values, _) in self._entries.items() if values["id"] == user_id]:
+            del self._entries[token]
+
+    async def bump_version(self, db: AsyncSession) -> None:
+        """Make every worker drop its cache; the caller commits."""
+        result = await db.execute(
+            update(models.AuthState).where(models.AuthState.id == 1).values(version=models.AuthState.version + 1)
+        )
+        if result.rowcount == 0:
+            db.add(models.AuthState(id=1, version=1))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._version = None
+        self._checked_at = 0.0
+
+
+auth_cache = AuthCache()
@@ -0,0 +1,153 @@
+"""
+Streaming export of clients and properties (NDJSON, CSV, GeoJSON).
+
+Rows are read with a server-side cursor (yield_per) as plain column tuples,
+so no ORM objects or Pydantic models are built, and each partition is
+serialized into one chunk of the response. Boundaries are selected as text
+and written as-is unless the GeoJSON format needs their geometry. Memory
+use depends on EXPORT_BATCH_SIZE, not on how many rows the user has.
+
+The generators open their own session: they run while the response is
+being sent, after the request's dependencies may already have been closed.
+"""
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+import orjson
+from sqlalchemy import Select, Text, cast, select
+
+from .. import models
+from ..db.session import AsyncSessionLocal
+
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "geojson": "application/geo+json",
+}
+
+CLIENT_FIELDS = ["id", "name", "document", "phone", "email", "address", "city", "state", "notes",
+                 "created_at", "updated_at"]
+PROPERTY_FIELDS = ["id", "name", "total_area_hectares", "boundary_area_hectares", "centroid_lon", "centroid_lat",
+                   "city", "state", "notes", "client_id", "client_name", "created_at", "updated_at"]
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _csv_row(row, boundaries: bool) -> list:
+    values = [_value(value) for value in row]
+    if boundaries and values[-1] == "null":
+        values[-1] = None
+    return values
+
+
+def _clients_query(owner_id: int) -> Select:
+    return select(
+        *(getattr(models.Client, field) for field in CLIENT_FIELDS)
+    ).where(models.Client.owner_id == owner_id).order_by(models.Client.id)
+
+
+def _properties_query(owner_id: int, client_id: Optional[int], boundaries: bool) -> Select:
+    columns = [getattr(models.Property, field) for field in PROPERTY_FIELDS if field != "client_name"]
+    columns.insert(PROPERTY_FIELDS.index("client_name"), models.Client.name.label("client_name"))
+    if boundaries:
+        # Raw JSON text: copied to the output without a decode/encode round trip
+        columns.append(cast(models.Geometry.geojson, Text).label("geojson_boundary"))
+    query = select(*columns).join(models.Client, models.Property.client_id == models.Client.id).where(
+        models.Client.owner_id == owner_id
+    )
+    if boundaries:
+        query = query.outerjoin(models.Geometry, models.Property.boundary_geometry_id == models.Geometry.id)
+    if client_id is not None:
+        query = query.where(models.Property.client_id == client_id)
+    return query.order_by(models.Property.id)
+
+
+async def _partitions(query: Select) -> AsyncIterator[List]:
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield rows
+
+
+def _ndjson_line(fields: List[str], row, boundary: Optional[str] = None) -> str:
+    line = orjson.dumps({field: _value(value) for field, value in zip(fields, row)}).decode()
+    if boundary is not None:
+        line = f'{line[:-1]},"geojson_boundary":{boundary}}}'
+    return line + "\n"
+
+
+def _geometry(boundary: Optional[str]):
+    """The geometry of a stored boundary (a FeatureCollection drawn in the map)."""
+    if not boundary:
+        return None
+    data = orjson.loads(boundary)
+    if not data:
+        return None
+    if data.get("type") == "FeatureCollection":
+        geometries = [f["geometry"] for f in data.get("features", []) if f.get("geometry")]
+        if not geometries:
+            return None
+        return geometries[0] if len(geometries) == 1 else {"type": "GeometryCollection", "geometries": geometries}
+    if data.get("type") == "Feature":
+        return data.get("geometry")
+    return data
+
+
+async def stream_rows(query: Select, fields: List[str], file_format: str, boundaries: bool = False) -> AsyncIterator[str]:
+    if file_format == "csv":
+        # BOM so spreadsheet apps detect UTF-8; the importer accepts it too
+        header = fields + (["geojson_boundary"] if boundaries else [])
+        buffer = io.StringIO()
+        buffer.write("\ufeff")
+        csv.writer(buffer).writerow(header)
+        yield buffer.getvalue()
+        async for rows in _partitions(query):
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerows(_csv_row(row, boundaries) for row in rows)
+            yield buffer.getvalue()
+
+    elif file_format == "ndjson":
+        async for rows in _partitions(query):
+            if boundaries:
+                yield "".join(_ndjson_line(fields, row[:-1], row[-1] or "null") for row in rows)
+            else:
+                yield "".join(_ndjson_line(fields, row) for row in rows)
+
+    elif file_format == "geojson":
+        yield '{"type": "FeatureCollection", "features": [\n'
+        first = True
+        async for rows in _partitions(query):
+            features = []
+            for row in rows:
+                feature = {
+                    "type": "Feature",
+                    "properties": {field: _value(value) for field, value in zip(fields, row[:-1])},
+                    "geometry": _geometry(row[-1]),
+                }
+                features.append(orjson.dumps(feature).decode())
+            if features:
+                yield ("" if first else ",\n") + ",\n".join(features)
+                first = False
+        yield "\n]}\n"
+
+    else:
+        raise ValueError(f"Unsupported export format: {file_format}")
+
+
+def export_clients(owner_id: int, file_format: str) -> AsyncIterator[str]:
+    return stream_rows(_clients_query(owner_id), CLIENT_FIELDS, file_format)
+
+
+def export_properties(
+    owner_id: int, file_format: str, client_id: Optional[int] = None, boundaries: bool = False
+) -> AsyncIterator[str]:
+    # A FeatureCollection without geometries is pointless: GeoJSON always includes them
+    boundaries = boundaries or file_format == "geojson"
+    return stream_rows(_properties_query(owner_id, client_id, boundaries), PROPERTY_FIELDS, file_format, boundaries)
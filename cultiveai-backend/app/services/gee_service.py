@@ -1,6 +1,8 @@
 import ee
 import datetime
-from ..core import config
+from typing import Optional
+from ..core import config, metrics
+from . import geometry_service
 
 def initialize_earthengine():
     try:
@@ -12,9 +14,15 @@ def initialize_earthengine():
         ee.Authenticate()
         ee.Initialize(project=config.GOOGLE_CLOUD_PROJECT_ID)
 
+def _get_info(computed):
+    """getInfo() through the metrics: each one is a round trip to Earth Engine."""
+    with metrics.gee_call("getInfo"):
+        return computed.getInfo()
+
 def get_ee_tile_url(ee_image, vis_params, name):
     try:
-        map_id_dict = ee.Image(ee_image).getMapId(vis_params)
+        with metrics.gee_call("getMapId"):
+            map_id_dict = ee.Image(ee_image).getMapId(vis_params)
         return map_id_dict['tile_fetcher'].url_format
     except Exception as e:
         print(f"Não foi possível obter a URL do tile para a camada {name}: {e}")
@@ -29,12 +37,173 @@ def get_ee_thumb_url(ee_image, vis_params, region, dimensions=800):
             'format': 'png',
         }
         thumb_params.update(vis_params)
-        return ee.Image(ee_image).getThumbURL(thumb_params)
+        with metrics.gee_call("getThumbURL"):
+            return ee.Image(ee_image).getThumbURL(thumb_params)
     except Exception as e:
         print(f"Não foi possível gerar thumbnail: {e}")
         return None
 
-def run_analysis(geojson_data: dict):
+def _ndvi(s2_image):
+    return s2_image.normalizedDifference(['B8', 'B4']).rename('NDVI')
+
+def _classify(ndvi):
+    classified = ee.Image(1).where(ndvi.gte(0.3), 2).where(ndvi.gte(0.5), 3).where(ndvi.gte(0.7), 4).where(ndvi.gte(0.8), 5)
+    return classified.rename('classification')
+
+def _map_layers(s2_image, aoi):
+    """Image and visualization of each map layer (the keys of map_layers_urls), masked to the AOI."""
+    ndvi = _ndvi(s2_image)
+    ndmi = s2_image.normalizedDifference(['B8', 'B11']).rename('NDMI')
+    savi = s2_image.expression('((NIR - RED) / (NIR + RED + 0.5)) * 1.5', {'NIR': s2_image.select('B8'), 'RED': s2_image.select('B4')}).rename('SAVI')
+    dem = ee.Image('USGS/SRTMGL1_003')
+    slope = ee.Terrain.slope(dem).rename('slope')
+    mapbiomas = ee.Image('projects/mapbiomas-workspace/public/collection_9/mapbiomas_collection_9_0_integration_v1').select(['classification_2022'])
+
+    mask = ee.Image.constant(1).clip(aoi).mask()
+    return {
+        'rgb_url': (s2_image.updateMask(mask), {'bands': ['B4', 'B3', 'B2'], 'min': 0, 'max': 3000}),
+        'degradation_url': (_classify(ndvi).updateMask(mask), config.DEGRADATION_VIS_PARAMS),
+        'ndvi_url': (ndvi.updateMask(mask), config.NDVI_VIS_PARAMS),
+        'ndmi_url': (ndmi.updateMask(mask), config.NDMI_VIS_PARAMS),
+        'savi_url': (savi.updateMask(mask), config.SAVI_VIS_PARAMS),
+        'slope_url': (slope.updateMask(mask), config.SLOPE_VIS_PARAMS),
+        'mapbiomas_url': (mapbiomas.updateMask(mask), config.MAPBIOMAS_VIS_PARAMS),
+    }
+
+def _zonal_stats(ndvi, classified, paddocks: dict):
+    """NDVI min/mean/max and class pixel counts of every paddock, from one reduceRegions."""
+    # NDVI feeds minMax and mean, classification feeds the histogram
+    reducer = ee.Reducer.minMax().combine(ee.Reducer.mean(), sharedInputs=True).combine(
+        ee.Reducer.frequencyHistogram(), sharedInputs=False
+    )
+    zones = ndvi.addBands(classified).reduceRegions(
+        collection=ee.FeatureCollection(paddocks), reducer=reducer, scale=30
+    )
+    # The numbers only, not the paddock polygons back
+    return zones.select(['name', 'min', 'mean', 'max', 'histogram'], None, False)
+
+def _paddock_summary(zones: dict, paddocks: dict) -> list:
+    """Per-paddock results of _zonal_stats, most degraded (classes 1 and 2) first, then lowest NDVI."""
+    areas = {}
+    for feature in paddocks['features']:
+        geom = geometry_service.to_shape(feature['geometry'])
+        areas[feature['properties']['name']] = geometry_service.geodesic_area_m2(geom) / 10000 if geom is not None else None
+
+    summary = []
+    for feature in zones.get('features') or []:
+        props = feature.get('properties') or {}
+        counts = {int(float(class_id)): count for class_id, count in (props.get('histogram') or {}).items()}
+        total = sum(counts.values())
+        percentages = [round(counts.get(c, 0) / total * 100, 2) if total else 0.0 for c in range(1, 6)]
+        area = areas.get(props.get('name'))
+        summary.append({
+            "name": props.get('name'),
+            "area_hectares": round(area, 2) if area is not None else None,
+            **{f"ndvi_{k}": (round(props[k], 4) if props.get(k) is not None else None) for k in ('min', 'mean', 'max')},
+            "class_percentages": percentages,
+            "degraded_percentage": round(percentages[0] + percentages[1], 2),
+        })
+    summary.sort(key=lambda p: (-p["degraded_percentage"], p["ndvi_mean"] if p["ndvi_mean"] is not None else float('inf')))
+    return summary
+
+def layer_tile_url(image_id: str, aoi_geojson: dict, layer_key: str):
+    """
+    A new tile URL for one map layer of a stored report (the map token of
+    the old one expired), rebuilt from the Sentinel-2 image id and the AOI.
+    """
+    initialize_earthengine()
+    aoi = ee.Geometry(aoi_geojson['features'][0]['geometry'])
+    s2_image = ee.Image(f"{config.SENTINEL2_COLLECTION_ID}/{image_id}")
+    image, vis_params = _map_layers(s2_image, aoi)[layer_key]
+    return get_ee_tile_url(image, vis_params, layer_key)
+
+def _composite(aoi, period: dict):
+    """(scene count, median composite) of the cloud-filtered Sentinel-2 scenes of `period` over the AOI."""
+    collection = (
+        ee.ImageCollection(config.SENTINEL2_COLLECTION_ID)
+        .filterBounds(aoi)
+        .filterDate(period['start_date'], period['end_date'])
+        .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', config.CLOUD_FILTER_PERCENTAGE))
+    )
+    return collection.size(), collection.median()
+
+def _ndvi_change(aoi, before: dict, after: dict):
+    """Scene counts, NDVI of each period's composite, and NDVI after minus before."""
+    before_count, before_composite = _composite(aoi, before)
+    after_count, after_composite = _composite(aoi, after)
+    ndvi_before = _ndvi(before_composite)
+    ndvi_after = _ndvi(after_composite)
+    return before_count, after_count, ndvi_before, ndvi_after, ndvi_after.subtract(ndvi_before).rename('NDVI_change')
+
+def change_tile_url(aoi_geojson: dict, before: dict, after: dict):
+    """Tile URL of a change comparison's map (NDVI after minus before), masked to the AOI."""
+    initialize_earthengine()
+    aoi = ee.Geometry(aoi_geojson['features'][0]['geometry'])
+    change = _ndvi_change(aoi, before, after)[-1]
+    mask = ee.Image.constant(1).clip(aoi).mask()
+    return get_ee_tile_url(change.updateMask(mask), config.NDVI_CHANGE_VIS_PARAMS, 'ndvi_change_url')
+
+def run_change_detection(geojson_data: dict, before: dict, after: dict):
+    """
+    Compare the AOI's NDVI between two periods ({'start_date', 'end_date'}):
+    a median composite of each, NDVI statistics of both and of the change,
+    and the area moving between degradation classes, evaluated in a single
+    getInfo. The change map's tile URL is left to change_tile_url.
+    """
+    initialize_earthengine()
+    aoi = ee.Geometry(geojson_data['features'][0]['geometry'])
+    before_count, after_count, ndvi_before, ndvi_after, change = _ndvi_change(aoi, before, after)
+
+    stats = ee.Image.cat([ndvi_before.rename('before'), ndvi_after.rename('after'), change.rename('change')]).reduceRegion(
+        reducer=ee.Reducer.minMax().combine(ee.Reducer.mean(), sharedInputs=True),
+        geometry=aoi, scale=30, maxPixels=1e9
+    )
+    # Class before * 10 + class after, summed in m² per code
+    transition = _classify(ndvi_before).multiply(10).add(_classify(ndvi_after)).rename('transition')
+    transitions = ee.Image.pixelArea().addBands(transition).reduceRegion(
+        reducer=ee.Reducer.sum().group(groupField=1, groupName='transition'),
+        geometry=aoi, scale=30, maxPixels=1e9
+    ).get('groups')
+    # A period without scenes has an empty composite: nothing to reduce
+    found = before_count.gt(0).And(after_count.gt(0))
+    result = _get_info(ee.Dictionary({
+        'before_count': before_count,
+        'after_count': after_count,
+        'area_m2': aoi.area(maxError=1),
+        'stats': ee.Algorithms.If(found, stats, None),
+        'transitions': ee.Algorithms.If(found, transitions, None),
+    }))
+
+    if not result['before_count'] or not result['after_count']:
+        period = "inicial" if not result['before_count'] else "final"
+        raise RuntimeError(f"Nenhuma imagem encontrada no período {period} para esta AOI. Tente aumentar o período ou a porcentagem de nuvens.")
+
+    stats = result['stats'] or {}
+    ndvi_stats = {
+        band: {k: (round(stats[f'{band}_{k}'], 4) if stats.get(f'{band}_{k}') is not None else None) for k in ('min', 'mean', 'max')}
+        for band in ('before', 'after', 'change')
+    }
+    transitions = []
+    for group in result['transitions'] or []:
+        code = int(group['transition'])
+        transitions.append({
+            "from_class": config.DEGRADATION_CLASS_NAMES.get(str(code // 10), "Desconhecida"),
+            "to_class": config.DEGRADATION_CLASS_NAMES.get(str(code % 10), "Desconhecida"),
+            "area_hectares": round(group['sum'] / 10000, 2),
+        })
+    transitions.sort(key=lambda t: t["area_hectares"], reverse=True)
+
+    return {
+        "aoi_geojson": geojson_data,
+        "aoi_area_hectares": round(result['area_m2'] / 10000, 2),
+        "before_period": {**before, 'scenes': result['before_count']},
+        "after_period": {**after, 'scenes': result['after_count']},
+        "ndvi_stats": ndvi_stats,
+        "transitions": transitions,
+    }
+
+def run_analysis(geojson_data: dict, paddocks: Optional[dict] = None):
+    """Whole-AOI analysis; with the property's paddocks (zonal mode) also one entry per paddock."""
     initialize_earthengine()
     aoi = ee.Geometry(geojson_data['features'][0]['geometry'])
     end_date = ee.Date(datetime.datetime.now(datetime.timezone.utc))
@@ -48,32 +217,29 @@ def run_analysis(geojson_data: dict):
         .sort('CLOUDY_PIXEL_PERCENTAGE')
     )
     
-    image_count = s2_collection.size().getInfo()
+    image_count = _get_info(s2_collection.size())
     if image_count == 0:
         raise RuntimeError("Nenhuma imagem encontrada no período para esta AOI. Tente aumentar o período ou a porcentagem de nuvens.")
 
     s2_image = ee.Image(s2_collection.first())
     
-    ndvi = s2_image.normalizedDifference(['B8', 'B4']).rename('NDVI')
-    ndmi = s2_image.normalizedDifference(['B8', 'B11']).rename('NDMI')
-    savi = s2_image.expression('((NIR - RED) / (NIR + RED + 0.5)) * 1.5', {'NIR': s2_image.select('B8'), 'RED': s2_image.select('B4')}).rename('SAVI')
-    dem = ee.Image('USGS/SRTMGL1_003')
-    slope = ee.Terrain.slope(dem).rename('slope')
-    mapbiomas = ee.Image('projects/mapbiomas-workspace/public/collection_9/mapbiomas_collection_9_0_integration_v1').select(['classification_2022'])
-
-    classified = ee.Image(1).where(ndvi.gte(0.3), 2).where(ndvi.gte(0.5), 3).where(ndvi.gte(0.7), 4).where(ndvi.gte(0.8), 5)
-    classified = classified.rename('classification')
+    ndvi = _ndvi(s2_image)
+    classified = _classify(ndvi)
 
-    aoi_area_ha = aoi.area(maxError=1).getInfo() / 10000
+    aoi_area_ha = _get_info(aoi.area(maxError=1)) / 10000
 
-    stats = ndvi.reduceRegion(
+    stats = _get_info(ndvi.reduceRegion(
         reducer=ee.Reducer.minMax().combine(ee.Reducer.mean(), sharedInputs=True),
         geometry=aoi, scale=30, maxPixels=1e9
-    ).getInfo()
+    ))
 
-    px_counts_dict = classified.reduceRegion(
+    px_counts_dict = _get_info(classified.reduceRegion(
         reducer=ee.Reducer.frequencyHistogram(), geometry=aoi, scale=30, maxPixels=1e9
-    ).get('classification').getInfo() or {}
+    ).get('classification')) or {}
+
+    paddock_summary = None
+    if paddocks:
+        paddock_summary = _paddock_summary(_get_info(_zonal_stats(ndvi, classified, paddocks)), paddocks)
 
     cleaned_stats = {'min': stats.get('NDVI_min'), 'mean': stats.get('NDVI_mean'), 'max': stats.get('NDVI_max')}
 
@@ -87,19 +253,12 @@ def run_analysis(geojson_data: dict):
             summary.append({"class_name": class_name, "percentage": round(percentage, 2), "area_hectares": round(area_ha, 2)})
 
     img_info = {
-        'id': s2_image.get('system:index').getInfo(),
-        'cloud_percentage': round(s2_image.get('CLOUDY_PIXEL_PERCENTAGE').getInfo(), 2)
+        'id': _get_info(s2_image.get('system:index')),
+        'cloud_percentage': round(_get_info(s2_image.get('CLOUDY_PIXEL_PERCENTAGE')), 2)
     }
 
-    mask = ee.Image.constant(1).clip(aoi).mask()
     map_layers_urls = {
-        'rgb_url': get_ee_tile_url(s2_image.updateMask(mask), {'bands': ['B4', 'B3', 'B2'], 'min': 0, 'max': 3000}, 'RGB'),
-        'degradation_url': get_ee_tile_url(classified.updateMask(mask), config.DEGRADATION_VIS_PARAMS, 'Degradation'),
-        'ndvi_url': get_ee_tile_url(ndvi.updateMask(mask), config.NDVI_VIS_PARAMS, 'NDVI'),
-        'ndmi_url': get_ee_tile_url(ndmi.updateMask(mask), config.NDMI_VIS_PARAMS, 'NDMI'),
-        'savi_url': get_ee_tile_url(savi.updateMask(mask), config.SAVI_VIS_PARAMS, 'SAVI'),
-        'slope_url': get_ee_tile_url(slope.updateMask(mask), config.SLOPE_VIS_PARAMS, 'Slope'),
-        'mapbiomas_url': get_ee_tile_url(mapbiomas.updateMask(mask), config.MAPBIOMAS_VIS_PARAMS, 'MapBiomas')
+        key: get_ee_tile_url(image, vis_params, key) for key, (image, vis_params) in _map_layers(s2_image, aoi).items()
     }
 
     # Generate static thumbnail images for the downloadable report
@@ -115,11 +274,12 @@ def run_analysis(geojson_data: dict):
     return {
         "aoi_geojson": geojson_data,
         "aoi_area_hectares": round(aoi_area_ha, 2),
-        "analysis_period": {'start_date': start_date.format('YYYY-MM-dd').getInfo(), 'end_date': end_date.format('YYYY-MM-dd').getInfo()},
+        "analysis_period": {'start_date': _get_info(start_date.format('YYYY-MM-dd')), 'end_date': _get_info(end_date.format('YYYY-MM-dd'))},
         "satellite_image_info": img_info,
         "ndvi_stats": {k: (round(v, 4) if v is not None else None) for k, v in cleaned_stats.items()},
         "degradation_summary": summary,
         "map_layers_urls": map_layers_urls,
         "thumbnail_urls": thumb_urls,
+        "paddock_summary": paddock_summary,
         "pixel_counts_for_ai": px_counts_dict
     }
\ No newline at end of file
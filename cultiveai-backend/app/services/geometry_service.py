@@ -0,0 +1,132 @@
+import hashlib
+import math
+from typing import Dict, Optional, Tuple
+import numpy as np
+from shapely.errors import GEOSException
+from shapely.geometry import mapping, shape
+from shapely.geometry.base import BaseGeometry
+from shapely.ops import unary_union
+import shapely
+
+# WGS84 equatorial radius, the sphere Leaflet.draw's geodesicArea uses in the map
+EARTH_RADIUS_M = 6378137.0
+
+# Zoom levels with a stored simplification of each property boundary (geometry_simplifications),
+# each drawn up to the next one; from FULL_DETAIL_ZOOM on the map gets the boundary as saved
+SIMPLIFY_ZOOMS = (4, 6, 8, 10, 12, 14)
+FULL_DETAIL_ZOOM = 16
+# A simplification is stored only if it keeps less than this fraction of the vertices
+MAX_SIMPLIFIED_FRACTION = 0.8
+
+BOUNDARY_COLUMNS = (
+    "bbox_min_lon", "bbox_min_lat", "bbox_max_lon", "bbox_max_lat",
+    "boundary_area_hectares", "centroid_lon", "centroid_lat", "vertex_count",
+)
+
+
+def to_shape(geojson) -> Optional[BaseGeometry]:
+    """Parse a GeoJSON FeatureCollection, Feature or bare geometry into one shapely geometry."""
+    if not geojson or not isinstance(geojson, dict):
+        return None
+    try:
+        kind = geojson.get("type")
+        if kind == "FeatureCollection":
+            geoms = [shape(f["geometry"]) for f in geojson.get("features", []) if f.get("geometry")]
+        elif kind == "Feature":
+            geoms = [shape(geojson["geometry"])] if geojson.get("geometry") else []
+        else:
+            geoms = [shape(geojson)]
+        if not geoms:
+            return None
+        geom = geoms[0] if len(geoms) == 1 else unary_union(geoms)
+        if not geom.is_valid:
+            geom = shapely.make_valid(geom)
+        return None if geom.is_empty else geom
+    except (GEOSException, KeyError, TypeError, ValueError, AttributeError):
+        return None
+
+
+def shape_hash(geom: BaseGeometry) -> str:
+    """Same for the same shape, whatever its vertex order, ring start or GeoJSON wrapping."""
+    return hashlib.sha256(shapely.normalize(geom).wkb).hexdigest()
+
+
+def bbox(geojson) -> Optional[Tuple[float, float, float, float]]:
+    """(min_lon, min_lat, max_lon, max_lat) of a GeoJSON object, or None if unparsable."""
+    geom = to_shape(geojson)
+    return tuple(geom.bounds) if geom is not None else None
+
+
+def overlap_ratio(a: BaseGeometry, b: BaseGeometry) -> float:
+    """Intersection over union of two geometries (0 = disjoint, 1 = identical)."""
+    union_area = a.union(b).area
+    if union_area == 0:
+        return 0.0
+    return a.intersection(b).area / union_area
+
+
+def _ring_area_m2(coords: np.ndarray) -> float:
+    lon, lat = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+    excess = (lon[1:] - lon[:-1]) * (2 + np.sin(lat[:-1]) + np.sin(lat[1:]))
+    return abs(float(excess.sum())) * EARTH_RADIUS_M ** 2 / 2
+
+
+def geodesic_area_m2(geom: BaseGeometry) -> float:
+    """Area on the sphere of the polygonal parts of a lon/lat geometry, in square meters."""
+    area = 0.0
+    for part in shapely.get_parts(geom):
+        if part.geom_type == "Polygon":
+            area += _ring_area_m2(np.asarray(part.exterior.coords))
+            area -= sum(_ring_area_m2(np.asarray(ring.coords)) for ring in part.interiors)
+        elif part.geom_type in ("MultiPolygon", "GeometryCollection"):
+            area += geodesic_area_m2(part)
+    return area
+
+
+def boundary_attributes(geom: Optional[BaseGeometry]) -> dict:
+    """Values of the Property columns derived from its boundary (all None without one)."""
+    if geom is None:
+        return dict.fromkeys(BOUNDARY_COLUMNS)
+    centroid = geom.centroid
+    return dict(zip(BOUNDARY_COLUMNS, (
+        *geom.bounds,
+        round(geodesic_area_m2(geom) / 10000, 4),
+        centroid.x, centroid.y,
+        int(shapely.get_num_coordinates(geom)),
+    )))
+
+
+def to_geometry(geojson) -> Optional[dict]:
+    """The bare GeoJSON geometry of a FeatureCollection, Feature or geometry (one feature's as stored)."""
+    kind = geojson.get("type") if isinstance(geojson, dict) else None
+    if kind == "FeatureCollection" and len(geojson.get("features") or []) == 1:
+        return to_geometry(geojson["features"][0])
+    if kind == "Feature" and geojson.get("geometry"):
+        return geojson["geometry"]
+    if kind not in ("FeatureCollection", "Feature"):
+        return geojson
+    geom = to_shape(geojson)
+    return mapping(geom) if geom is not None else None
+
+
+def pixel_degrees(zoom: int) -> float:
+    """Longitude span of one pixel of a 256 px web map tile at `zoom`."""
+    return 360.0 / (256 * 2 ** zoom)
+
+
+def simplifications(geom: BaseGeometry) -> Dict[int, dict]:
+    """
+    GeoJSON geometry of `geom` for each SIMPLIFY_ZOOMS level, within half a
+    pixel at that zoom (so within a pixel up to the next level). Levels that
+    would not drop enough vertices are left out: the full boundary is as small.
+    """
+    vertices = shapely.get_num_coordinates(geom)
+    levels = {}
+    for zoom in SIMPLIFY_ZOOMS:
+        tolerance = pixel_degrees(zoom) / 2
+        simplified = shapely.simplify(geom, tolerance, preserve_topology=True)
+        if shapely.get_num_coordinates(simplified) < vertices * MAX_SIMPLIFIED_FRACTION:
+            # Digits below a tenth of the tolerance only make the JSON longer
+            decimals = math.ceil(-math.log10(tolerance / 10))
+            levels[zoom] = mapping(shapely.transform(simplified, lambda coords: np.round(coords, decimals)))
+    return levels
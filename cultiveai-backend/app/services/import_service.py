@@ -0,0 +1,419 @@
+"""
+Bulk import of clients (CSV) and properties (GeoJSON / KML).
+
+Files are parsed as a stream: CSV row by row, GeoJSON feature by feature
+(without loading the whole FeatureCollection) and KML placemark by
+placemark via iterparse. Rows are validated with the same Pydantic schemas
+as the single-item endpoints and inserted in batches of executemany
+INSERTs inside a single transaction; invalid rows are skipped and reported.
+"""
+import codecs
+import csv
+import io
+import json
+import re
+import xml.etree.ElementTree as ET
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import crud, models, schemas
+from ..crud.search import digits_only, normalize_text
+from . import geometry_service
+from .spatial_index import property_index
+
+BATCH_SIZE = 1000
+# Per-row errors returned to the caller; the counters still cover every row
+MAX_REPORTED_ERRORS = 1000
+
+# Accepted CSV headers (normalized: lowercase, no accents) -> ClientCreate field
+CLIENT_COLUMNS = {
+    "name": "name", "nome": "name", "cliente": "name", "razao social": "name",
+    "document": "document", "documento": "document", "cpf": "document", "cnpj": "document",
+    "cpf/cnpj": "document", "cpf_cnpj": "document",
+    "phone": "phone", "telefone": "phone", "celular": "phone",
+    "email": "email", "e-mail": "email",
+    "address": "address", "endereco": "address",
+    "city": "city", "cidade": "city", "municipio": "city",
+    "state": "state", "estado": "state", "uf": "state",
+    "notes": "notes", "observacoes": "notes", "obs": "notes",
+}
+
+# Accepted feature property / KML ExtendedData keys -> property field
+PROPERTY_COLUMNS = {
+    "name": "name", "nome": "name", "fazenda": "name", "propriedade": "name",
+    "total_area_hectares": "total_area_hectares", "area_ha": "total_area_hectares",
+    "area": "total_area_hectares", "hectares": "total_area_hectares",
+    "city": "city", "cidade": "city", "municipio": "city",
+    "state": "state", "estado": "state", "uf": "state",
+    "notes": "notes", "observacoes": "notes", "obs": "notes", "description": "notes",
+    "client_id": "client_id",
+    "client_document": "client_document", "cpf": "client_document", "cnpj": "client_document",
+    "documento": "client_document", "client_name": "client_name", "client": "client_name",
+    "cliente": "client_name", "proprietario": "client_name",
+}
+
+
+class ImportFormatError(ValueError):
+    """The uploaded file cannot be parsed at all (as opposed to a bad row)."""
+
+
+def _normalize_key(key: str) -> str:
+    return normalize_text(key or "").strip()
+
+
+def _map_fields(raw: Dict[str, Any], columns: Dict[str, str]) -> Dict[str, Any]:
+    data = {}
+    for key, value in raw.items():
+        field = columns.get(_normalize_key(key))
+        if field is None or field in data:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        if value in ("", None):
+            continue
+        data[field] = value
+    return data
+
+
+def _format_validation_error(error: ValidationError) -> List[str]:
+    messages = []
+    for item in error.errors():
+        field = ".".join(str(part) for part in item["loc"])
+        message = item["msg"].removeprefix("Value error, ")
+        messages.append(f"{field}: {message}" if field else message)
+    return messages
+
+
+# ---------------------------------------------------------------------------
+# Parsers: each yields (row_number, raw_dict) pairs
+# ---------------------------------------------------------------------------
+
+def _csv_encoding(stream: IO[bytes], chunk_size: int = 65536) -> str:
+    """'utf-8-sig' if the whole file decodes as UTF-8, else 'cp1252' (Excel's export in Brazil)."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        while chunk := stream.read(chunk_size):
+            decoder.decode(chunk)
+        decoder.decode(b"", final=True)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "cp1252"
+    finally:
+        stream.seek(0)
+
+
+def iter_csv_rows(stream: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Rows of a CSV file (',' or ';' separated, UTF-8 with or without BOM, or CP1252)."""
+    text = io.TextIOWrapper(stream, encoding=_csv_encoding(stream), newline="")
+    reader = None
+    try:
+        sample = text.read(8192)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.DictReader(text, dialect=dialect)
+        if not reader.fieldnames:
+            raise ImportFormatError("Arquivo CSV vazio ou sem cabeçalho")
+        if "name" not in {CLIENT_COLUMNS.get(_normalize_key(f)) for f in reader.fieldnames}:
+            raise ImportFormatError("Cabeçalho do CSV deve ter a coluna 'nome' (ou 'name')")
+        for row in reader:
+            # line_num counts the header, so it matches the line shown by spreadsheet apps
+            yield reader.line_num, row
+    except (csv.Error, UnicodeDecodeError) as e:
+        line = reader.line_num if reader is not None else 1
+        raise ImportFormatError(f"CSV inválido na linha {line}: {e}") from e
+
+
+def _iter_json_array(stream: IO[bytes], key: str, chunk_size: int = 65536) -> Iterator[Any]:
+    """Decode the items of the top-level array `key` one at a time."""
+    decoder = json.JSONDecoder()
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    buffer, pos, read_size = "", 0, chunk_size
+
+    def fill() -> bool:
+        nonlocal buffer, pos
+        try:
+            chunk = text.read(read_size)
+        except UnicodeDecodeError as e:
+            # JSON files are UTF-8 (RFC 8259)
+            raise ImportFormatError(f"JSON inválido: arquivo não está em UTF-8 ({e.reason})") from e
+        if not chunk:
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    # Skip to the opening bracket of "<key>": [
+    pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    while True:
+        match = pattern.search(buffer)
+        if match:
+            pos = match.end()
+            break
+        # Keep a tail so a key split across two chunks still matches
+        pos = max(len(buffer) - len(key) - 64, 0)
+        if not fill():
+            raise ImportFormatError(f"Arquivo não contém a lista '{key}'")
+
+    whitespace = re.compile(r"[\s,]*")
+    while True:
+        pos = whitespace.match(buffer, pos).end()
+        if pos == len(buffer):
+            if not fill():
+                raise ImportFormatError("JSON inválido: arquivo terminou antes do fim da lista")
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            item, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            # Most likely an item split across chunks: read more and retry,
+            # doubling the read so a huge feature is not re-parsed per chunk
+            if not fill():
+                raise ImportFormatError(f"JSON inválido: {e.msg}") from e
+            read_size *= 2
+            continue
+        read_size = chunk_size
+        yield item
+
+
+def iter_geojson_features(stream: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Features of a GeoJSON FeatureCollection, as (feature_number, feature)."""
+    for number, feature in enumerate(_iter_json_array(stream, "features"), start=1):
+        yield number, feature
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _kml_ring(element: ET.Element) -> List[List[float]]:
+    for child in element.iter():
+        if _local(child.tag) == "coordinates" and child.text:
+            ring = []
+            for point in child.text.split():
+                parts = point.split(",")
+                ring.append([float(parts[0]), float(parts[1])])
+            return ring
+    return []
+
+
+def _kml_polygon(element: ET.Element) -> List[List[List[float]]]:
+    outer, inner = [], []
+    for child in element:
+        name = _local(child.tag)
+        if name == "outerBoundaryIs":
+            outer = _kml_ring(child)
+        elif name == "innerBoundaryIs":
+            inner.append(_kml_ring(child))
+    return [outer] + [ring for ring in inner if ring] if outer else []
+
+
+def _kml_geometry(placemark: ET.Element) -> Optional[Dict[str, Any]]:
+    polygons = [_kml_polygon(el) for el in placemark.iter() if _local(el.tag) == "Polygon"]
+    polygons = [p for p in polygons if p]
+    if not polygons:
+        return None
+    if len(polygons) == 1:
+        return {"type": "Polygon", "coordinates": polygons[0]}
+    return {"type": "MultiPolygon", "coordinates": polygons}
+
+
+def iter_kml_placemarks(stream: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Placemarks of a KML document converted to GeoJSON features."""
+    number = 0
+    try:
+        for _, element in ET.iterparse(stream, events=("end",)):
+            if _local(element.tag) != "Placemark":
+                continue
+            number += 1
+            properties = {}
+            for child in element.iter():
+                name = _local(child.tag)
+                if name in ("name", "description") and child.text and name not in properties:
+                    properties[name] = child.text.strip()
+                elif name == "Data" and child.get("name"):
+                    value = next((c.text for c in child if _local(c.tag) == "value"), None)
+                    properties[child.get("name")] = value
+                elif name == "SimpleData" and child.get("name"):
+                    properties[child.get("name")] = child.text
+            try:
+                geometry = _kml_geometry(element)
+            except (ValueError, IndexError):
+                geometry = None
+            yield number, {"type": "Feature", "properties": properties, "geometry": geometry}
+            element.clear()
+    except ET.ParseError as e:
+        raise ImportFormatError(f"KML inválido: {e}") from e
+
+
+# ---------------------------------------------------------------------------
+# Validation
+# ---------------------------------------------------------------------------
+
+def validate_client_row(raw: Dict[str, Any], owner_id: int) -> Tuple[Optional[dict], List[str]]:
+    try:
+        client = schemas.ClientCreate(**_map_fields(raw, CLIENT_COLUMNS))
+    except ValidationError as e:
+        return None, _format_validation_error(e)
+    return {**client.model_dump(), "owner_id": owner_id}, []
+
+
+class ClientResolver:
+    """Maps a feature's client reference (id, CPF/CNPJ or name) to an owned client id."""
+
+    def __init__(self, clients: List[Tuple[int, str, Optional[str]]], default_client_id: Optional[int]):
+        self.ids = {client_id for client_id, _, _ in clients}
+        self.by_document = {}
+        self.by_name = {}
+        for client_id, name, document in clients:
+            if document:
+                self.by_document.setdefault(digits_only(document), client_id)
+            self.by_name.setdefault(normalize_text(name).strip(), client_id)
+        self.default_client_id = default_client_id
+
+    def resolve(self, data: Dict[str, Any]) -> Tuple[Optional[int], Optional[str]]:
+        if "client_id" in data:
+            try:
+                client_id = int(data["client_id"])
+            except (TypeError, ValueError):
+                return None, f"client_id inválido: {data['client_id']}"
+            if client_id not in self.ids:
+                return None, f"Cliente {client_id} não encontrado"
+            return client_id, None
+        if "client_document" in data:
+            client_id = self.by_document.get(digits_only(str(data["client_document"])))
+            if client_id is None:
+                return None, f"Nenhum cliente com documento {data['client_document']}"
+            return client_id, None
+        if "client_name" in data:
+            client_id = self.by_name.get(normalize_text(str(data["client_name"])).strip())
+            if client_id is None:
+                return None, f"Nenhum cliente com nome {data['client_name']}"
+            return client_id, None
+        if self.default_client_id is not None:
+            return self.default_client_id, None
+        return None, "Cliente não informado (envie client_id ou inclua client_id/cpf/cliente nas propriedades)"
+
+
+def validate_property_feature(
+    feature: Dict[str, Any], resolver: ClientResolver
+) -> Tuple[Optional[dict], List[str]]:
+    if not isinstance(feature, dict) or feature.get("type") != "Feature":
+        return None, ["Item não é uma Feature GeoJSON"]
+    data = _map_fields(feature.get("properties") or {}, PROPERTY_COLUMNS)
+    errors = []
+
+    client_id, client_error = resolver.resolve(data)
+    if client_error:
+        errors.append(client_error)
+
+    boundary, geom = None, None
+    if feature.get("geometry"):
+        boundary = {"type": "FeatureCollection", "features": [
+            {"type": "Feature", "properties": {}, "geometry": feature["geometry"]}
+        ]}
+        geom = geometry_service.to_shape(boundary)
+        if geom is None:
+            errors.append("geometry: geometria inválida")
+
+    fields = {k: v for k, v in data.items() if k not in ("client_id", "client_document", "client_name")}
+    area = fields.get("total_area_hectares")
+    if isinstance(area, str) and "," in area and "." not in area:
+        fields["total_area_hectares"] = area.replace(",", ".")  # "12,5"
+    try:
+        prop = schemas.PropertyCreate(**fields, geojson_boundary=boundary, client_id=client_id or 0)
+    except ValidationError as e:
+        errors.extend(_format_validation_error(e))
+    if errors:
+        return None, errors
+
+    row = {**prop.model_dump(), **geometry_service.boundary_attributes(geom)}
+    if row["total_area_hectares"] is None:
+        row["total_area_hectares"] = row["boundary_area_hectares"]
+    return row, []
+
+
+# ---------------------------------------------------------------------------
+# Import runners
+# ---------------------------------------------------------------------------
+
+def _next_batch(rows: Iterator[Tuple[int, Any]], validate, size: int):
+    """Parse and validate up to `size` rows (runs in a worker thread)."""
+    valid, errors, seen = [], [], 0
+    for number, raw in rows:
+        seen += 1
+        row, row_errors = validate(raw)
+        if row_errors:
+            errors.append(schemas.ImportRowError(row=number, errors=row_errors))
+        else:
+            valid.append(row)
+        if seen >= size:
+            break
+    return valid, errors, seen
+
+
+async def _run_import(db: AsyncSession, rows, validate, insert_batch, dry_run: bool) -> schemas.ImportResult:
+    result = schemas.ImportResult(total_rows=0, created=0, failed=0, errors=[], dry_run=dry_run)
+    try:
+        while True:
+            valid, errors, seen = await run_in_threadpool(_next_batch, rows, validate, BATCH_SIZE)
+            if not seen:
+                break
+            result.total_rows += seen
+            result.failed += len(errors)
+            room = MAX_REPORTED_ERRORS - len(result.errors)
+            result.errors.extend(errors[:max(room, 0)])
+            if valid and not dry_run:
+                await insert_batch(db, valid)
+            result.created += len(valid)
+    except ImportFormatError:
+        # A file that breaks halfway is rejected as a whole
+        await db.rollback()
+        raise
+
+    if dry_run:
+        await db.rollback()
+    else:
+        await db.commit()
+    return result
+
+
+async def import_clients(db: AsyncSession, stream: IO[bytes], owner_id: int, dry_run: bool = False) -> schemas.ImportResult:
+    rows = iter_csv_rows(stream)
+    return await _run_import(
+        db, rows, lambda raw: validate_client_row(raw, owner_id),
+        lambda db, batch: crud.crud_client.insert_clients_batch(db, batch, owner_id), dry_run,
+    )
+
+
+async def import_properties(
+    db: AsyncSession,
+    stream: IO[bytes],
+    file_format: str,
+    owner_id: int,
+    default_client_id: Optional[int] = None,
+    dry_run: bool = False,
+) -> schemas.ImportResult:
+    owned = (await db.execute(
+        select(models.Client.id, models.Client.name, models.Client.document)
+        .where(models.Client.owner_id == owner_id)
+    )).all()
+    resolver = ClientResolver([tuple(row) for row in owned], default_client_id)
+    if default_client_id is not None and default_client_id not in resolver.ids:
+        raise ImportFormatError("Invalid client_id or client does not belong to you")
+
+    rows = iter_kml_placemarks(stream) if file_format == "kml" else iter_geojson_features(stream)
+    result = await _run_import(
+        db, rows, lambda feature: validate_property_feature(feature, resolver),
+        lambda db, batch: crud.crud_property.insert_properties_batch(db, batch, owner_id), dry_run,
+    )
+    if result.created and not dry_run:
+        property_index.mark_dirty(owner_id)
+    return result
@@ -0,0 +1,65 @@
+"""
+Property boundaries for the map view (GET /properties/map).
+
+The payload follows what is on screen, not how many properties the user
+has: only properties whose bbox meets the view are returned, each with the
+boundary simplified for the zoom when it was saved (within a pixel, see
+geometry_service.simplifications). Properties under POINT_PIXELS wide come
+as their centroid, and centroids sharing a CLUSTER_PIXELS grid cell are
+merged into one point with a count, so a state-level view of thousands of
+farms is a few hundred points.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import geometry_service
+
+POINT_PIXELS = 4
+CLUSTER_PIXELS = 32
+
+
+def zoom_level(zoom: int) -> Optional[int]:
+    """The stored simplification drawn at `zoom`; None for the boundary as saved."""
+    if zoom >= geometry_service.FULL_DETAIL_ZOOM:
+        return None
+    levels = geometry_service.SIMPLIFY_ZOOMS
+    return max((level for level in levels if level <= zoom), default=levels[0])
+
+
+def min_extent(zoom: int) -> float:
+    """Width, in degrees, under which a property is drawn as a point at `zoom`."""
+    return POINT_PIXELS * geometry_service.pixel_degrees(zoom)
+
+
+def _point(lon: float, lat: float) -> dict:
+    return {"type": "Point", "coordinates": [lon, lat]}
+
+
+def feature_collection(rows: Sequence[Tuple], zoom: int) -> dict:
+    """GeoJSON of crud_property.get_map_properties rows: boundaries, points and clusters."""
+    features = []
+    cells: Dict[Tuple[int, int], List[Tuple]] = {}
+    cell = CLUSTER_PIXELS * geometry_service.pixel_degrees(zoom)
+    for property_id, name, client_id, lon, lat, boundary in rows:
+        if boundary is not None:
+            features.append({
+                "type": "Feature", "id": property_id,
+                "geometry": geometry_service.to_geometry(boundary),
+                "properties": {"id": property_id, "name": name, "client_id": client_id},
+            })
+        elif lon is not None:
+            cells.setdefault((int(lon // cell), int(lat // cell)), []).append((property_id, name, client_id, lon, lat))
+
+    for members in cells.values():
+        if len(members) == 1:
+            property_id, name, client_id, lon, lat = members[0]
+            features.append({
+                "type": "Feature", "id": property_id, "geometry": _point(lon, lat),
+                "properties": {"id": property_id, "name": name, "client_id": client_id},
+            })
+        else:
+            features.append({
+                "type": "Feature",
+                "geometry": _point(sum(m[3] for m in members) / len(members), sum(m[4] for m in members) / len(members)),
+                "properties": {"count": len(members)},
+            })
+    return {"type": "FeatureCollection", "features": features}
@@ -2,6 +2,8 @@ from jinja2 import Environment, FileSystemLoader
 from datetime import datetime, timezone
 import os
 
+from ..core import metrics
+
 try:
     import markdown
     HAS_MARKDOWN = True
@@ -41,6 +43,7 @@ def render_ai_description(text: str) -> str:
     return text
 
 
+@metrics.REPORT_RENDER.time()
 def generate_html_report(analysis_data: dict) -> str:
     template_dir = os.path.join(os.path.dirname(__file__), '..', 'templates')
     env = Environment(loader=FileSystemLoader(template_dir), autoescape=True)
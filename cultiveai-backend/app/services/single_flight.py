@@ -0,0 +1,137 @@
+"""
+Single-flight for POST /analysis/: identical requests share one computation.
+
+Requests are identical when they come from the same user for the same
+shape (fingerprint: the normalized geometry, so vertex order and GeoJSON
+wrapping do not matter) and the same property. The first one claims the
+(owner, fingerprint) row of analysis_flights and computes; the others,
+in any uvicorn worker, poll that row until it holds the report id, and
+within the same worker simply await the leader. For
+ANALYSIS_COALESCE_SECONDS after it finished, the report is also handed to
+identical requests that arrive late (a retry after a dropped connection).
+
+If the leader fails its row is removed and a waiting request takes over;
+a row left behind by a worker that died is taken over after
+FLIGHT_TIMEOUT seconds.
+"""
+import asyncio
+import hashlib
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .. import models
+from ..core.config import ANALYSIS_COALESCE_SECONDS
+from ..crud.crud_geometry import geometry_hash
+from ..db.session import AsyncSessionLocal
+from . import geometry_service
+
+# Longer than any analysis runs
+FLIGHT_TIMEOUT = 600.0
+# Seconds between checks of another worker's flight
+POLL_INTERVAL = 0.5
+
+_local: Dict[Tuple[int, str], asyncio.Future] = {}
+
+
+def fingerprint(aoi: dict, property_id: Optional[int]) -> str:
+    geom = geometry_service.to_shape(aoi)
+    shape = geometry_service.shape_hash(geom) if geom is not None else geometry_hash(aoi)
+    return hashlib.sha256(f"{shape}:{property_id}".encode()).hexdigest()
+
+
+async def _claim(owner_id: int, key: str) -> Tuple[Optional[float], Optional[int]]:
+    """(start stamp, None) once this request leads the flight, or (None, report id) of another's."""
+    flights = models.AnalysisFlight
+    row_key = (flights.owner_id == owner_id, flights.fingerprint == key)
+    async with AsyncSessionLocal() as db:
+        while True:
+            now = time.time()
+            try:
+                await db.execute(insert(flights).values(owner_id=owner_id, fingerprint=key, started_at=now))
+                await db.commit()
+                return now, None
+            except IntegrityError:
+                await db.rollback()
+
+            row = (await db.execute(
+                select(flights.started_at, flights.finished_at, flights.report_id).where(*row_key)
+            )).one_or_none()
+            await db.rollback()
+            if row is None:
+                continue
+            started_at, finished_at, report_id = row
+            if finished_at is None and now - started_at < FLIGHT_TIMEOUT:
+                await asyncio.sleep(POLL_INTERVAL)
+                continue
+            if report_id is not None and now - finished_at < ANALYSIS_COALESCE_SECONDS:
+                return None, report_id
+            # Finished long ago, or abandoned: start a new run, unless another request just did
+            taken = await db.execute(
+                update(flights).where(*row_key, flights.started_at == started_at)
+                .values(started_at=now, finished_at=None, report_id=None)
+            )
+            await db.commit()
+            if taken.rowcount == 1:
+                return now, None
+
+
+async def _finish(owner_id: int, key: str, started_at: float, report_id: Optional[int]) -> None:
+    """Publish the report of this run, or (None) withdraw the run so a waiting request retries."""
+    flights = models.AnalysisFlight
+    row_key = (flights.owner_id == owner_id, flights.fingerprint == key, flights.started_at == started_at)
+    async with AsyncSessionLocal() as db:
+        if report_id is None:
+            await db.execute(delete(flights).where(*row_key))
+        else:
+            now = time.time()
+            await db.execute(update(flights).where(*row_key).values(finished_at=now, report_id=report_id))
+            # The user's other flights that can no longer be shared
+            await db.execute(delete(flights).where(
+                flights.owner_id == owner_id, flights.finished_at < now - ANALYSIS_COALESCE_SECONDS
+            ))
+        await db.commit()
+
+
+async def run(owner_id: int, key: str, compute: Callable[[], Awaitable[int]]) -> Tuple[int, bool]:
+    """
+    (report id, shared) for the analysis identified by `key`: computed here
+    by `compute`, or (shared=True) the one an identical request produced.
+    """
+    local_key = (owner_id, key)
+    while local_key in _local:
+        leader = _local[local_key]
+        try:
+            return await asyncio.shield(leader), True
+        except asyncio.CancelledError:
+            if not leader.cancelled():
+                raise
+            # The leader was cancelled, not us: lead the next attempt
+
+    future = asyncio.get_running_loop().create_future()
+    _local[local_key] = future
+    try:
+        started_at, report_id = await _claim(owner_id, key)
+        if report_id is not None:
+            future.set_result(report_id)
+            return report_id, True
+        report_id = None
+        try:
+            report_id = await compute()
+        finally:
+            await asyncio.shield(_finish(owner_id, key, started_at, report_id))
+        future.set_result(report_id)
+        return report_id, False
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as e:
+        # Identical requests waiting here get the same error
+        future.set_exception(e)
+        # Mark it retrieved, in case none was waiting
+        future.exception()
+        raise
+    finally:
+        del _local[local_key]
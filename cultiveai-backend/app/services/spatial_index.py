@@ -0,0 +1,176 @@
+"""
+In-process spatial index of property boundaries.
+
+Each owner gets an STR-tree over the stored bounding boxes (bbox_* columns),
+so lookups never parse boundary JSON for properties that cannot intersect.
+The tree is refreshed from an aggregate (count, max id, max updated_at,
+sum of row versions; updated_at alone has 1-second resolution on SQLite):
+new or edited properties go into a small delta that is scanned linearly,
+and the tree is rebuilt only when the delta grows or rows were deleted.
+Writes made through crud_property/crud_client mark the owner dirty so this
+worker sees them immediately; otherwise the aggregate is re-checked at most
+every STATE_TTL seconds, which is how other uvicorn workers converge.
+"""
+import asyncio
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+from shapely.strtree import STRtree
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from .. import models
+from . import geometry_service
+
+# Rebuild the tree when pending changes exceed this fraction of its size
+REBUILD_FRACTION = 0.1
+MIN_REBUILD_CHANGES = 64
+# Seconds between change checks when this worker has not written anything
+STATE_TTL = 2.0
+# Minimum overlap (intersection over union) to auto-link an analysis to a property
+MIN_LINK_OVERLAP = 0.5
+
+_BBOX_COLUMNS = (
+    models.Property.bbox_min_lon, models.Property.bbox_min_lat,
+    models.Property.bbox_max_lon, models.Property.bbox_max_lat,
+)
+
+
+class _OwnerIndex:
+    def __init__(self):
+        self.tree: Optional[STRtree] = None
+        self.tree_ids = np.empty(0, dtype=np.int64)
+        self.known_ids: Set[int] = set()
+        self.delta: Dict[int, BaseGeometry] = {}
+        self.removed: Set[int] = set()
+        self.state: Optional[Tuple] = None
+        self.checked_at = 0.0
+
+    def candidates(self, geom: BaseGeometry) -> List[int]:
+        ids = []
+        if self.tree is not None:
+            hits = self.tree.query(geom, predicate="intersects")
+            ids = [int(i) for i in self.tree_ids[hits] if int(i) not in self.removed]
+        ids += [pid for pid, box in self.delta.items() if box.intersects(geom)]
+        return ids
+
+
+class PropertySpatialIndex:
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._owners: Dict[int, _OwnerIndex] = {}
+
+    @staticmethod
+    def _owned(query, owner_id: int):
+        return query.join(models.Client, models.Property.client_id == models.Client.id).filter(
+            models.Client.owner_id == owner_id
+        )
+
+    async def _state(self, db: AsyncSession, owner_id: int) -> Tuple:
+        result = await db.execute(self._owned(select(
+            func.count(models.Property.id), func.max(models.Property.id), func.max(models.Property.updated_at),
+            func.sum(models.Property.version),
+        ), owner_id))
+        return tuple(result.one())
+
+    async def _rebuild(self, db: AsyncSession, owner_id: int, state: Tuple) -> _OwnerIndex:
+        index = _OwnerIndex()
+        rows = (await db.execute(self._owned(select(models.Property.id, *_BBOX_COLUMNS), owner_id))).all()
+        index.known_ids = {row[0] for row in rows}
+        boxed = [row for row in rows if row[1] is not None]
+        if boxed:
+            coords = np.array([row[1:] for row in boxed], dtype=float)
+            index.tree = STRtree(shapely.box(coords[:, 0], coords[:, 1], coords[:, 2], coords[:, 3]))
+            index.tree_ids = np.array([row[0] for row in boxed], dtype=np.int64)
+        index.state = state
+        return index
+
+    async def _apply_changes(self, db: AsyncSession, owner_id: int, index: _OwnerIndex, state: Tuple) -> bool:
+        """Merge rows inserted/updated since the last refresh. Returns False if a rebuild is needed."""
+        _, last_max_id, last_updated, _ = index.state
+        changed = [models.Property.id > (last_max_id or 0)]
+        if last_updated is not None:
+            # A second back: SQLite stores whole seconds as text, which sorts below
+            # the bound's '.000000' form, and edits within that second must be read
+            changed.append(models.Property.updated_at >= last_updated - timedelta(seconds=1))
+        else:
+            changed.append(models.Property.updated_at.isnot(None))
+        rows = (await db.execute(
+            self._owned(select(models.Property.id, *_BBOX_COLUMNS), owner_id).where(or_(*changed))
+        )).all()
+
+        in_tree = set(index.tree_ids.tolist())
+        for pid, *bounds in rows:
+            index.known_ids.add(pid)
+            if pid in in_tree:
+                index.removed.add(pid)
+            if bounds[0] is None:
+                index.delta.pop(pid, None)
+            else:
+                index.delta[pid] = shapely.box(*bounds)
+
+        if len(index.known_ids) != state[0]:
+            return False  # rows were deleted
+        pending = len(index.delta) + len(index.removed)
+        if pending > max(MIN_REBUILD_CHANGES, REBUILD_FRACTION * len(index.tree_ids)):
+            return False
+        index.state = state
+        return True
+
+    async def refresh(self, db: AsyncSession, owner_id: int) -> _OwnerIndex:
+        index = self._owners.get(owner_id)
+        now = time.monotonic()
+        if index is not None and now - index.checked_at < STATE_TTL:
+            return index
+        async with self._lock:
+            state = await self._state(db, owner_id)
+            index = self._owners.get(owner_id)
+            if index is None or (index.state != state and not await self._apply_changes(db, owner_id, index, state)):
+                index = await self._rebuild(db, owner_id, state)
+                self._owners[owner_id] = index
+            index.checked_at = now
+            return index
+
+    async def find_intersecting(
+        self, db: AsyncSession, owner_id: int, geom: BaseGeometry
+    ) -> List[Tuple[models.Property, float]]:
+        """Properties whose boundary intersects `geom`, with overlap ratios, best first."""
+        index = await self.refresh(db, owner_id)
+        candidate_ids = index.candidates(geom)
+        if not candidate_ids:
+            return []
+        properties = (await db.scalars(
+            select(models.Property).options(joinedload(models.Property.client))
+            .where(models.Property.id.in_(candidate_ids))
+        )).all()
+        matches = []
+        for prop in properties:
+            boundary = geometry_service.to_shape(prop.geojson_boundary)
+            if boundary is not None and boundary.intersects(geom):
+                matches.append((prop, geometry_service.overlap_ratio(geom, boundary)))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+    async def best_match(self, db: AsyncSession, owner_id: int, geom: BaseGeometry) -> Optional[models.Property]:
+        """Property that best matches an analysed AOI, if it overlaps enough."""
+        matches = await self.find_intersecting(db, owner_id, geom)
+        if matches and matches[0][1] >= MIN_LINK_OVERLAP:
+            return matches[0][0]
+        return None
+
+    def mark_dirty(self, owner_id: int) -> None:
+        """Force a change check on the next lookup for this owner."""
+        index = self._owners.get(owner_id)
+        if index is not None:
+            index.checked_at = 0.0
+
+    def clear(self) -> None:
+        self._owners.clear()
+
+
+property_index = PropertySpatialIndex()
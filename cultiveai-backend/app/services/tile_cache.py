@@ -0,0 +1,360 @@
+"""
+Map tiles of the reports, served by /tiles/{report_id}/{layer}/{z}/{x}/{y}.png,
+and of the change comparisons, by /tiles/change/{change_id}/{layer}/...
+
+map_layers_urls holds Earth Engine tile URL templates, which stop working
+when their map token expires. Each tile is fetched from Earth Engine once
+and kept under TILE_CACHE_DIR, shared by all workers. When Earth Engine
+refuses a template, a new one is made from the report's image and AOI
+(gee_service.layer_tile_url), saved to the report, and the tile is
+fetched again: old reports keep their maps. A change comparison is saved
+without templates (POST /analysis/change makes a single Earth Engine
+request); its first tile makes one (gee_service.change_tile_url).
+
+The cache is least-recently-used on the filesystem: a hit touches the
+file's mtime, and once the directory holds more than TILE_CACHE_MAX_BYTES
+the oldest tiles are removed down to 90% of it. Each worker adds its own
+writes to the size it last measured and measures again after writing a
+tenth of the cap, so other workers' writes are counted that late at most.
+
+seed() fetches the tiles of a new report's AOI in the background
+(TILE_SEED_ZOOMS), so its first view is served from disk.
+"""
+import asyncio
+import math
+import os
+import shutil
+import threading
+import time
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+
+from .. import crud
+from ..core import metrics
+from ..core.config import (
+    TILE_CACHE_DIR, TILE_CACHE_MAX_BYTES, TILE_UPSTREAM_TIMEOUT,
+    TILE_SEED_ZOOMS, TILE_SEED_LAYERS, TILE_SEED_MAX_TILES,
+)
+from ..db.session import AsyncSessionLocal
+from . import gee_service, geometry_service
+
+# The map layers of a report: the keys of map_layers_urls without "_url"
+LAYERS = ("rgb", "degradation", "ndvi", "ndmi", "savi", "slope", "mapbiomas")
+# The map layers of a change comparison
+CHANGE_LAYERS = ("ndvi_change",)
+MAX_ZOOM = 24
+# How Earth Engine answers a template whose map token expired
+EXPIRED_STATUSES = (400, 401, 403, 404)
+# A template made less than this many seconds ago is not remade, whatever Earth Engine answers
+REFRESH_INTERVAL = 60.0
+SEED_CONCURRENCY = 4
+# Web Mercator's latitude limit
+MAX_LATITUDE = 85.0511287798
+
+
+class TileNotFound(Exception):
+    """The report or comparison does not exist or has no such layer."""
+
+
+class TileUpstreamError(Exception):
+    """Earth Engine did not return the tile."""
+
+
+_client: Optional[Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = None
+# (kind, report or comparison id, layer) -> URL template, in this worker
+_templates: Dict[Tuple[str, int, str], str] = {}
+_refreshed_at: Dict[Tuple[str, int, str], float] = {}
+_pending: Dict[tuple, asyncio.Future] = {}
+
+_usage_lock = threading.Lock()
+_scan_lock = threading.Lock()
+# Size of the cache directory when last measured (None: not yet), and bytes this worker wrote since
+_usage = {"bytes": None, "written": 0}
+
+
+def _http() -> httpx.AsyncClient:
+    """One client (connection pool) per event loop."""
+    global _client
+    loop = asyncio.get_running_loop()
+    if _client is None or _client[0] is not loop:
+        _client = (loop, httpx.AsyncClient(timeout=TILE_UPSTREAM_TIMEOUT))
+    return _client[1]
+
+
+async def _once(key: tuple, make: Callable[[], Awaitable]):
+    """Run `make` once for concurrent callers with the same key; each gets its result."""
+    pending = _pending.get(key)
+    if pending is None:
+        pending = asyncio.ensure_future(make())
+        _pending[key] = pending
+        pending.add_done_callback(lambda _: _pending.pop(key, None))
+    # A caller that goes away does not cancel the others'
+    return await asyncio.shield(pending)
+
+
+def _source_dir(source_id: int, kind: str = "report") -> str:
+    if kind == "report":
+        return os.path.join(TILE_CACHE_DIR, str(source_id))
+    return os.path.join(TILE_CACHE_DIR, kind, str(source_id))
+
+
+def _tile_path(source_id: int, layer: str, z: int, x: int, y: int, kind: str = "report") -> str:
+    return os.path.join(_source_dir(source_id, kind), layer, str(z), str(x), f"{y}.png")
+
+
+def _read(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    try:
+        # Most recently used
+        os.utime(path)
+    except OSError:
+        pass
+    return data
+
+
+def _write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Readers in other workers never see a partial tile
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, path)
+    _account(len(data))
+
+
+def _account(size: int) -> None:
+    with _usage_lock:
+        _usage["written"] += size
+        measured = _usage["bytes"]
+        if (measured is not None and measured + _usage["written"] <= TILE_CACHE_MAX_BYTES
+                and _usage["written"] < TILE_CACHE_MAX_BYTES // 10):
+            return
+    # One measurement at a time in this worker; writes meanwhile are counted by the next one
+    if not _scan_lock.acquire(blocking=False):
+        return
+    try:
+        with _usage_lock:
+            _usage["written"] = 0
+        size_now = _evict()
+        with _usage_lock:
+            _usage["bytes"] = size_now
+    finally:
+        _scan_lock.release()
+
+
+def _evict() -> int:
+    """Size of the cache, after removing the least recently used tiles if it is over the cap."""
+    tiles = []
+    total = 0
+    for root, _, names in os.walk(TILE_CACHE_DIR):
+        for name in names:
+            if not name.endswith(".png"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            tiles.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+    if total <= TILE_CACHE_MAX_BYTES:
+        return total
+    tiles.sort()
+    target = TILE_CACHE_MAX_BYTES * 0.9
+    for _, size, path in tiles:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    return total
+
+
+def _remember(key: Tuple[str, int, str], template: str) -> None:
+    if len(_templates) >= 10000:
+        _templates.clear()
+    _templates[key] = template
+
+
+async def _source(key: Tuple[str, int, str]) -> Optional[Tuple[Optional[str], Optional[Callable[[], Optional[str]]]]]:
+    """(saved template, blocking function making a new one) of a layer, or None if its report or comparison is gone."""
+    kind, source_id, layer = key
+    async with AsyncSessionLocal() as db:
+        if kind == "change":
+            source = await crud.crud_analysis.get_change_tile_source(db, source_id)
+            if source is None:
+                return None
+            map_layers_urls, before_period, after_period, aoi_geojson = source
+            make = partial(gee_service.change_tile_url, aoi_geojson, before_period, after_period)
+            return (map_layers_urls or {}).get(f"{layer}_url"), make
+        source = await crud.crud_analysis.get_tile_source(db, source_id)
+    if source is None:
+        return None
+    map_layers_urls, satellite_image_info, aoi_geojson = source
+    image_id = (satellite_image_info or {}).get("id")
+    make = partial(gee_service.layer_tile_url, image_id, aoi_geojson, f"{layer}_url") if image_id else None
+    return (map_layers_urls or {}).get(f"{layer}_url"), make
+
+
+async def _template(key: Tuple[str, int, str]) -> str:
+    template = _templates.get(key)
+    if template is None:
+        source = await _source(key)
+        template = source[0] if source else None
+        if not template:
+            # A comparison's templates are made on first use; a report's missing layer failed in the analysis
+            if source is None or key[0] != "change":
+                raise TileNotFound()
+            return await _once(("refresh", *key), lambda: _new_template(key, None))
+        _remember(key, template)
+    return template
+
+
+async def _new_template(key: Tuple[str, int, str], expired: Optional[str]) -> str:
+    """A template replacing `expired`: another worker's, if it already made one, else a new map ID."""
+    kind, source_id, layer = key
+    source = await _source(key)
+    if source is None:
+        raise TileNotFound()
+    current, make = source
+    if current and current != expired:
+        _remember(key, current)
+        return current
+
+    if make is None:
+        raise TileUpstreamError("Relatório sem imagem de satélite")
+    try:
+        template = await run_in_threadpool(make)
+    except Exception as e:
+        raise TileUpstreamError(f"Não foi possível renovar a camada: {e}") from e
+    if not template:
+        raise TileUpstreamError("Não foi possível renovar a camada")
+    async with AsyncSessionLocal() as db:
+        if kind == "change":
+            await crud.crud_analysis.set_change_map_layer_url(db, source_id, f"{layer}_url", template)
+        else:
+            await crud.crud_analysis.set_map_layer_url(db, source_id, f"{layer}_url", template)
+    _remember(key, template)
+    _refreshed_at[key] = time.monotonic()
+    metrics.TILE_REQUESTS.labels("refresh").inc()
+    return template
+
+
+async def _upstream(template: str, z: int, x: int, y: int) -> httpx.Response:
+    try:
+        return await _http().get(template.format(z=z, x=x, y=y))
+    except httpx.HTTPError as e:
+        raise TileUpstreamError(f"Earth Engine indisponível: {e}") from e
+
+
+async def _download(source_id: int, layer: str, z: int, x: int, y: int, kind: str) -> bytes:
+    key = (kind, source_id, layer)
+    template = await _template(key)
+    response = await _upstream(template, z, x, y)
+    if (response.status_code in EXPIRED_STATUSES
+            and time.monotonic() - _refreshed_at.get(key, -REFRESH_INTERVAL) >= REFRESH_INTERVAL):
+        template = await _once(("refresh", *key), lambda: _new_template(key, template))
+        response = await _upstream(template, z, x, y)
+    if response.status_code != 200:
+        raise TileUpstreamError(f"Earth Engine respondeu {response.status_code}")
+    path = _tile_path(source_id, layer, z, x, y, kind)
+    await run_in_threadpool(_write, path, response.content)
+    return response.content
+
+
+async def get_tile(source_id: int, layer: str, z: int, x: int, y: int, kind: str = "report") -> bytes:
+    """The PNG of a tile of a report (or a "change" comparison), from disk or Earth Engine; TileNotFound or TileUpstreamError."""
+    data = await run_in_threadpool(_read, _tile_path(source_id, layer, z, x, y, kind))
+    if data is not None:
+        metrics.TILE_REQUESTS.labels("hit").inc()
+        return data
+    try:
+        data = await _once(("tile", kind, source_id, layer, z, x, y), lambda: _download(source_id, layer, z, x, y, kind))
+    except (TileNotFound, TileUpstreamError):
+        metrics.TILE_REQUESTS.labels("error").inc()
+        raise
+    metrics.TILE_REQUESTS.labels("miss").inc()
+    return data
+
+
+def _discard(source_id: int, kind: str) -> None:
+    shutil.rmtree(_source_dir(source_id, kind), ignore_errors=True)
+
+
+async def discard(source_id: int, kind: str = "report") -> None:
+    """Drop the tiles of a deleted report (or "change" comparison)."""
+    for key in [key for key in _templates if key[:2] == (kind, source_id)]:
+        del _templates[key]
+    await run_in_threadpool(_discard, source_id, kind)
+
+
+def parse_zooms(spec: str) -> List[int]:
+    """"12-15" or "12,14" -> zoom levels."""
+    zooms = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        low, _, high = part.partition("-")
+        zooms.update(range(int(low), int(high or low) + 1))
+    return sorted(z for z in zooms if 0 <= z <= MAX_ZOOM)
+
+
+def _tile_xy(lon: float, lat: float, z: int) -> Tuple[int, int]:
+    n = 2 ** z
+    lat = math.radians(max(-MAX_LATITUDE, min(MAX_LATITUDE, lat)))
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_covering(aoi_geojson: dict, zooms: List[int], limit: int) -> List[Tuple[int, int, int]]:
+    """(z, x, y) of the tiles over the AOI's bounding box, lowest zooms first, at most `limit`."""
+    geom = geometry_service.to_shape(aoi_geojson)
+    if geom is None or geom.is_empty:
+        return []
+    min_lon, min_lat, max_lon, max_lat = geom.bounds
+    tiles = []
+    for z in zooms:
+        x0, y0 = _tile_xy(min_lon, max_lat, z)
+        x1, y1 = _tile_xy(max_lon, min_lat, z)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                if len(tiles) >= limit:
+                    return tiles
+                tiles.append((z, x, y))
+    return tiles
+
+
+async def seed(source_id: int, aoi_geojson: dict, kind: str = "report") -> None:
+    """
+    Fetch the AOI's tiles at TILE_SEED_ZOOMS, up to TILE_SEED_MAX_TILES: of
+    TILE_SEED_LAYERS for a report, of its only layer for a change comparison.
+    """
+    zooms = parse_zooms(TILE_SEED_ZOOMS)
+    if kind == "change":
+        layers = list(CHANGE_LAYERS)
+    else:
+        layers = [layer for layer in TILE_SEED_LAYERS if layer in LAYERS]
+    if not zooms or not layers:
+        return
+    tiles = tiles_covering(aoi_geojson, zooms, max(TILE_SEED_MAX_TILES // len(layers), 1))
+    semaphore = asyncio.Semaphore(SEED_CONCURRENCY)
+
+    async def fetch(layer: str, z: int, x: int, y: int) -> None:
+        async with semaphore:
+            try:
+                await get_tile(source_id, layer, z, x, y, kind)
+            except (TileNotFound, TileUpstreamError):
+                pass
+
+    await asyncio.gather(*(fetch(layer, *tile) for layer in layers for tile in tiles))
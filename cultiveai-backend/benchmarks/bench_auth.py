@@ -0,0 +1,88 @@
+"""
+Benchmark da autenticacao por token.
+
+Mede o custo de deps.authenticate_token (o que get_current_user e o
+download de relatorios fazem a cada requisicao) com o cache de tokens
+por worker ligado e desligado (AUTH_CACHE_TTL=0): tempo medio por
+chamada e comandos SQL por chamada.
+
+Usa um SQLite temporario, ou o banco de DATABASE_URL (as tabelas sao
+criadas com create_all, entao use um banco vazio).
+
+Uso:
+    python benchmarks/bench_auth.py [--calls 5000] [--users 50]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+from sqlalchemy import event, insert
+
+from app.db.base import Base
+from app import models
+from app.api import deps
+from app.core.security import create_access_token
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.services.auth_cache import auth_cache
+
+
+async def authenticate(tokens, calls: int) -> None:
+    async with AsyncSessionLocal() as db:
+        for i in range(calls):
+            # A request gets its own session; the cache must not depend on it
+            user = await deps.authenticate_token(db, tokens[i % len(tokens)])
+            assert user is not None
+            db.expunge_all()
+
+
+def measure(run, tokens, calls: int, ttl: float):
+    auth_cache.clear()
+    auth_cache.ttl = ttl
+    statements = 0
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        nonlocal statements
+        statements += 1
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    start = time.perf_counter()
+    run(authenticate(tokens, calls))
+    elapsed = time.perf_counter() - start
+    event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+    return elapsed / calls * 1e6, statements / calls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=50)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.execute(insert(models.User), [
+        {"email": f"user{u}@cultiveai.local", "hashed_password": "x"} for u in range(args.users)
+    ])
+    db.add(models.AuthState(id=1, version=0))
+    db.commit()
+    db.close()
+    tokens = [create_access_token(f"user{u}@cultiveai.local") for u in range(args.users)]
+    run = asyncio.new_event_loop().run_until_complete
+
+    print(f"{'cache':>6} {'us/call':>9} {'statements/call':>16}")
+    for label, ttl in (("off", 0.0), ("on", 60.0)):
+        us, statements = measure(run, tokens, args.calls, ttl)
+        print(f"{label:>6} {us:>9.1f} {statements:>16.3f}")
+    run(async_engine.dispose())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark da comparacao entre duas datas (POST /analysis/change).
+
+Com o Earth Engine falso (fakes.py) esperando --gee-latency segundos por
+chamada, compara o que custava comparar duas datas (duas analises
+completas, POST /analysis/) com uma comparacao: chamadas ao Earth Engine,
+tempo e bytes gravados no banco. O Gemini falso responde na hora, para
+medir so o Earth Engine.
+
+Usa um SQLite temporario, ou o banco de DATABASE_URL.
+
+Uso:
+    python benchmarks/bench_change.py [--gee-latency 0.3] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, "benchmarks"))
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+# The analysis of each date is its own report, not the first one handed back again
+os.environ["ANALYSIS_COALESCE_SECONDS"] = "0"
+# One user makes all the requests
+os.environ["ANALYSIS_RATE_PER_MINUTE"] = "1000"
+
+from fastapi.testclient import TestClient
+
+from app import models
+from app.db.session import SessionLocal
+from app.main import app
+from app.services import gee_service
+from fakes import install
+from init_db import init_db
+
+API = "/api/v1"
+BEFORE = {"start_date": "2025-01-01", "end_date": "2025-06-30"}
+AFTER = {"start_date": "2026-01-01", "end_date": "2026-06-30"}
+
+
+def aoi(i: int) -> dict:
+    west, south = -49.3 + i * 0.01, -16.7
+    ring = [[west, south], [west + 0.05, south], [west + 0.05, south + 0.05], [west, south + 0.05], [west, south]]
+    return {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+    ]}
+
+
+class CountingLatency:
+    """Wraps the fake Earth Engine's latency to count its round trips."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def wait(self) -> None:
+        self.calls += 1
+        self.latency.wait()
+
+
+def stored_bytes(model, row_id: int) -> int:
+    """Size of a saved row's JSON and text columns."""
+    db = SessionLocal()
+    row = db.get(model, row_id)
+    size = sum(
+        len(value.encode()) if isinstance(value, str) else len(json.dumps(value))
+        for column in model.__table__.columns
+        if (value := getattr(row, column.name)) is not None and not isinstance(value, (int, float))
+        and column.name != "created_at"
+    )
+    db.close()
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gee-latency", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    init_db()
+    install(gee_latency=args.gee_latency)
+    latency = CountingLatency(gee_service.ee.latency)
+    gee_service.ee.latency = latency
+
+    client = TestClient(app)
+    client.post(f"{API}/auth/register", json={"email": "bench@example.com", "password": "bench-password"})
+    token = client.post(f"{API}/auth/login", data={
+        "username": "bench@example.com", "password": "bench-password"
+    }).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    print(f"{'':>22} {'EE calls':>9} {'seconds':>8} {'stored bytes':>13}")
+    for label in ("two analyses", "one change request"):
+        calls = elapsed = stored = 0
+        for i in range(args.repeat):
+            area = aoi(i)
+            start_calls = latency.calls
+            start = time.perf_counter()
+            if label == "two analyses":
+                ids = [client.post(f"{API}/analysis/", json=area, headers=headers).json()["id"] for _ in range(2)]
+                stored += sum(stored_bytes(models.AnalysisReport, report_id) for report_id in ids)
+            else:
+                r = client.post(f"{API}/analysis/change", json={**area, "before": BEFORE, "after": AFTER}, headers=headers)
+                r.raise_for_status()
+                stored += stored_bytes(models.ChangeReport, r.json()["id"])
+            elapsed += time.perf_counter() - start
+            calls += latency.calls - start_calls
+        print(f"{label:>22} {calls / args.repeat:>9.1f} {elapsed / args.repeat:>8.2f} {stored / args.repeat:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark do resumo do dashboard.
+
+Para carteiras de tamanho crescente, compara a leitura de GET
+/dashboard/summary (linha de dashboard_summaries mantida incrementalmente)
+com o recalculo das mesmas agregacoes a partir das tabelas (contagens,
+soma de hectares e distribuicao de classes do ultimo relatorio de cada
+propriedade), que e o que crud_dashboard.rebuild faz.
+
+Uso:
+    python benchmarks/bench_dashboard.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app import models
+from app.crud import crud_dashboard
+from app.crud.crud_geometry import geometry_hash
+
+CLASSES = ["Degradação Severa", "Degradação Moderada", "Pastagem Estressada", "Pastagem Boa", "Pastagem Excelente"]
+
+
+def seed(db, reports: int) -> int:
+    rng = random.Random(42)
+    user = models.User(email="bench@cultiveai.local", hashed_password="x")
+    aoi = models.Geometry(hash=geometry_hash({}), geojson={})
+    db.add_all([user, aoi])
+    db.flush()
+    clients = max(reports // 100, 1)
+    db.execute(insert(models.Client), [{"name": f"Cliente {c}", "owner_id": user.id} for c in range(clients)])
+    client_ids = [c.id for c in db.query(models.Client.id)]
+    db.execute(insert(models.Property), [
+        {"name": f"Fazenda {p}", "client_id": client_ids[p % clients]} for p in range(reports // 10 or 1)
+    ])
+    property_ids = [p.id for p in db.query(models.Property.id)]
+    rows = []
+    for i in range(reports):
+        area = rng.uniform(10, 900)
+        shares = [rng.random() for _ in CLASSES]
+        rows.append({
+            "owner_id": user.id, "property_id": rng.choice(property_ids), "aoi_geometry_id": aoi.id,
+            "aoi_area_hectares": area, "ndvi_stats": {"mean": 0.5},
+            "degradation_summary": [
+                {"class_name": name, "percentage": 100 * s / sum(shares), "area_hectares": area * s / sum(shares)}
+                for name, s in zip(CLASSES, shares)
+            ],
+        })
+    db.execute(insert(models.AnalysisReport), rows)
+    db.commit()
+    return user.id
+
+
+def measure(run, fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(fn())
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+    run = asyncio.new_event_loop().run_until_complete
+
+    print(f"{'reports':>8} {'rebuild (ms)':>13} {'summary row (ms)':>17}")
+    for size in args.sizes:
+        path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        owner_id = seed(db, size)
+        db.close()
+
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        adb = async_sessionmaker(bind=async_engine, expire_on_commit=False)()
+        run(crud_dashboard.get_dashboard_summary(adb, owner_id))
+
+        async def rebuild():
+            await crud_dashboard.rebuild(adb, owner_id)
+            await adb.rollback()
+
+        async def read():
+            adb.expunge_all()
+            await crud_dashboard.get_dashboard_summary(adb, owner_id)
+
+        print(f"{size:>8} {measure(run, rebuild):>13.2f} {measure(run, read):>17.2f}")
+        run(adb.close())
+        run(async_engine.dispose())
+
+
+if __name__ == "__main__":
+    main()
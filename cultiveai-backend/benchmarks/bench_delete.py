@@ -0,0 +1,127 @@
+"""
+Benchmark da exclusao de clientes.
+
+Para clientes com cada vez mais propriedades (cada uma com alguns
+relatorios com HTML e descricao da IA), mede comandos SQL, tempo e pico
+de memoria de crud_client.delete_client, que agora deixa o banco apagar
+propriedades e relatorios (ON DELETE CASCADE), contra o comportamento
+anterior: carregar todos os filhos na sessao e apagar um a um.
+
+Termina com codigo 1 se o numero de comandos da exclusao em cascata
+variar com o tamanho do cliente.
+
+Usa um SQLite temporario, ou o banco de DATABASE_URL (as tabelas sao
+criadas com create_all, entao use um banco vazio).
+
+Uso:
+    python benchmarks/bench_delete.py [--sizes 10 100 500] [--reports 5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+from sqlalchemy import event, insert, select
+
+from app.db.base import Base
+from app import crud, models
+from app.crud.crud_geometry import geometry_hash
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+
+
+def seed_client(db, owner_id: int, properties: int, reports: int) -> int:
+    client = models.Client(name="Cliente", owner_id=owner_id)
+    db.add(client)
+    db.flush()
+    # Deleting the client prunes its geometries, so each client gets its own
+    aoi = {"client": client.id}
+    geometry = models.Geometry(hash=geometry_hash(aoi), geojson=aoi)
+    db.add(geometry)
+    db.flush()
+    db.execute(insert(models.Property), [
+        {"name": f"Fazenda {p}", "client_id": client.id} for p in range(properties)
+    ])
+    property_ids = db.scalars(select(models.Property.id).where(models.Property.client_id == client.id)).all()
+    db.execute(insert(models.AnalysisReport), [
+        {
+            "owner_id": owner_id, "property_id": property_id, "aoi_geometry_id": geometry.id,
+            "aoi_area_hectares": 120.0, "ndvi_stats": {"mean": 0.5},
+            "degradation_summary": [{"class_name": "Pastagem Boa", "percentage": 100.0, "area_hectares": 120.0}],
+            "ai_description": "## Relatório\n" + "- Pastagem Boa: 100%\n" * 200,
+            "report_html": "<html>" + "x" * 20000 + "</html>",
+        }
+        for property_id in property_ids for _ in range(reports)
+    ])
+    db.commit()
+    return client.id
+
+
+async def delete_client(client_id: int, owner_id: int, load_children: bool) -> None:
+    async with AsyncSessionLocal() as db:
+        client = await crud.crud_client.get_client(db, client_id=client_id, owner_id=owner_id)
+        if load_children:
+            # Previous behaviour: the ORM cascade loaded every child row, then deleted them one by one
+            await db.refresh(client, ["properties"])
+            for prop in client.properties:
+                await db.refresh(prop, ["reports"])
+        await crud.crud_client.delete_client(db, client)
+
+
+def measure(run, client_id: int, owner_id: int, load_children: bool):
+    statements = 0
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        nonlocal statements
+        statements += len(parameters) if executemany else 1
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    tracemalloc.start()
+    start = time.perf_counter()
+    run(delete_client(client_id, owner_id, load_children))
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+    return statements, elapsed * 1000, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--reports", type=int, default=5)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = models.User(email="bench@cultiveai.local", hashed_password="x")
+    db.add(user)
+    db.commit()
+    owner_id = user.id
+    run = asyncio.new_event_loop().run_until_complete
+
+    print(f"{'properties':>10} {'reports':>8} {'method':>18} {'statements':>10} {'ms':>9} {'peak MB':>8}")
+    cascade_counts = set()
+    for size in args.sizes:
+        for label, load_children in (("load + delete rows", True), ("ON DELETE CASCADE", False)):
+            client_id = seed_client(db, owner_id, size, args.reports)
+            statements, ms, peak = measure(run, client_id, owner_id, load_children)
+            if not load_children:
+                cascade_counts.add(statements)
+            print(f"{size:>10} {size * args.reports:>8} {label:>18} {statements:>10} {ms:>9.1f} {peak:>8.1f}")
+    db.close()
+    run(async_engine.dispose())
+    if len(cascade_counts) > 1:
+        print(f"ON DELETE CASCADE statement count depends on size: {sorted(cascade_counts)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
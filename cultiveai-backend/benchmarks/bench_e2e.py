@@ -0,0 +1,255 @@
+"""
+Benchmark de ponta a ponta com Earth Engine e Gemini simulados.
+
+Cria um banco novo (SQLite temporario, ou o banco vazio de DATABASE_URL),
+popula com seed.py, sobe o uvicorn com fake_app.py (latencias injetadas
+em cada chamada ao GEE e ao Gemini) e mede, cenario por cenario, vazao e
+latencias p50/p95/p99 com requisicoes concorrentes de varios usuarios:
+
+- login:     POST /auth/login (bcrypt)
+- lists:     GET /clients/, /properties/ e /analysis/ (primeira pagina)
+- download:  GET /analysis/{id}/download (HTML regenerado)
+- analysis:  POST /analysis/ (GEE + Gemini + HTML + gravacao)
+
+O resultado vai para benchmarks/results/<data>-<commit>.json, com a
+configuracao usada; --compare mostra a diferenca para um resultado
+anterior (de outro commit, com os mesmos parametros).
+
+Uso:
+    python benchmarks/bench_e2e.py [--scenarios login lists download analysis] [--duration 10] \\
+        [--concurrency 16] [--workers 1] [--gee-latency 0.05] [--gemini-latency 0.5] \\
+        [--users 1000] [--clients 4000] [--properties 8000] [--reports 8000] \\
+        [--compare benchmarks/results/<arquivo>.json]
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+import httpx
+from sqlalchemy import select
+
+from app import models
+from app.core.security import create_access_token
+from app.db.session import SessionLocal
+
+import seed as seeding
+
+API = "/api/v1"
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+SCENARIOS = ("login", "lists", "download", "analysis")
+
+
+def load_users(active_users: int, rng: random.Random) -> list:
+    """Token, report ids and properties (id, boundary) of a sample of the seeded users."""
+    db = SessionLocal()
+    users = []
+    user_rows = db.execute(select(models.User.id, models.User.email).order_by(models.User.id)).all()
+    for user_id, email in rng.sample(user_rows, min(active_users, len(user_rows))):
+        reports = list(db.scalars(select(models.AnalysisReport.id).where(models.AnalysisReport.owner_id == user_id)))
+        properties = [
+            (p.id, p.geojson_boundary) for p in db.scalars(
+                select(models.Property).join(models.Client).where(models.Client.owner_id == user_id)
+            )
+        ]
+        users.append({
+            "email": email, "token": create_access_token(email), "reports": reports, "properties": properties,
+        })
+    db.close()
+    return users
+
+
+def requests_for(scenario: str, users: list):
+    """Endless cycle of (method, path, kwargs) for one scenario, rotating users."""
+    for user in itertools.cycle(users):
+        headers = {"Authorization": f"Bearer {user['token']}"}
+        if scenario == "login":
+            yield "POST", f"{API}/auth/login", {"data": {"username": user["email"], "password": seeding.PASSWORD}}
+        elif scenario == "lists":
+            for path in ("clients/", "properties/", "analysis/"):
+                yield "GET", f"{API}/{path}?limit=20", {"headers": headers}
+        elif scenario == "download" and user["reports"]:
+            report_id = user["reports"][len(user["email"]) % len(user["reports"])]
+            yield "GET", f"{API}/analysis/{report_id}/download", {"params": {"token": user["token"]}}
+        elif scenario == "analysis" and user["properties"]:
+            property_id, geojson = user["properties"][0]
+            yield "POST", f"{API}/analysis/", {"json": {**geojson, "property_id": property_id}, "headers": headers}
+
+
+async def worker(client: httpx.AsyncClient, requests, deadline: float, latencies: list, errors: list):
+    for method, path, kwargs in requests:
+        if time.perf_counter() >= deadline:
+            return
+        start = time.perf_counter()
+        try:
+            r = await client.request(method, path, **kwargs)
+            if r.status_code != 200:
+                errors.append(r.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - start)
+
+
+def percentile(ordered: list, q: float) -> float:
+    return ordered[max(int(len(ordered) * q) - 1, 0)] * 1000 if ordered else float("nan")
+
+
+async def run_scenario(url: str, scenario: str, users: list, concurrency: int, duration: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=300) as client:
+        # Each worker starts at a different user
+        streams = [requests_for(scenario, users[i:] + users[:i]) for i in range(concurrency)]
+        latencies, errors = [], []
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*[worker(client, s, deadline, latencies, errors) for s in streams])
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": dict(Counter(map(str, errors))),
+        "throughput": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+    }
+
+
+def start_server(args, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "BENCH_GEE_LATENCY": str(args.gee_latency),
+        "BENCH_GEMINI_LATENCY": str(args.gemini_latency),
+        "BENCH_LATENCY_JITTER": str(args.jitter),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "fake_app:app", "--app-dir", BENCH_DIR,
+         "--port", str(port), "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"], cwd=BACKEND_DIR).returncode != 0
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results: dict, baseline: dict = None) -> None:
+    print(f"{'scenario':>9} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for scenario, r in results["scenarios"].items():
+        print(f"{scenario:>9} {r['throughput']:>8.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} "
+              f"{sum(r['errors'].values()):>7}")
+        old = (baseline or {}).get("scenarios", {}).get(scenario)
+        if old:
+            change = [
+                f"{key} {100 * (r[key] - old[key]) / old[key]:+.1f}%"
+                for key in ("throughput", "p50_ms", "p95_ms", "p99_ms") if old[key]
+            ]
+            print(f"{'':>9} vs {baseline['commit']}: {', '.join(change)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--gee-latency", type=float, default=0.05, help="seconds per Earth Engine call")
+    parser.add_argument("--gemini-latency", type=float, default=0.5, help="seconds per Gemini call")
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency variation, as a fraction")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=4000)
+    parser.add_argument("--properties", type=int, default=8000)
+    parser.add_argument("--reports", type=int, default=8000)
+    parser.add_argument("--active-users", type=int, default=200, help="users the requests rotate through")
+    parser.add_argument("--compare", help="earlier results file to compare with")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<date>-<commit>.json)")
+    args = parser.parse_args()
+
+    from init_db import init_db
+
+    init_db()
+    print(f"Seeding {args.users} users, {args.clients} clients, {args.properties} properties, {args.reports} reports...")
+    db = SessionLocal()
+    seeding.seed(db, args.users, args.clients, args.properties, args.reports)
+    db.close()
+    users = load_users(args.active_users, random.Random(7))
+
+    port = args.port
+    if not port:
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+    server = start_server(args, port)
+    results = {
+        "commit": git_commit(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("compare", "output", "port")},
+        "scenarios": {},
+    }
+    try:
+        for scenario in args.scenarios:
+            print(f"Running {scenario} for {args.duration:.0f}s...")
+            results["scenarios"][scenario] = asyncio.run(
+                run_scenario(f"http://127.0.0.1:{port}", scenario, users, args.concurrency, args.duration)
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        # Scenarios are compared one by one; anything else that differs skews the numbers
+        differing = [
+            key for key in results["config"]
+            if key != "scenarios" and baseline.get("config", {}).get(key) != results["config"][key]
+        ]
+        if differing:
+            print(f"Warning: the baseline was run with different {', '.join(differing)}")
+    print_results(results, baseline)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{results['commit']}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved {output}")
+
+
+if __name__ == "__main__":
+    main()
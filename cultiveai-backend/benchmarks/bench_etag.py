@@ -0,0 +1,120 @@
+"""
+Benchmark das leituras condicionais (ETag / If-None-Match).
+
+Para uma propriedade com contorno de N vertices, um cliente e um relatorio
+com HTML e descricao da IA, faz cada GET duas vezes: sem If-None-Match
+(200 completo) e com o ETag recebido (304). Reporta tempo, bytes e os
+comandos SQL de cada caminho, e termina com codigo 1 se algum comando do
+caminho 304 ler uma coluna pesada (GeoJSON, HTML ou markdown).
+
+Usa um SQLite temporario, ou o banco de DATABASE_URL.
+
+Uso:
+    python benchmarks/bench_etag.py [--vertices 5000] [--repeat 50]
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import models
+from app.crud.crud_geometry import geometry_hash
+from app.db.session import SessionLocal, async_engine
+from app.main import app
+from init_db import init_db
+
+API = "/api/v1"
+# Column names whose appearance in a 304 path query means heavy data was read
+HEAVY_COLUMNS = ("geojson", "report_html", "ai_description")
+
+
+def boundary(vertices: int) -> dict:
+    ring = [[-49.25 + 0.01 * math.cos(2 * math.pi * i / vertices), -16.68 + 0.01 * math.sin(2 * math.pi * i / vertices)]
+            for i in range(vertices)]
+    ring.append(ring[0])
+    return {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+    ]}
+
+
+def seed_report(owner_id: int, property_id: int, aoi: dict) -> int:
+    db = SessionLocal()
+    geometry = db.query(models.Geometry).filter_by(hash=geometry_hash(aoi)).first()
+    report = models.AnalysisReport(
+        owner_id=owner_id, property_id=property_id, aoi_geometry=geometry, aoi_area_hectares=120.0,
+        analysis_period={"start_date": "2026-01-01", "end_date": "2026-03-01"}, satellite_image_info={},
+        ndvi_stats={"mean": 0.5}, map_layers_urls={},
+        degradation_summary=[{"class_name": "Pastagem Boa", "percentage": 100.0, "area_hectares": 120.0}],
+        ai_description="## Relatório\n" + "- Pastagem Boa: 100%\n" * 200,
+        report_html="<html>" + "x" * 200000 + "</html>",
+    )
+    db.add(report)
+    db.commit()
+    report_id = report.id
+    db.close()
+    return report_id
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vertices", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    init_db()
+    client = TestClient(app)
+    client.post(f"{API}/auth/register", json={"email": "bench@example.com", "password": "bench-password"})
+    token = client.post(f"{API}/auth/login", data={
+        "username": "bench@example.com", "password": "bench-password"
+    }).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": "identity"}
+    owner_id = client.get(f"{API}/auth/me", headers=headers).json()["id"]
+    aoi = boundary(args.vertices)
+    client_id = client.post(f"{API}/clients/", json={"name": "Cliente"}, headers=headers).json()["id"]
+    property_id = client.post(f"{API}/properties/", json={
+        "name": "Fazenda", "client_id": client_id, "geojson_boundary": aoi,
+    }, headers=headers).json()["id"]
+    report_id = seed_report(owner_id, property_id, aoi)
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    heavy_reads = []
+    print(f"{'GET':>20} {'status':>6} {'ms':>7} {'bytes':>8} {'statements':>10}")
+    for path in (f"/clients/{client_id}", f"/properties/{property_id}", f"/analysis/{report_id}",
+                 "/clients/", "/properties/", "/analysis/"):
+        etag = client.get(f"{API}{path}", headers=headers).headers["etag"]
+        for label, request_headers in (("200", headers), ("304", {**headers, "If-None-Match": etag})):
+            statements.clear()
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                r = client.get(f"{API}{path}", headers=request_headers)
+            ms = (time.perf_counter() - start) / args.repeat * 1000
+            assert str(r.status_code) == label, (path, r.status_code)
+            per_request = len(statements) // args.repeat
+            print(f"{path:>20} {r.status_code:>6} {ms:>7.2f} {len(r.content):>8} {per_request:>10}")
+            if label == "304":
+                heavy_reads += [(path, s) for s in statements if any(column in s for column in HEAVY_COLUMNS)]
+    event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+    if heavy_reads:
+        for path, statement in heavy_reads[:5]:
+            print(f"\n304 path of {path} read a heavy column:\n{statement}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
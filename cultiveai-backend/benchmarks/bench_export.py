@@ -0,0 +1,151 @@
+"""
+Benchmark da exportacao de propriedades.
+
+Compara a exportacao em streaming (export_service: cursor no servidor com
+yield_per, tuplas de colunas serializadas direto) com o que um cliente
+precisava fazer antes: paginar GET /properties/?limit=1000 ate o fim,
+cada pagina montando objetos ORM e modelos Pydantic. Mede o tempo total
+e o pico de memoria alocada (tracemalloc) de cada abordagem.
+
+Usa um SQLite temporario, ou o banco de DATABASE_URL (as tabelas sao
+criadas com create_all, entao use um banco vazio).
+
+Uso:
+    python benchmarks/bench_export.py [--rows 50000]
+    DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_export.py
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+from app.db.base import Base
+from app.crud.crud_geometry import geometry_hash
+from app import crud, models, schemas
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.services import export_service, geometry_service
+
+
+def insert_properties(db, rows: list) -> None:
+    """Core INSERT of property dicts carrying a "geojson_boundary" (one geometry each)."""
+    geometry_ids = db.execute(
+        models.Geometry.__table__.insert().returning(models.Geometry.id, sort_by_parameter_order=True),
+        [{"hash": geometry_hash(row["geojson_boundary"]), "geojson": row["geojson_boundary"]} for row in rows],
+    ).scalars().all()
+    db.execute(models.Property.__table__.insert(), [
+        {**{k: v for k, v in row.items() if k != "geojson_boundary"}, "boundary_geometry_id": geometry_id}
+        for row, geometry_id in zip(rows, geometry_ids)
+    ])
+
+
+def boundary(rng: random.Random) -> dict:
+    lon, lat, size = rng.uniform(-53, -46), rng.uniform(-19, -13), rng.uniform(0.005, 0.03)
+    ring = [[round(lon + size * dx, 6), round(lat + size * dy, 6)]
+            for dx, dy in [(0, 0), (1, 0), (1.2, 0.7), (1, 1), (0.3, 1.2), (0, 1), (0, 0)]]
+    return {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+    ]}
+
+
+def seed(rows: int) -> int:
+    rng = random.Random(42)
+    db = SessionLocal()
+    user = models.User(email="bench@cultiveai.local", hashed_password="x")
+    db.add(user)
+    db.flush()
+    clients = [models.Client(name=f"Cliente {c}", owner_id=user.id) for c in range(50)]
+    db.add_all(clients)
+    db.flush()
+    batch = []
+    for i in range(rows):
+        geo = boundary(rng)
+        bounds = geometry_service.bbox(geo)
+        batch.append({
+            "name": f"Fazenda {i}", "client_id": clients[i % 50].id, "geojson_boundary": geo,
+            "total_area_hectares": rng.uniform(10, 900), "city": "Rio Verde", "state": "GO",
+            "bbox_min_lon": bounds[0], "bbox_min_lat": bounds[1],
+            "bbox_max_lon": bounds[2], "bbox_max_lat": bounds[3],
+        })
+        if len(batch) == 5000:
+            insert_properties(db, batch)
+            batch = []
+    if batch:
+        insert_properties(db, batch)
+    db.commit()
+    user_id = user.id
+    db.close()
+    return user_id
+
+
+async def paginated(owner_id: int) -> int:
+    """Page through the list endpoint's crud call, as a client did before."""
+    size, cursor = 0, None
+    async with AsyncSessionLocal() as db:
+        while True:
+            properties, _, cursor = await crud.crud_property.get_properties(
+                db, owner_id=owner_id, limit=1000, cursor=cursor
+            )
+            page = schemas.Page[schemas.PropertyWithClient](items=[
+                schemas.PropertyWithClient(
+                    **schemas.Property.model_validate(prop).model_dump(),
+                    client_name=prop.client.name,
+                ) for prop in properties
+            ], total=0, next_cursor=cursor)
+            size += len(page.model_dump_json())
+            db.expunge_all()
+            if cursor is None:
+                return size
+
+
+async def streamed(owner_id: int, file_format: str) -> int:
+    size = 0
+    async for chunk in export_service.export_properties(owner_id, file_format, boundaries=True):
+        size += len(chunk.encode())
+    return size
+
+
+def measure(run, coro_fn):
+    start = time.perf_counter()
+    size = run(coro_fn())
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    run(coro_fn())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    print(f"Seeding {args.rows} properties ({engine.dialect.name})...")
+    owner_id = seed(args.rows)
+    run = asyncio.new_event_loop().run_until_complete
+
+    print(f"{'method':>22} {'seconds':>8} {'rows/s':>8} {'peak MB':>8} {'output MB':>10}")
+    cases = [
+        ("paginated limit=1000", lambda: paginated(owner_id)),
+        ("stream ndjson", lambda: streamed(owner_id, "ndjson")),
+        ("stream csv", lambda: streamed(owner_id, "csv")),
+        ("stream geojson", lambda: streamed(owner_id, "geojson")),
+    ]
+    for label, coro_fn in cases:
+        elapsed, peak, size = measure(run, coro_fn)
+        print(f"{label:>22} {elapsed:>8.2f} {args.rows / elapsed:>8.0f} {peak / 1e6:>8.1f} {size / 1e6:>10.1f}")
+    run(async_engine.dispose())
+
+
+if __name__ == "__main__":
+    main()
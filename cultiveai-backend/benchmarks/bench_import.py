@@ -0,0 +1,119 @@
+"""
+Benchmark da importacao em lote de propriedades.
+
+Gera um GeoJSON com N propriedades (poligonos com 12 vertices) e compara
+a importacao em lote (parse em streaming + INSERT em lotes numa unica
+transacao) com a criacao uma a uma via crud_property.create_property,
+que e o que o frontend faria chamando POST /properties/ para cada linha.
+A criacao uma a uma roda numa amostra e e extrapolada para N.
+
+Uso:
+    python benchmarks/bench_import.py [--rows 10000] [--sample 500]
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app import crud, models, schemas
+from app.services import import_service
+
+
+def polygon(rng: random.Random) -> dict:
+    lon, lat, radius = rng.uniform(-53, -46), rng.uniform(-19, -13), rng.uniform(0.005, 0.03)
+    points = []
+    for k in range(12):
+        angle = 2 * math.pi * k / 12
+        r = radius * rng.uniform(0.6, 1.0)
+        points.append([round(lon + r * math.cos(angle), 6), round(lat + r * math.sin(angle), 6)])
+    points.append(points[0])
+    return {"type": "Polygon", "coordinates": [points]}
+
+
+def features(rows: int) -> list:
+    rng = random.Random(42)
+    return [{
+        "type": "Feature",
+        "properties": {"nome": f"Fazenda {i}", "area_ha": round(rng.uniform(10, 900), 2), "uf": "GO", "cidade": "Rio Verde"},
+        "geometry": polygon(rng),
+    } for i in range(rows)]
+
+
+def seed(db) -> tuple:
+    user = models.User(email="bench@cultiveai.local", hashed_password="x")
+    db.add(user)
+    db.flush()
+    client = models.Client(name="Cliente", owner_id=user.id)
+    db.add(client)
+    db.commit()
+    return user.id, client.id
+
+
+async def one_by_one(adb, feats: list, owner_id: int, client_id: int) -> None:
+    for feature in feats:
+        props = feature["properties"]
+        data = schemas.PropertyCreate(
+            name=props["nome"], total_area_hectares=props["area_ha"], state=props["uf"], city=props["cidade"],
+            client_id=client_id,
+            geojson_boundary={"type": "FeatureCollection", "features": [
+                {"type": "Feature", "properties": {}, "geometry": feature["geometry"]}
+            ]},
+        )
+        await crud.crud_property.create_property(adb, property_data=data, owner_id=owner_id)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--sample", type=int, default=500)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    owner_id, client_id = seed(db)
+    db.close()
+
+    adb = async_sessionmaker(bind=create_async_engine(f"sqlite+aiosqlite:///{path}"), expire_on_commit=False)()
+    run = asyncio.new_event_loop().run_until_complete
+
+    feats = features(args.rows)
+    payload = json.dumps({"type": "FeatureCollection", "features": feats}).encode()
+    print(f"GeoJSON with {args.rows} features: {len(payload) / 1e6:.1f} MB")
+
+    start = time.perf_counter()
+    result = run(import_service.import_properties(
+        adb, io.BytesIO(payload), "geojson", owner_id=owner_id, default_client_id=client_id
+    ))
+    bulk = time.perf_counter() - start
+    assert result.created == args.rows, result
+
+    sample = feats[:args.sample]
+    start = time.perf_counter()
+    run(one_by_one(adb, sample, owner_id, client_id))
+    single = (time.perf_counter() - start) / len(sample) * args.rows
+
+    total = run(adb.scalar(select(func.count(models.Property.id))))
+    print(f"{'method':>22} {'seconds':>9} {'rows/s':>9}")
+    print(f"{'bulk import':>22} {bulk:>9.2f} {args.rows / bulk:>9.0f}")
+    print(f"{'one by one (extrap.)':>22} {single:>9.2f} {args.rows / single:>9.0f}")
+    print(f"Speedup: {single / bulk:.1f}x ({total} rows in the database)")
+    run(adb.close())
+
+
+if __name__ == "__main__":
+    main()
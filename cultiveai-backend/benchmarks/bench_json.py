@@ -0,0 +1,93 @@
+"""
+Benchmark de serializacao e compressao de uma propriedade com contorno
+grande.
+
+Monta a resposta de GET /properties/{id} para um contorno de N vertices e
+compara o tempo de serializacao de cada caminho (json.dumps sobre
+jsonable_encoder, orjson, e o dump_json do Pydantic que o FastAPI usa
+para endpoints com response_model) e os bytes enviados sem compressao,
+com gzip e com brotli nos niveis configurados em app/core/config.py.
+
+Uso:
+    python benchmarks/bench_json.py [--vertices 5000]
+"""
+import argparse
+import gzip
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app import schemas
+from app.core.compression import HAS_BROTLI
+from app.core.config import BROTLI_QUALITY, GZIP_LEVEL
+
+
+def boundary(vertices: int) -> dict:
+    # Jittered circle, so coordinates do not repeat like a regular polygon's would
+    ring = [
+        [-49.25 + 0.01 * math.cos(2 * math.pi * i / vertices) * (1 + 0.05 * math.sin(i * 7.3)),
+         -16.68 + 0.01 * math.sin(2 * math.pi * i / vertices) * (1 + 0.05 * math.cos(i * 3.1))]
+        for i in range(vertices)
+    ]
+    ring.append(ring[0])
+    return {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+    ]}
+
+
+def best_ms(fn, repeat: int = 20) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vertices", type=int, default=5000)
+    args = parser.parse_args()
+
+    prop = schemas.PropertyWithClient(
+        id=1, name="Fazenda Boa Vista", client_id=1, client_name="Cliente", reports_count=3,
+        geojson_boundary=boundary(args.vertices), created_at=datetime.now(timezone.utc),
+    )
+    adapter = TypeAdapter(schemas.PropertyWithClient)
+
+    print(f"property with a {args.vertices}-vertex boundary\n")
+    print(f"{'serializer':>32} {'ms':>8} {'bytes':>9}")
+    serializers = [
+        ("json.dumps(jsonable_encoder)", lambda: json.dumps(jsonable_encoder(prop)).encode()),
+        ("orjson.dumps(model_dump)", lambda: orjson.dumps(prop.model_dump())),
+        ("pydantic dump_json (FastAPI)", lambda: adapter.dump_json(prop)),
+    ]
+    for label, fn in serializers:
+        print(f"{label:>32} {best_ms(fn):>8.2f} {len(fn()):>9}")
+
+    body = adapter.dump_json(prop)
+    print(f"\n{'encoding':>32} {'ms':>8} {'bytes':>9} {'ratio':>6}")
+    encodings = [("identity", lambda: body), (f"gzip -{GZIP_LEVEL}", lambda: gzip.compress(body, GZIP_LEVEL)),
+                 ("gzip -9", lambda: gzip.compress(body, 9))]
+    if HAS_BROTLI:
+        import brotli
+        encodings += [(f"br q{BROTLI_QUALITY}", lambda: brotli.compress(body, quality=BROTLI_QUALITY)),
+                      ("br q11", lambda: brotli.compress(body, quality=11))]
+    else:
+        print("(brotli not installed: br rows skipped)")
+    for label, fn in encodings:
+        size = len(fn())
+        print(f"{label:>32} {best_ms(fn, 5):>8.2f} {size:>9} {size / len(body):>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark de carga dos endpoints de CRUD contra um servidor em execucao.
+
+Registra um usuario, cria clientes e propriedades pela API e dispara
+requisicoes concorrentes (listagem, contagem e detalhe) por um intervalo
+fixo, reportando requisicoes por segundo e latencias p50/p99. Para comparar
+configuracoes, rode o servidor com o mesmo limite de conexoes
+(DB_POOL_SIZE + DB_MAX_OVERFLOW) e o mesmo numero de workers.
+
+Uso:
+    uvicorn app.main:app --port 8000
+    python benchmarks/bench_load.py --url http://127.0.0.1:8000 [--concurrency 64] [--duration 15]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import Counter
+
+import httpx
+
+API = "/api/v1"
+
+
+async def setup(client: httpx.AsyncClient, clients: int, properties: int) -> dict:
+    email = f"load-{uuid.uuid4().hex[:8]}@example.com"
+    r = await client.post(f"{API}/auth/register", json={"email": email, "password": "bench-password"})
+    r.raise_for_status()
+    r = await client.post(f"{API}/auth/login", data={"username": email, "password": "bench-password"})
+    r.raise_for_status()
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    client_ids = []
+    for i in range(clients):
+        r = await client.post(f"{API}/clients/", json={"name": f"Cliente {i}", "city": "Goiânia"}, headers=headers)
+        r.raise_for_status()
+        client_ids.append(r.json()["id"])
+    property_ids = []
+    for i in range(properties):
+        r = await client.post(f"{API}/properties/", json={
+            "name": f"Fazenda {i}", "client_id": client_ids[i % len(client_ids)],
+        }, headers=headers)
+        r.raise_for_status()
+        property_ids.append(r.json()["id"])
+    return {"headers": headers, "client_ids": client_ids, "property_ids": property_ids}
+
+
+def request_mix(ctx: dict):
+    """Endless cycle of typical CRUD reads."""
+    i = 0
+    while True:
+        cid = ctx["client_ids"][i % len(ctx["client_ids"])]
+        pid = ctx["property_ids"][i % len(ctx["property_ids"])]
+        yield f"{API}/clients/?limit=20"
+        yield f"{API}/clients/{cid}"
+        yield f"{API}/properties/?limit=20"
+        yield f"{API}/properties/{pid}"
+        yield f"{API}/clients/count"
+        i += 1
+
+
+async def worker(client: httpx.AsyncClient, ctx: dict, deadline: float, latencies: list, errors: list):
+    for path in request_mix(ctx):
+        if time.perf_counter() >= deadline:
+            return
+        start = time.perf_counter()
+        try:
+            r = await client.get(path, headers=ctx["headers"])
+            if r.status_code != 200:
+                errors.append(r.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--properties", type=int, default=200)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        print(f"Seeding {args.clients} clients / {args.properties} properties...")
+        ctx = await setup(client, args.clients, args.properties)
+
+        # Warm-up
+        await asyncio.gather(*[client.get(f"{API}/clients/", headers=ctx["headers"]) for _ in range(args.concurrency)])
+
+        latencies, errors = [], []
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            worker(client, ctx, deadline, latencies, errors) for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"requests: {len(latencies)}  errors: {len(errors)} {dict(Counter(errors)) if errors else ''}  concurrency: {args.concurrency}")
+    print(f"throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(f"latency p50: {statistics.median(latencies) * 1000:.1f} ms  p99: {p99 * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
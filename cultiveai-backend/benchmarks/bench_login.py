@@ -0,0 +1,79 @@
+"""
+Benchmark de login sob carga concorrente contra um servidor em execucao.
+
+Dispara logins concorrentes (cada um verifica a senha com bcrypt) junto
+com leituras de CRUD, por um intervalo fixo, e reporta logins por segundo
+e as latencias p50/p99 de cada tipo de requisicao. Para comparar o hash
+em processos separados com o hash nas threads da requisicao, rode o
+servidor com PASSWORD_HASH_WORKERS=0 e depois com o valor padrao, com o
+mesmo BCRYPT_ROUNDS e o mesmo numero de workers.
+
+Uso:
+    PASSWORD_HASH_WORKERS=0 uvicorn app.main:app --port 8000
+    python benchmarks/bench_login.py --url http://127.0.0.1:8000 [--logins 16] [--readers 16] [--duration 15]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+from bench_load import API, setup, worker
+
+
+async def login_worker(client: httpx.AsyncClient, credentials: dict, deadline: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            r = await client.post(f"{API}/auth/login", data=credentials)
+            if r.status_code != 200:
+                errors.append(r.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - start)
+
+
+def report(label: str, latencies: list, errors: list, elapsed: float) -> None:
+    latencies.sort()
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    print(f"{label:>6}: {len(latencies) / elapsed:8.1f} req/s  p50 {statistics.median(latencies) * 1000:8.1f} ms"
+          f"  p99 {p99 * 1000:8.1f} ms  errors {dict(Counter(errors)) if errors else 0}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--logins", type=int, default=16, help="concurrent login loops")
+    parser.add_argument("--readers", type=int, default=16, help="concurrent CRUD read loops (0 for logins only)")
+    parser.add_argument("--duration", type=float, default=15.0)
+    args = parser.parse_args()
+
+    concurrency = args.logins + args.readers
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=120) as client:
+        ctx = await setup(client, clients=10, properties=20)
+        email = (await client.get(f"{API}/auth/me", headers=ctx["headers"])).json()["email"]
+        credentials = {"username": email, "password": "bench-password"}
+
+        # Warm-up (starts the hashing processes)
+        await asyncio.gather(*[client.post(f"{API}/auth/login", data=credentials) for _ in range(args.logins)])
+
+        logins, login_errors, reads, read_errors = [], [], [], []
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *[login_worker(client, credentials, deadline, logins, login_errors) for _ in range(args.logins)],
+            *[worker(client, ctx, deadline, reads, read_errors) for _ in range(args.readers)],
+        )
+        elapsed = time.perf_counter() - started
+
+    print(f"logins: {args.logins} concurrent  readers: {args.readers} concurrent  duration: {elapsed:.1f} s")
+    report("login", logins, login_errors, elapsed)
+    if reads:
+        report("crud", reads, read_errors, elapsed)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
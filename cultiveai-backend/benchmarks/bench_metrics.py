@@ -0,0 +1,116 @@
+"""
+Benchmark do custo das metricas do Prometheus.
+
+Mede, em microssegundos, o que as metricas somam a cada requisicao:
+- MetricsMiddleware em volta de um app ASGI vazio, contra o app sem ele;
+- os ganchos de SQL (query_stats.instrument_engine) em um SELECT 1, com e sem eles;
+- GET /api/v1/clients/{id} pelo app inteiro, para comparar com o total.
+
+Com --multiproc as amostras vao para arquivos em um diretorio temporario
+(PROMETHEUS_MULTIPROC_DIR), como na imagem de producao.
+
+Uso:
+    python benchmarks/bench_metrics.py [--requests 5000] [--multiproc]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+if "--multiproc" in sys.argv:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp()
+
+import httpx
+from sqlalchemy import create_engine, text
+
+from app.core import metrics
+from app.db import query_stats
+from app.core.security import create_access_token
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app import models
+from app.main import app
+
+
+async def empty_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def call_asgi(asgi, requests: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await asgi(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def select_one(instrumented: bool, queries: int) -> float:
+    bench_engine = create_engine("sqlite://")
+    if instrumented:
+        query_stats.instrument_engine(bench_engine)
+    # As inside a request, where the hooks add to that request's numbers
+    with query_stats.track_queries(), bench_engine.connect() as conn:
+        start = time.perf_counter()
+        for _ in range(queries):
+            conn.execute(text("SELECT 1"))
+        elapsed = time.perf_counter() - start
+    bench_engine.dispose()
+    return elapsed / queries * 1e6
+
+
+async def get_client(requests: int) -> float:
+    headers = {"Authorization": f"Bearer {create_access_token('bench@example.com')}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        assert (await client.get("/api/v1/clients/1", headers=headers)).status_code == 200
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/api/v1/clients/1", headers=headers)
+        return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--multiproc", action="store_true")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = models.User(email="bench@example.com", hashed_password="x")
+    db.add_all([user, models.AuthState(id=1, version=0)])
+    db.flush()
+    db.add(models.Client(name="Cliente", owner_id=user.id))
+    db.commit()
+    db.close()
+    run = asyncio.new_event_loop().run_until_complete
+
+    bare = run(call_asgi(empty_app, args.requests))
+    wrapped = run(call_asgi(metrics.MetricsMiddleware(empty_app), args.requests))
+    plain_query = select_one(False, args.requests)
+    hooked_query = select_one(True, args.requests)
+    full = run(get_client(args.requests // 5))
+
+    mode = "multiproc" if args.multiproc else "single process"
+    print(f"metrics ({mode})")
+    print(f"  middleware:   {wrapped - bare:7.1f} us/request ({bare:.1f} -> {wrapped:.1f})")
+    print(f"  SQL hooks:    {hooked_query - plain_query:7.1f} us/query ({plain_query:.1f} -> {hooked_query:.1f})")
+    print(f"  GET /clients/{{id}} end to end: {full:.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
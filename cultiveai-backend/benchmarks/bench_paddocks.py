@@ -0,0 +1,122 @@
+"""
+Benchmark da analise por piquete (propriedade com `paddocks`).
+
+Com o Earth Engine falso (fakes.py) esperando --gee-latency segundos por
+chamada, compara o que custava ter o resultado de cada piquete (uma
+analise completa por piquete, POST /analysis/) com uma analise da
+propriedade inteira no modo por piquete: chamadas ao Earth Engine e tempo.
+O Gemini falso responde na hora, para medir so o Earth Engine.
+
+Usa um SQLite temporario, ou o banco de DATABASE_URL.
+
+Uso:
+    python benchmarks/bench_paddocks.py [--gee-latency 0.3] [--paddocks 4 16 64]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, "benchmarks"))
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+# Every paddock is its own report, not the first one handed back again
+os.environ["ANALYSIS_COALESCE_SECONDS"] = "0"
+# One user makes all the requests
+os.environ["ANALYSIS_RATE_PER_MINUTE"] = "100000"
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import gee_service
+from fakes import install
+from init_db import init_db
+
+API = "/api/v1"
+
+
+def square(west: float, south: float, size: float) -> dict:
+    ring = [[west, south], [west + size, south], [west + size, south + size], [west, south + size], [west, south]]
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def feature_collection(features: list) -> dict:
+    return {"type": "FeatureCollection", "features": features}
+
+
+def paddocks(count: int, west: float, south: float) -> list:
+    """A count-paddock grid inside a 0.05 degree property."""
+    side = int(count ** 0.5 + 0.999)
+    size = 0.05 / side
+    return [
+        {"type": "Feature", "properties": {"name": f"Piquete {i + 1}"},
+         "geometry": square(west + (i % side) * size, south + (i // side) * size, size)}
+        for i in range(count)
+    ]
+
+
+class CountingLatency:
+    """Wraps the fake Earth Engine's latency to count its round trips."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def wait(self) -> None:
+        self.calls += 1
+        self.latency.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gee-latency", type=float, default=0.3)
+    parser.add_argument("--paddocks", type=int, nargs="+", default=[4, 16, 64])
+    args = parser.parse_args()
+
+    init_db()
+    install(gee_latency=args.gee_latency)
+    latency = CountingLatency(gee_service.ee.latency)
+    gee_service.ee.latency = latency
+
+    client = TestClient(app)
+    client.post(f"{API}/auth/register", json={"email": "bench@example.com", "password": "bench-password"})
+    token = client.post(f"{API}/auth/login", data={
+        "username": "bench@example.com", "password": "bench-password"
+    }).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    client_id = client.post(f"{API}/clients/", json={
+        "name": "Bench", "email": "owner@example.com"
+    }, headers=headers).json()["id"]
+
+    print(f"{'paddocks':>8} {'':>24} {'EE calls':>9} {'seconds':>8}")
+    for n, count in enumerate(args.paddocks):
+        west, south = -49.3 + n * 0.1, -16.7
+        grid = paddocks(count, west, south)
+        boundary = feature_collection([{"type": "Feature", "properties": {}, "geometry": square(west, south, 0.05)}])
+        r = client.post(f"{API}/properties/", json={
+            "name": f"Fazenda {count}", "client_id": client_id, "geojson_boundary": boundary,
+            "paddocks": feature_collection(grid),
+        }, headers=headers)
+        r.raise_for_status()
+        property_id = r.json()["id"]
+
+        for label in ("one analysis per paddock", "one zonal analysis"):
+            start_calls = latency.calls
+            start = time.perf_counter()
+            if label == "one analysis per paddock":
+                for feature in grid:
+                    client.post(f"{API}/analysis/", json=feature_collection([feature]), headers=headers).raise_for_status()
+            else:
+                r = client.post(f"{API}/analysis/", json={**boundary, "property_id": property_id}, headers=headers)
+                r.raise_for_status()
+                assert len(r.json()["paddock_summary"]) == count
+            elapsed = time.perf_counter() - start
+            print(f"{count:>8} {label:>24} {latency.calls - start_calls:>9} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
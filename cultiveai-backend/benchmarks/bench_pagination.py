@@ -0,0 +1,99 @@
+"""
+Benchmark de paginacao: OFFSET/LIMIT vs. cursor (keyset).
+
+Popula um banco SQLite temporario com 100k clientes sinteticos e mede a
+latencia por pagina em profundidades crescentes. Com cursor a latencia deve
+permanecer estavel; com OFFSET ela cresce com a profundidade.
+
+Uso:
+    python benchmarks/bench_pagination.py [--rows 100000] [--page-size 50]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, Index, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app import models
+from app.crud import crud_client
+
+
+def seed(db, rows: int) -> int:
+    user = models.User(email="bench@cultiveai.local", hashed_password="x")
+    db.add(user)
+    db.flush()
+    batch = []
+    for i in range(rows):
+        batch.append({"name": f"Cliente {i:07d}", "city": "Goiania", "state": "GO", "owner_id": user.id})
+        if len(batch) == 10000:
+            db.execute(models.Client.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.execute(models.Client.__table__.insert(), batch)
+    db.commit()
+    return user.id
+
+
+def time_it(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    Index("ix_bench_clients_owner_name", models.Client.owner_id, models.Client.name, models.Client.id).create(engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+
+    print(f"Seeding {args.rows} clients...")
+    owner_id = seed(db, args.rows)
+    db.close()
+
+    adb = async_sessionmaker(bind=create_async_engine(f"sqlite+aiosqlite:///{path}"))()
+    run = asyncio.new_event_loop().run_until_complete
+
+    # Walk the cursor chain once, remembering the cursor at each sampled depth.
+    depths = [0, args.rows // 10, args.rows // 4, args.rows // 2, args.rows - args.page_size]
+    cursors = {}
+    cursor, offset = None, 0
+    while offset <= depths[-1]:
+        if offset in depths:
+            cursors[offset] = cursor
+        _, _, cursor = run(crud_client.get_clients(adb, owner_id=owner_id, limit=args.page_size, cursor=cursor))
+        offset += args.page_size
+    depths = [d for d in depths if d in cursors]
+
+    print(f"{'depth':>10} {'offset (ms)':>12} {'cursor (ms)':>12}")
+    for depth in depths:
+        offset_ms = time_it(lambda: run(adb.scalars(select(models.Client).where(
+            models.Client.owner_id == owner_id
+        ).order_by(models.Client.name, models.Client.id).offset(depth).limit(args.page_size))).all())
+        cursor_ms = time_it(lambda: run(crud_client.get_clients(
+            adb, owner_id=owner_id, limit=args.page_size, cursor=cursors[depth]
+        )))
+        print(f"{depth:>10} {offset_ms:>12.2f} {cursor_ms:>12.2f}")
+
+    run(adb.close())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark do mapa de propriedades (GET /properties/map).
+
+Popula um usuario com cada vez mais propriedades (poligonos irregulares de
+--vertices vertices espalhados por Goias, com as simplificacoes gravadas
+como a API grava) e, a cada etapa, pede o mapa de uma tela de 1280x800
+pixels em algumas zooms. Reporta feicoes, bytes e tempo de cada resposta,
+e os bytes que a listagem com contornos completos (GET /properties/ com
+boundary=true) mandaria para desenhar as mesmas propriedades. Nas zooms
+de estado o mapa fica quase constante enquanto o numero de propriedades
+cresce (viram pontos agrupados); nas de regiao cresce so com o que esta na
+tela, com contornos simplificados.
+
+Usa um SQLite temporario, ou o banco de DATABASE_URL.
+
+Uso:
+    python benchmarks/bench_property_map.py [--rows 1000,4000,16000] [--vertices 200]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+from fastapi.testclient import TestClient
+
+from app import models
+from app.crud.crud_geometry import geometry_hash
+from app.db.session import SessionLocal
+from app.main import app
+from app.services import geometry_service
+from init_db import init_db
+
+API = "/api/v1"
+CENTER = (-50.0, -16.5)
+SCREEN = (1280, 800)
+ZOOMS = (6, 9, 12, 15)
+
+
+def polygon(rng: random.Random, vertices: int) -> dict:
+    lon, lat = rng.uniform(-53, -47), rng.uniform(-19, -14)
+    radius = rng.uniform(0.005, 0.03)
+    ring = []
+    for k in range(vertices):
+        angle = 2 * math.pi * k / vertices
+        r = radius * (0.8 + 0.2 * math.sin(7 * angle) + rng.uniform(-0.02, 0.02))
+        ring.append([lon + r * math.cos(angle), lat + r * math.sin(angle)])
+    ring.append(ring[0])
+    return {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+    ]}
+
+
+def add_properties(client_id: int, count: int, vertices: int, rng: random.Random, start: int) -> None:
+    """Insert properties as crud_property does: boundary attributes and map simplifications included."""
+    db = SessionLocal()
+    for i in range(count):
+        geojson = polygon(rng, vertices)
+        geom = geometry_service.to_shape(geojson)
+        geometry = models.Geometry(hash=geometry_hash(geojson), geojson=geojson)
+        db.add(models.Property(
+            name=f"Fazenda {start + i}", client_id=client_id, boundary_geometry=geometry,
+            **geometry_service.boundary_attributes(geom),
+        ))
+        db.flush()
+        db.add_all(
+            models.GeometrySimplification(geometry_id=geometry.id, zoom=zoom, geojson=simplified)
+            for zoom, simplified in geometry_service.simplifications(geom).items()
+        )
+    db.commit()
+    db.close()
+
+
+def view(zoom: int) -> str:
+    width = SCREEN[0] * geometry_service.pixel_degrees(zoom)
+    height = SCREEN[1] * geometry_service.pixel_degrees(zoom)
+    lon, lat = CENTER
+    return f"{lon - width / 2},{lat - height / 2},{lon + width / 2},{lat + height / 2}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="1000,4000,16000")
+    parser.add_argument("--vertices", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    init_db()
+    client = TestClient(app)
+    client.post(f"{API}/auth/register", json={"email": "bench@example.com", "password": "bench-password"})
+    token = client.post(f"{API}/auth/login", data={
+        "username": "bench@example.com", "password": "bench-password"
+    }).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": "identity"}
+    client_id = client.post(f"{API}/clients/", json={"name": "Cliente"}, headers=headers).json()["id"]
+
+    rng = random.Random(42)
+    total = 0
+    print(f"{'properties':>10} {'zoom':>5} {'features':>9} {'bytes':>10} {'ms':>8} {'full boundaries':>16}")
+    for rows in (int(n) for n in args.rows.split(",")):
+        add_properties(client_id, rows - total, args.vertices, rng, total)
+        total = rows
+        for zoom in ZOOMS:
+            bbox = view(zoom)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                r = client.get(f"{API}/properties/map", params={"bbox": bbox, "zoom": zoom}, headers=headers)
+            ms = (time.perf_counter() - start) / args.repeat * 1000
+            features = r.json()["features"]
+            # What loading the same properties with their saved boundaries would send
+            in_view = sum(f["properties"].get("count", 1) for f in features)
+            page = client.get(f"{API}/properties/", params={"limit": 100, "boundary": True}, headers=headers)
+            full = len(page.content) / len(page.json()["items"]) * in_view
+            print(f"{total:>10} {zoom:>5} {len(features):>9} {len(r.content):>10} {ms:>8.1f} {full:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
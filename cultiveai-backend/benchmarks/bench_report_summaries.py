@@ -0,0 +1,122 @@
+"""
+Benchmark da listagem de relatorios: resposta completa vs. resumo.
+
+Popula um banco SQLite temporario com relatorios de tamanho realista
+(GeoJSON com muitos vertices, descricao da IA em markdown, URLs de camadas)
+e compara tempo de consulta + serializacao e bytes da resposta entre
+List[AnalysisResponse] e Page[AnalysisSummary].
+
+Uso:
+    python benchmarks/bench_report_summaries.py [--reports 100] [--vertices 2000]
+"""
+import argparse
+import asyncio
+import math
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from typing import List
+
+from app.db.base import Base
+from app import models, schemas
+from app.crud import crud_analysis
+from app.crud.crud_geometry import geometry_hash
+
+
+def synthetic_polygon(vertices: int) -> dict:
+    ring = [
+        [-49.0 + 0.05 * math.cos(2 * math.pi * i / vertices), -16.0 + 0.05 * math.sin(2 * math.pi * i / vertices)]
+        for i in range(vertices)
+    ]
+    ring.append(ring[0])
+    return {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+    ]}
+
+
+def seed(db, reports: int, vertices: int) -> int:
+    user = models.User(email="bench@cultiveai.local", hashed_password="x")
+    db.add(user)
+    db.flush()
+    aoi = synthetic_polygon(vertices)
+    geometry = models.Geometry(hash=geometry_hash(aoi), geojson=aoi)
+    description = "## Relatório Técnico\n\n" + ("- **Pastagem Boa:** 42.0% (~12.3 ha)\n" * 120)
+    layers = {f"{name}_url": f"https://earthengine.googleapis.com/v1/projects/p/maps/{'a' * 64}/tiles/{{z}}/{{x}}/{{y}}"
+              for name in ("rgb", "degradation", "ndvi", "ndmi", "savi", "slope", "mapbiomas")}
+    for i in range(reports):
+        db.add(models.AnalysisReport(
+            owner_id=user.id, title=f"Analise {i}", aoi_geometry=geometry, aoi_area_hectares=350.5,
+            analysis_period={"start_date": "2026-04-01", "end_date": "2026-10-01"},
+            satellite_image_info={"id": "20260915T133231_20260915T133228_T22KFG", "cloud_percentage": 3.2},
+            ndvi_stats={"min": 0.05, "mean": 0.52, "max": 0.87},
+            degradation_summary=[
+                {"class_name": "Pastagem Boa", "percentage": 55.0, "area_hectares": 192.8},
+                {"class_name": "Pastagem Estressada", "percentage": 30.0, "area_hectares": 105.2},
+                {"class_name": "Degradação Moderada", "percentage": 15.0, "area_hectares": 52.5},
+            ],
+            ai_description=description, map_layers_urls=layers, report_html="<html>" + "x" * 50000 + "</html>",
+        ))
+    db.commit()
+    return user.id
+
+
+def measure(fn, repeat: int = 10):
+    best, payload = float("inf"), b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reports", type=int, default=100)
+    parser.add_argument("--vertices", type=int, default=2000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    owner_id = seed(db, args.reports, args.vertices)
+    db.close()
+
+    adb = async_sessionmaker(bind=create_async_engine(f"sqlite+aiosqlite:///{path}"))()
+    run = asyncio.new_event_loop().run_until_complete
+
+    full_adapter = TypeAdapter(List[schemas.AnalysisResponse])
+    summary_adapter = TypeAdapter(schemas.Page[schemas.AnalysisSummary])
+
+    def full_listing():
+        adb.expunge_all()
+        reports = run(adb.scalars(select(models.AnalysisReport).where(
+            models.AnalysisReport.owner_id == owner_id
+        ).order_by(models.AnalysisReport.created_at.desc()).limit(args.reports))).all()
+        return full_adapter.dump_json(full_adapter.validate_python(reports, from_attributes=True))
+
+    def summary_listing():
+        items, total, next_cursor = run(crud_analysis.get_user_report_summaries(adb, user_id=owner_id, limit=args.reports))
+        page = summary_adapter.validate_python({"items": items, "total": total, "next_cursor": next_cursor})
+        return summary_adapter.dump_json(page)
+
+    full_ms, full_bytes = measure(full_listing)
+    summary_ms, summary_bytes = measure(summary_listing)
+
+    print(f"{'listing':>10} {'time (ms)':>10} {'bytes':>12}")
+    print(f"{'full':>10} {full_ms:>10.2f} {full_bytes:>12}")
+    print(f"{'summary':>10} {summary_ms:>10.2f} {summary_bytes:>12}")
+    print(f"reduction: time {100 * (1 - summary_ms / full_ms):.1f}%, bytes {100 * (1 - summary_bytes / full_bytes):.1f}%")
+    run(adb.close())
+
+
+if __name__ == "__main__":
+    main()
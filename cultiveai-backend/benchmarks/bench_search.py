@@ -0,0 +1,107 @@
+"""
+Benchmark da busca de clientes: ILIKE '%termo%' vs. indice FTS5.
+
+Popula um banco SQLite temporario com 100k clientes (nomes acentuados,
+CPF e telefone formatados) e mede a latencia de buscas tipicas com o
+indice de busca e com o filtro ILIKE antigo.
+
+Uso:
+    python benchmarks/bench_search.py [--rows 100000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.search_index import install_search_index
+from app import models
+from app.crud import crud_client
+
+FIRST = ["João", "José", "Maria", "Antônio", "Conceição", "Sebastião", "Luís", "Inês", "Otávio", "Lúcia"]
+LAST = ["Gonçalves", "Araújo", "Simões", "Magalhães", "Brandão", "Lemos", "Pereira", "Assunção", "Romão", "Sá"]
+CITIES = ["São José", "Goiânia", "Anápolis", "Jataí", "Rio Verde", "Uruaçu", "Itumbiara", "Catalão"]
+QUERIES = ["Sao Jose", "conceicao araujo", "goiania", "jatai", "52998", "(62) 9812", "sebastiao sa"]
+
+
+def seed(db, rows: int) -> int:
+    rng = random.Random(42)
+    user = models.User(email="bench@cultiveai.local", hashed_password="x")
+    db.add(user)
+    db.flush()
+    batch = []
+    for i in range(rows):
+        cpf = f"{rng.randrange(10**11):011d}"
+        batch.append({
+            "name": f"{rng.choice(FIRST)} {rng.choice(LAST)} {i}",
+            "document": f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}",
+            "phone": f"(62) 9{rng.randrange(10**8):08d}",
+            "city": rng.choice(CITIES),
+            "owner_id": user.id,
+        })
+        if len(batch) == 10000:
+            db.execute(models.Client.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.execute(models.Client.__table__.insert(), batch)
+    db.commit()
+    return user.id
+
+
+def time_it(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    install_search_index(engine)
+    db = sessionmaker(bind=engine)()
+
+    print(f"Seeding {args.rows} clients...")
+    owner_id = seed(db, args.rows)
+    db.close()
+
+    adb = async_sessionmaker(bind=create_async_engine(f"sqlite+aiosqlite:///{path}"))()
+    run = asyncio.new_event_loop().run_until_complete
+
+    print(f"{'query':>20} {'hits':>7} {'ilike (ms)':>11} {'index (ms)':>11}")
+    for term in QUERIES:
+        pattern = f"%{term}%"
+
+        def ilike():
+            return run(adb.scalars(select(models.Client).where(
+                models.Client.owner_id == owner_id,
+                (models.Client.name.ilike(pattern)) | (models.Client.document.ilike(pattern)) |
+                (models.Client.email.ilike(pattern)) | (models.Client.city.ilike(pattern))
+            ).order_by(models.Client.name).limit(50))).all()
+
+        _, total, _ = run(crud_client.get_clients(adb, owner_id=owner_id, limit=50, search=term))
+        ilike_ms = time_it(ilike)
+        index_ms = time_it(lambda: run(crud_client.get_clients(adb, owner_id=owner_id, limit=50, search=term)))
+        print(f"{term:>20} {total:>7} {ilike_ms:>11.2f} {index_ms:>11.2f}")
+
+    run(adb.close())
+
+
+if __name__ == "__main__":
+    main()
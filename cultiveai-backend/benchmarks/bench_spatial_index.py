@@ -0,0 +1,154 @@
+"""
+Benchmark da busca de propriedades que intersectam uma AOI.
+
+Popula um banco SQLite temporario com 50k propriedades (poligonos
+irregulares espalhados por Goias) e compara o indice espacial (STR-tree
+sobre os bbox_* armazenados) com o laco Python que carrega e testa todos
+os contornos.
+
+Uso:
+    python benchmarks/bench_spatial_index.py [--rows 50000]
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+import shapely
+
+from app.db.base import Base
+from app.crud.crud_geometry import geometry_hash
+from app import models
+from app.services import geometry_service
+from app.services.spatial_index import PropertySpatialIndex
+
+
+def insert_properties(db, rows: list) -> None:
+    """Core INSERT of property dicts carrying a "geojson_boundary" (one geometry each)."""
+    geometry_ids = db.execute(
+        models.Geometry.__table__.insert().returning(models.Geometry.id, sort_by_parameter_order=True),
+        [{"hash": geometry_hash(row["geojson_boundary"]), "geojson": row["geojson_boundary"]} for row in rows],
+    ).scalars().all()
+    db.execute(models.Property.__table__.insert(), [
+        {**{k: v for k, v in row.items() if k != "geojson_boundary"}, "boundary_geometry_id": geometry_id}
+        for row, geometry_id in zip(rows, geometry_ids)
+    ])
+
+
+def polygon(rng: random.Random, lon: float, lat: float, radius: float) -> dict:
+    points = []
+    for k in range(12):
+        angle = 2 * math.pi * k / 12
+        r = radius * rng.uniform(0.6, 1.0)
+        points.append([lon + r * math.cos(angle), lat + r * math.sin(angle)])
+    points.append(points[0])
+    return {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {}, "geometry": {"type": "Polygon", "coordinates": [points]}}
+    ]}
+
+
+def seed(db, rows: int) -> int:
+    rng = random.Random(42)
+    user = models.User(email="bench@cultiveai.local", hashed_password="x")
+    db.add(user)
+    db.flush()
+    client = models.Client(name="Cliente", owner_id=user.id)
+    db.add(client)
+    db.flush()
+    batch = []
+    for i in range(rows):
+        boundary = polygon(rng, rng.uniform(-53, -46), rng.uniform(-19, -13), rng.uniform(0.005, 0.03))
+        bounds = geometry_service.bbox(boundary)
+        batch.append({
+            "name": f"Fazenda {i}", "client_id": client.id, "geojson_boundary": boundary,
+            "bbox_min_lon": bounds[0], "bbox_min_lat": bounds[1],
+            "bbox_max_lon": bounds[2], "bbox_max_lat": bounds[3],
+        })
+        if len(batch) == 5000:
+            insert_properties(db, batch)
+            batch = []
+    if batch:
+        insert_properties(db, batch)
+    db.commit()
+    return user.id
+
+
+async def python_loop(db, owner_id: int, geom):
+    properties = (await db.scalars(
+        select(models.Property).join(models.Client).where(models.Client.owner_id == owner_id)
+    )).all()
+    matches = []
+    for prop in properties:
+        boundary = geometry_service.to_shape(prop.geojson_boundary)
+        if boundary is not None and boundary.intersects(geom):
+            matches.append((prop, geometry_service.overlap_ratio(geom, boundary)))
+    return sorted(matches, key=lambda match: match[1], reverse=True)
+
+
+def time_it(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    print(f"Seeding {args.rows} properties...")
+    owner_id = seed(db, args.rows)
+    adb = async_sessionmaker(bind=create_async_engine(f"sqlite+aiosqlite:///{path}"))()
+    run = asyncio.new_event_loop().run_until_complete
+    index = PropertySpatialIndex()
+
+    start = time.perf_counter()
+    run(index.refresh(adb, owner_id))
+    print(f"Initial STR-tree build: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    aois = [
+        ("small AOI", shapely.box(-50.0, -16.0, -49.98, -15.98)),
+        ("medium AOI", shapely.box(-50.0, -16.0, -49.9, -15.9)),
+        ("large AOI", shapely.box(-50.0, -16.0, -49.5, -15.5)),
+    ]
+    print(f"{'aoi':>12} {'hits':>6} {'loop (ms)':>10} {'index (ms)':>11}")
+    for label, geom in aois:
+        hits = len(run(index.find_intersecting(adb, owner_id, geom)))
+        loop_ms = time_it(lambda: run(python_loop(adb, owner_id, geom)), repeat=1)
+        index_ms = time_it(lambda: run(index.find_intersecting(adb, owner_id, geom)))
+        print(f"{label:>12} {hits:>6} {loop_ms:>10.1f} {index_ms:>11.2f}")
+
+    # Incremental refresh after a single insert
+    db.execute(models.Property.__table__.insert(), [{
+        "name": "Nova", "client_id": 1, "bbox_min_lon": -50.0, "bbox_min_lat": -16.0,
+        "bbox_max_lon": -49.99, "bbox_max_lat": -15.99,
+    }])
+    db.commit()
+    index.mark_dirty(owner_id)
+    start = time.perf_counter()
+    run(index.refresh(adb, owner_id))
+    print(f"Incremental refresh after one insert: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    db.close()
+    run(adb.close())
+
+
+if __name__ == "__main__":
+    main()
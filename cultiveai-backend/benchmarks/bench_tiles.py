@@ -0,0 +1,178 @@
+"""
+Benchmark do proxy de tiles (/tiles, app/services/tile_cache.py).
+
+Sobe um servidor de tiles falso (fake_tiles.py) numa thread, cria um
+relatorio com o Earth Engine falso apontando para ele e mede:
+
+1. pre-carga: os tiles das zooms --seed-zooms buscados logo apos a analise
+   ja saem do disco;
+2. frio x quente: --tiles tiles de outras zooms, primeiro do servidor de
+   tiles e depois do cache;
+3. renovacao: passado o --ttl do token do mapa, um tile novo ainda e
+   servido (o proxy gera outro map ID e o salva no relatorio);
+4. remocao: com o cache limitado a --cache-mb, buscar mais tiles que isso
+   mantem o diretorio abaixo do limite, sem os tiles mais antigos.
+
+Termina com codigo 1 se alguma dessas verificacoes falhar. Usa um SQLite
+e um diretorio de cache temporarios, ou o banco de DATABASE_URL.
+
+Uso:
+    python benchmarks/bench_tiles.py [--tiles 60] [--tile-latency 0.05] [--ttl 2] [--cache-mb 8]
+"""
+import argparse
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, "benchmarks"))
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+os.environ["TILE_CACHE_DIR"] = tempfile.mkdtemp()
+
+import uvicorn
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import tile_cache
+from fake_tiles import create_app
+from fakes import install
+from init_db import init_db
+
+API = "/api/v1"
+
+
+def aoi(degrees: float) -> dict:
+    west, south = -49.3, -16.7
+    ring = [[west, south], [west + degrees, south], [west + degrees, south + degrees], [west, south + degrees],
+            [west, south]]
+    return {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+    ]}
+
+
+def start_tile_server(ttl: float, latency: float):
+    """(base URL, app) of a fake_tiles server running in a thread."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    tiles_app = create_app(ttl, latency)
+    server = uvicorn.Server(uvicorn.Config(tiles_app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}", tiles_app
+
+
+def cache_files() -> dict:
+    """Path -> size of the cached tiles."""
+    files = {}
+    for root, _, names in os.walk(tile_cache.TILE_CACHE_DIR):
+        for name in names:
+            if name.endswith(".png"):
+                path = os.path.join(root, name)
+                files[path] = os.path.getsize(path)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tiles", type=int, default=60)
+    parser.add_argument("--tile-latency", type=float, default=0.05)
+    parser.add_argument("--ttl", type=float, default=2.0)
+    parser.add_argument("--cache-mb", type=float, default=8)
+    parser.add_argument("--seed-zooms", default="13-14")
+    parser.add_argument("--aoi-degrees", type=float, default=0.05)
+    args = parser.parse_args()
+
+    tile_cache.TILE_CACHE_MAX_BYTES = int(args.cache_mb * 1024 * 1024)
+    tile_cache.TILE_SEED_ZOOMS = args.seed_zooms
+    tile_cache.TILE_SEED_LAYERS = ["ndvi"]
+    # Map tokens last hours in Earth Engine, seconds here
+    tile_cache.REFRESH_INTERVAL = args.ttl / 2
+    server_url, tiles_app = start_tile_server(args.ttl, args.tile_latency)
+    stats = tiles_app.state.stats
+
+    init_db()
+    install(tile_server=server_url)
+    failures = []
+    area = aoi(args.aoi_degrees)
+    with TestClient(app) as client:
+        client.post(f"{API}/auth/register", json={"email": "bench@example.com", "password": "bench-password"})
+        token = client.post(f"{API}/auth/login", data={
+            "username": "bench@example.com", "password": "bench-password"
+        }).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        # The response returns after the background pre-seed has run
+        start = time.perf_counter()
+        report = client.post(f"{API}/analysis/", json=area, headers=headers).json()
+        seeded = len(cache_files())
+        print(f"analysis + pre-seed ({args.seed_zooms}): {time.perf_counter() - start:.2f} s, {seeded} tiles cached")
+        urls = report["tile_urls"]
+
+        def fetch(layer_key: str, tiles) -> float:
+            """Mean ms per tile; records failures."""
+            start = time.perf_counter()
+            for z, x, y in tiles:
+                r = client.get(API + urls[layer_key].format(z=z, x=x, y=y))
+                if r.status_code != 200 or not r.content.startswith(b"\x89PNG"):
+                    failures.append(f"{layer_key} {z}/{x}/{y}: HTTP {r.status_code} {r.text[:100]}")
+            return (time.perf_counter() - start) / max(len(tiles), 1) * 1000
+
+        seeded_tiles = tile_cache.tiles_covering(area, tile_cache.parse_zooms(args.seed_zooms), args.tiles)
+        served = stats["served"]
+        ms = fetch("ndvi_url", seeded_tiles)
+        print(f"{'pre-seeded':>12}: {len(seeded_tiles):>4} tiles {ms:>8.2f} ms/tile, "
+              f"{stats['served'] - served} from the tile server")
+        if seeded and stats["served"] != served:
+            failures.append("pre-seeded tiles were fetched again")
+
+        tiles = tile_cache.tiles_covering(area, [15, 16, 17], args.tiles)
+        for label in ("cold", "warm"):
+            served = stats["served"]
+            ms = fetch("ndvi_url", tiles)
+            upstream = stats["served"] - served
+            print(f"{label:>12}: {len(tiles):>4} tiles {ms:>8.2f} ms/tile, {upstream} from the tile server")
+            if label == "warm" and upstream:
+                failures.append(f"{upstream} warm tiles were fetched again")
+
+        time.sleep(args.ttl + 0.5)
+        expired = stats["expired"]
+        before = report["map_layers_urls"]["ndvi_url"]
+        ms = fetch("ndvi_url", tile_cache.tiles_covering(area, [18], 4))
+        after = client.get(f"{API}/analysis/{report['id']}", headers=headers).json()["map_layers_urls"]["ndvi_url"]
+        print(f"{'refresh':>12}: {ms:>8.2f} ms/tile after the map token expired "
+              f"({stats['expired'] - expired} refused by the tile server)")
+        if stats["expired"] == expired or after == before:
+            failures.append("expired map ID was not replaced")
+
+        # The least recently used tiles, after the warm pass
+        oldest = [tile_cache._tile_path(report["id"], "ndvi", z, x, y) for z, x, y in seeded_tiles]
+        tile_bytes = max(cache_files().values())
+        count = int(tile_cache.TILE_CACHE_MAX_BYTES / tile_bytes * 1.5)
+        newest = tile_cache.tiles_covering(area, [18, 19], count)
+        fetch("savi_url", newest)
+        files = cache_files()
+        size = sum(files.values())
+        print(f"{'eviction':>12}: {len(newest)} more tiles, cache {size / 1024 / 1024:.1f} MB "
+              f"of {args.cache_mb} MB, {len(files)} files")
+        if size > tile_cache.TILE_CACHE_MAX_BYTES:
+            failures.append(f"cache holds {size} bytes, over the cap")
+        if any(path in files for path in oldest):
+            failures.append("least recently used tiles were kept")
+        z, x, y = newest[-1]
+        if tile_cache._tile_path(report["id"], "savi", z, x, y) not in files:
+            failures.append("the most recent tile was evicted")
+
+    if failures:
+        print("\n".join(["", *failures[:10]]))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
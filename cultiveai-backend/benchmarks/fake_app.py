@@ -0,0 +1,22 @@
+"""
+A aplicacao com o Earth Engine e o Gemini trocados pelos substitutos de
+fakes.py, para benchmarks de ponta a ponta sem rede nem cotas.
+
+Latencias (segundos por chamada) vem do ambiente: BENCH_GEE_LATENCY,
+BENCH_GEMINI_LATENCY, BENCH_LATENCY_JITTER (fracao) e
+BENCH_GEMINI_QUOTA_EVERY (a cada N chamadas o Gemini responde 429).
+BENCH_TILE_SERVER aponta as camadas do mapa para um fake_tiles.py.
+
+Uso:
+    BENCH_GEE_LATENCY=0.2 BENCH_GEMINI_LATENCY=2 uvicorn fake_app:app --app-dir benchmarks --port 8000
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import install_from_env
+
+from app.main import app
+
+install_from_env()
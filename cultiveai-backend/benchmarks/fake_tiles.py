@@ -0,0 +1,66 @@
+"""
+Servidor de tiles que imita o do Earth Engine, para exercitar o proxy de
+tiles (app/services/tile_cache.py) sem rede.
+
+Atende /v1/projects/earthengine-legacy/maps/{map_id}/tiles/{z}/{x}/{y}
+com um PNG 256x256 em tons de cinza que depende so do map_id e do tile
+(ruido, entao do tamanho de um tile real, ~64 KB). Os map_id gerados por
+fakes.py levam o instante em que foram emitidos: passados BENCH_TILE_TTL
+segundos o servidor responde 404, como o Earth Engine faz com um token de
+mapa vencido. BENCH_TILE_LATENCY (segundos) atrasa cada resposta, e
+GET /stats conta os tiles servidos e os recusados.
+
+Uso:
+    BENCH_TILE_TTL=3600 uvicorn fake_tiles:app --app-dir benchmarks --port 8001
+    BENCH_TILE_SERVER=http://127.0.0.1:8001 uvicorn fake_app:app --app-dir benchmarks --port 8000
+"""
+import asyncio
+import os
+import random
+import struct
+import time
+import zlib
+
+from fastapi import FastAPI, HTTPException, Response
+
+TILE_SIZE = 256
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def png(seed: str) -> bytes:
+    rng = random.Random(seed)
+    # Each row starts with its filter type (0: none)
+    raw = b"".join(b"\x00" + rng.randbytes(TILE_SIZE) for _ in range(TILE_SIZE))
+    header = struct.pack(">IIBBBBB", TILE_SIZE, TILE_SIZE, 8, 0, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + _chunk(b"IHDR", header) + _chunk(b"IDAT", zlib.compress(raw, 1)) + _chunk(b"IEND", b"")
+
+
+def create_app(ttl: float, latency: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    app.state.stats = {"served": 0, "expired": 0}
+
+    @app.get("/v1/projects/earthengine-legacy/maps/{map_id}/tiles/{z}/{x}/{y}")
+    async def tile(map_id: str, z: int, x: int, y: int):
+        if latency:
+            await asyncio.sleep(latency)
+        _, _, issued_ms = map_id.rpartition("-")
+        if not issued_ms.isdigit() or time.time() - int(issued_ms) / 1000 > ttl:
+            app.state.stats["expired"] += 1
+            raise HTTPException(status_code=404, detail="Map not found")
+        app.state.stats["served"] += 1
+        return Response(png(f"{map_id.partition('-')[0]}/{z}/{x}/{y}"), media_type="image/png")
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.stats
+
+    return app
+
+
+app = create_app(
+    ttl=float(os.getenv("BENCH_TILE_TTL", "3600")),
+    latency=float(os.getenv("BENCH_TILE_LATENCY", "0")),
+)
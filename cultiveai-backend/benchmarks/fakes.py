@@ -0,0 +1,348 @@
+"""
+Substitutos deterministicos do Earth Engine e do Gemini para benchmarks.
+
+FakeEarthEngine imita a parte da API `ee` que gee_service usa (colecoes,
+imagens, redutores, dicionarios, reduceRegions por piquete, getInfo,
+getMapId, getThumbURL) e FakeGenerativeModel
+imita o generate_content do Gemini. Cada chamada que no servico real vai
+a rede (getInfo, getMapId, getThumbURL, generate_content) espera a
+latencia configurada, com uma variacao opcional tirada de um gerador com
+semente fixa. Os valores devolvidos dependem so da AOI e do prompt, entao
+a mesma entrada sempre gera o mesmo relatorio.
+
+Uso:
+    from fakes import install
+    install(gee_latency=0.2, gemini_latency=2.0)   # antes das requisicoes
+
+Ou, para um servidor uvicorn, as variaveis de ambiente lidas por
+install_from_env (veja fake_app.py). Com um servidor de tiles falso
+(fake_tiles.py), as URLs de tiles das camadas apontam para ele.
+"""
+import datetime
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+from app.services import ai_service, gee_service, geometry_service
+
+
+class Latency:
+    """Sleeps `seconds`, varied by up to +-`jitter` (a fraction) with a seeded generator."""
+
+    def __init__(self, seconds: float, jitter: float = 0.0, seed: int = 42):
+        self.seconds = seconds
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if self.seconds <= 0:
+            return
+        with self._lock:
+            factor = 1 + self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 1
+        time.sleep(self.seconds * factor)
+
+
+def _seed(value) -> int:
+    return int(hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:8], 16)
+
+
+def _resolve(value):
+    """The value of a computed object, or of the computed objects inside a dict or list."""
+    if isinstance(value, _Computed):
+        return value._value()
+    if isinstance(value, dict):
+        return {k: _resolve(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve(v) for v in value]
+    return value
+
+
+class _Computed:
+    """An ee.ComputedObject: nothing happens until getInfo()."""
+
+    def __init__(self, ee: "FakeEarthEngine", value):
+        self._ee = ee
+        self._value = value
+
+    def get(self, key):
+        return _Computed(self._ee, lambda: (self._value() or {}).get(key))
+
+    def format(self, pattern):
+        return _Computed(self._ee, lambda: self._value().strftime("%Y-%m-%d"))
+
+    def advance(self, delta, unit):
+        days = {"day": 1, "week": 7, "month": 30, "year": 365}[unit] * delta
+        return _Computed(self._ee, lambda: self._value() + datetime.timedelta(days=days))
+
+    def gt(self, value):
+        return _Computed(self._ee, lambda: self._value() > value)
+
+    def And(self, other):
+        return _Computed(self._ee, lambda: bool(self._value() and _resolve(other)))
+
+    def getInfo(self):
+        self._ee.latency.wait()
+        return self._value()
+
+
+class _Reducer:
+    def __init__(self, kind: str):
+        self.kind = kind
+
+    def combine(self, other, sharedInputs=False):
+        return _Reducer(f"{self.kind}+{other.kind}")
+
+    def group(self, groupField=1, groupName="group"):
+        return _Reducer(f"group:{groupName}")
+
+
+class _Geometry:
+    def __init__(self, ee: "FakeEarthEngine", geojson: dict):
+        self._ee = ee
+        self.geojson = geojson
+        self.seed = _seed(geojson)
+
+    def area(self, maxError=1):
+        geom = geometry_service.to_shape(self.geojson)
+        return _Computed(self._ee, lambda: geometry_service.geodesic_area_m2(geom) if geom is not None else 0.0)
+
+
+class _Image:
+    """Every band operation returns an image; only reductions and URLs produce values."""
+
+    def __init__(self, ee: "FakeEarthEngine", seed: int = 0, bands=("NDVI",)):
+        self._ee = ee
+        self.seed = seed
+        self.bands = list(bands)
+
+    def _same(self, *args, **kwargs):
+        return self
+
+    normalizedDifference = expression = select = where = gte = updateMask = clip = mask = _same
+    subtract = multiply = add = addBands = _same
+
+    def rename(self, name):
+        return _Image(self._ee, self.seed, [name])
+
+    def get(self, prop):
+        rng = random.Random(self.seed)
+        values = {
+            "system:index": f"20260101T133239_20260101T133237_T22KFG_{self.seed % 10000:04d}",
+            "CLOUDY_PIXEL_PERCENTAGE": rng.uniform(0, 20),
+        }
+        return _Computed(self._ee, lambda: values.get(prop))
+
+    def reduceRegion(self, reducer, geometry, scale=30, maxPixels=1e9):
+        rng = random.Random(geometry.seed)
+        if reducer.kind.startswith("group:"):
+            # Area per before/after class code, adding up to the AOI
+            area = _resolve(geometry.area())
+            codes = rng.sample([before * 10 + after for before in range(1, 6) for after in range(1, 6)], 8)
+            weights = [rng.random() for _ in codes]
+            groups = [{reducer.kind[len("group:"):]: code, "sum": area * w / sum(weights)} for code, w in zip(codes, weights)]
+            return _Computed(self._ee, lambda: {"groups": groups})
+        if reducer.kind == "frequencyHistogram":
+            weights = [rng.random() for _ in range(5)]
+            pixels = rng.randint(2000, 50000)
+            histogram = {f"{c}": round(pixels * w / sum(weights)) for c, w in zip(range(1, 6), weights)}
+            return _Computed(self._ee, lambda: {"classification": histogram})
+        stats = {}
+        for band in self.bands:
+            low, high = sorted(rng.uniform(-0.1, 0.9) for _ in range(2))
+            if band == "change":
+                low, high = low - 0.5, high - 0.5
+            stats.update({f"{band}_min": low, f"{band}_mean": rng.uniform(low, high), f"{band}_max": high})
+        return _Computed(self._ee, lambda: stats)
+
+    def reduceRegions(self, collection, reducer, scale=30):
+        def zones():
+            features = []
+            for feature in collection.geojson["features"]:
+                rng = random.Random(_seed(feature))
+                low, high = sorted(rng.uniform(-0.1, 0.9) for _ in range(2))
+                histogram = {f"{c}": rng.randint(0, 500) for c in range(1, 6)}
+                features.append({"type": "Feature", "geometry": None, "properties": {
+                    **feature["properties"], "min": low, "mean": rng.uniform(low, high), "max": high,
+                    "histogram": histogram,
+                }})
+            return {"type": "FeatureCollection", "features": features}
+        return _Zones(self._ee, zones)
+
+    def getMapId(self, vis_params):
+        self._ee.latency.wait()
+        map_id = f"projects/earthengine-legacy/maps/{self.seed:08x}"
+        server = "https://earthengine.googleapis.com"
+        if self._ee.tile_server:
+            # One map per layer, stamped with its issue time so fake_tiles.py can expire it
+            server = self._ee.tile_server
+            map_id = f"projects/earthengine-legacy/maps/{self.seed ^ _seed(vis_params):08x}-{int(time.time() * 1000)}"
+        return {"tile_fetcher": type("TileFetcher", (), {
+            "url_format": f"{server}/v1/{map_id}/tiles/{{z}}/{{x}}/{{y}}"
+        })()}
+
+    def getThumbURL(self, params):
+        self._ee.latency.wait()
+        return f"https://earthengine.googleapis.com/v1/thumbnails/{self.seed:08x}:getPixels"
+
+
+class _FeatureCollection:
+    def __init__(self, geojson: dict):
+        self.geojson = geojson
+
+
+class _Zones(_Computed):
+    """Result of reduceRegions: a feature collection, evaluated by getInfo()."""
+
+    def select(self, propertySelectors, newProperties=None, retainGeometry=True):
+        def selected():
+            collection = self._value()
+            return {**collection, "features": [
+                {**f, "properties": {k: v for k, v in f["properties"].items() if k in propertySelectors}}
+                for f in collection["features"]
+            ]}
+        return _Zones(self._ee, selected)
+
+
+class _ImageCollection:
+    def __init__(self, ee: "FakeEarthEngine"):
+        self._ee = ee
+        self._aoi: Optional[_Geometry] = None
+        self._dates = None
+
+    def filterBounds(self, aoi):
+        self._aoi = aoi
+        return self
+
+    def filterDate(self, start, end):
+        self._dates = (start, end)
+        return self
+
+    def filter(self, condition):
+        return self
+
+    def sort(self, prop):
+        return self
+
+    def size(self):
+        count = 1 + (self._aoi.seed if self._aoi else 0) % 30
+        return _Computed(self._ee, lambda: count)
+
+    def first(self):
+        return _Image(self._ee, self._aoi.seed if self._aoi else 0)
+
+    def median(self):
+        return _Image(self._ee, (self._aoi.seed if self._aoi else 0) ^ _seed(self._dates))
+
+
+class FakeEarthEngine:
+    """Stands in for the `ee` module inside gee_service."""
+
+    def __init__(self, latency: Latency, tile_server: Optional[str] = None):
+        self.latency = latency
+        self.tile_server = tile_server
+        fake = self
+        self.data = type("data", (), {"_credentials": True})
+        self.Filter = type("Filter", (), {"lt": staticmethod(lambda prop, value: (prop, value))})
+        self.Terrain = type("Terrain", (), {"slope": staticmethod(lambda dem: dem)})
+        self.Reducer = type("Reducer", (), {
+            "minMax": staticmethod(lambda: _Reducer("minMax")),
+            "mean": staticmethod(lambda: _Reducer("mean")),
+            "frequencyHistogram": staticmethod(lambda: _Reducer("frequencyHistogram")),
+            "sum": staticmethod(lambda: _Reducer("sum")),
+        })
+        self.Algorithms = type("Algorithms", (), {"If": staticmethod(
+            lambda condition, true_case, false_case: _Computed(
+                fake, lambda: _resolve(true_case) if _resolve(condition) else _resolve(false_case)
+            )
+        )})
+
+        class Image(_Image):
+            def __new__(cls, source=None):
+                return source if isinstance(source, _Image) else _Image(fake, _seed(source))
+
+            @staticmethod
+            def constant(value):
+                return _Image(fake, _seed(value))
+
+            @staticmethod
+            def cat(images):
+                return _Image(fake, _seed([image.seed for image in images]), [b for image in images for b in image.bands])
+
+            @staticmethod
+            def pixelArea():
+                return _Image(fake, 0, ["area"])
+
+        self.Image = Image
+
+    def Initialize(self, project=None):
+        pass
+
+    def Authenticate(self):
+        pass
+
+    def Geometry(self, geojson):
+        return _Geometry(self, geojson)
+
+    def Dictionary(self, values):
+        return _Computed(self, lambda: _resolve(values))
+
+    def Date(self, value):
+        # Truncated to the day, so reports of the same AOI match whatever the time
+        day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+        return _Computed(self, lambda: day)
+
+    def ImageCollection(self, collection_id):
+        return _ImageCollection(self)
+
+    def FeatureCollection(self, geojson):
+        return _FeatureCollection(geojson)
+
+
+class FakeGenerativeModel:
+    """Stands in for ai_service.model; every `quota_every`-th call fails like a 429."""
+
+    def __init__(self, latency: Latency, quota_every: int = 0, paragraphs: int = 6):
+        self.latency = latency
+        self.quota_every = quota_every
+        self.paragraphs = paragraphs
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str):
+        with self._lock:
+            self._calls += 1
+            calls = self._calls
+        self.latency.wait()
+        if self.quota_every and calls % self.quota_every == 0:
+            raise RuntimeError("429 Resource has been exhausted (e.g. check quota).")
+        rng = random.Random(_seed(prompt))
+        words = ["pastagem", "NDVI", "degradacao", "manejo", "lotacao", "adubacao", "solo", "forrageira"]
+        text = "\n\n".join(
+            f"### Secao {i + 1}\n" + " ".join(rng.choice(words) for _ in range(80)) for i in range(self.paragraphs)
+        )
+        return type("Response", (), {"text": text})()
+
+
+def install(gee_latency: float = 0.0, gemini_latency: float = 0.0, jitter: float = 0.0,
+            gemini_quota_every: int = 0, tile_server: Optional[str] = None) -> None:
+    """
+    Point gee_service and ai_service at the fakes (this process only).
+    With `tile_server` (a fake_tiles.py base URL) the map layers' tile URLs point there.
+    """
+    gee_service.ee = FakeEarthEngine(Latency(gee_latency, jitter, seed=1), tile_server)
+    ai_service.model = FakeGenerativeModel(Latency(gemini_latency, jitter, seed=2), gemini_quota_every)
+
+
+def install_from_env() -> None:
+    install(
+        gee_latency=float(os.getenv("BENCH_GEE_LATENCY", "0")),
+        gemini_latency=float(os.getenv("BENCH_GEMINI_LATENCY", "0")),
+        jitter=float(os.getenv("BENCH_LATENCY_JITTER", "0")),
+        gemini_quota_every=int(os.getenv("BENCH_GEMINI_QUOTA_EVERY", "0")),
+        tile_server=os.getenv("BENCH_TILE_SERVER") or None,
+    )
@@ -0,0 +1,158 @@
+"""
+Massa de dados sintetica para benchmarks de ponta a ponta.
+
+Cria usuarios (todos com a mesma senha, hash feito uma vez com o custo de
+BCRYPT_ROUNDS), clientes, propriedades com contorno e relatorios de
+analise distribuidos entre eles, com inserts em lote. Os relatorios saem
+dos substitutos de fakes.py (sem latencia), entao tem o mesmo formato dos
+criados por POST /analysis/; o HTML guardado e o de um relatorio
+renderizado uma vez. A mesma semente gera sempre os mesmos dados. Os
+resumos do dashboard sao recalculados pela aplicacao no primeiro acesso.
+
+O banco de DATABASE_URL e migrado com init_db antes; use um banco vazio.
+
+Uso:
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/seed.py [--users 1000] [--clients 4000] \\
+        [--properties 8000] [--reports 8000]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select
+
+from app import models
+from app.core.security import get_password_hash
+from app.crud.crud_geometry import geometry_hash
+from app.services import ai_service, gee_service, geometry_service, report_service
+
+import fakes
+
+PASSWORD = "bench-password"
+CITIES = [("Goiânia", "GO"), ("Rio Verde", "GO"), ("Jataí", "GO"), ("Uberlândia", "MG"), ("Campo Grande", "MS")]
+BATCH = 1000
+
+
+def email(user: int) -> str:
+    return f"bench{user}@example.com"
+
+
+def cpf(rng: random.Random) -> str:
+    """A random CPF with valid check digits (the response schema validates it)."""
+    digits = [rng.randrange(10) for _ in range(9)]
+    for length in (9, 10):
+        rest = sum(d * (length + 1 - i) for i, d in enumerate(digits)) * 10 % 11
+        digits.append(0 if rest == 10 else rest)
+    return "".join(map(str, digits))
+
+
+def boundary(rng: random.Random) -> dict:
+    """A small quadrilateral in the Brazilian Cerrado (tens to hundreds of hectares)."""
+    lon, lat = rng.uniform(-53, -47), rng.uniform(-19, -14)
+    w, h = rng.uniform(0.005, 0.02), rng.uniform(0.005, 0.02)
+    ring = [[lon, lat], [lon + w, lat], [lon + w * 1.1, lat + h], [lon - w * 0.1, lat + h], [lon, lat]]
+    return {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+    ]}
+
+
+def _insert(db, model, rows) -> None:
+    for start in range(0, len(rows), BATCH):
+        db.execute(insert(model), rows[start:start + BATCH])
+
+
+def seed(db, users: int, clients: int, properties: int, reports: int, seed: int = 42) -> None:
+    """Insert the dataset through the sync session `db` and commit."""
+    rng = random.Random(seed)
+    fakes.install()
+    hashed = get_password_hash(PASSWORD)
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    _insert(db, models.User, [
+        {"email": email(u), "hashed_password": hashed, "full_name": f"Usuario {u}", "is_active": 1}
+        for u in range(users)
+    ])
+    user_ids = list(db.scalars(select(models.User.id).order_by(models.User.id)))
+
+    client_rows = []
+    for c in range(clients):
+        city, state = rng.choice(CITIES)
+        client_rows.append({
+            "owner_id": user_ids[c % users], "name": f"Cliente {c:05d}", "city": city, "state": state,
+            "document": cpf(rng), "email": f"cliente{c}@example.com",
+        })
+    _insert(db, models.Client, client_rows)
+    client_owner = dict(db.execute(select(models.Client.id, models.Client.owner_id)).all())
+    client_ids = sorted(client_owner)
+
+    boundaries = [boundary(rng) for _ in range(properties)]
+    _insert(db, models.Geometry, [{"hash": geometry_hash(g), "geojson": g} for g in boundaries])
+    geometry_ids = dict(db.execute(select(models.Geometry.hash, models.Geometry.id)).all())
+    property_rows = []
+    for p, geojson in enumerate(boundaries):
+        city, state = rng.choice(CITIES)
+        attributes = geometry_service.boundary_attributes(geometry_service.to_shape(geojson))
+        property_rows.append({
+            "client_id": client_ids[p % clients], "name": f"Fazenda {p:05d}", "city": city, "state": state,
+            "boundary_geometry_id": geometry_ids[geometry_hash(geojson)],
+            "total_area_hectares": attributes["boundary_area_hectares"], **attributes,
+        })
+    _insert(db, models.Property, property_rows)
+    property_ids = list(db.scalars(select(models.Property.id).order_by(models.Property.id)))
+
+    # One rendered report stands for all: download re-renders from the stored data anyway
+    sample = gee_service.run_analysis(boundaries[0])
+    sample["ai_description"] = ai_service.generate_ai_description(
+        sample["ndvi_stats"], sample["pixel_counts_for_ai"], sample["aoi_area_hectares"] * 10000
+    )
+    report_html = report_service.generate_html_report(sample)
+
+    report_rows = []
+    for r in range(reports):
+        p = r % properties
+        data = gee_service.run_analysis(boundaries[p])
+        data.pop("thumbnail_urls")
+        pixel_counts = data.pop("pixel_counts_for_ai")
+        data.pop("aoi_geojson")
+        report_rows.append({
+            **data,
+            "owner_id": client_owner[client_ids[p % clients]],
+            "property_id": property_ids[p],
+            "aoi_geometry_id": geometry_ids[geometry_hash(boundaries[p])],
+            "ai_description": ai_service.generate_ai_description(
+                data["ndvi_stats"], pixel_counts, data["aoi_area_hectares"] * 10000
+            ),
+            "report_html": report_html,
+            "created_at": now - datetime.timedelta(minutes=rng.randrange(365 * 24 * 60)),
+        })
+    _insert(db, models.AnalysisReport, report_rows)
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=4000)
+    parser.add_argument("--properties", type=int, default=8000)
+    parser.add_argument("--reports", type=int, default=8000)
+    args = parser.parse_args()
+
+    from init_db import init_db
+    from app.db.session import SessionLocal
+
+    init_db()
+    db = SessionLocal()
+    start = time.perf_counter()
+    seed(db, args.users, args.clients, args.properties, args.reports)
+    db.close()
+    print(f"Seeded {args.users} users, {args.clients} clients, {args.properties} properties, "
+          f"{args.reports} reports in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
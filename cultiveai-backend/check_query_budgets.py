@@ -0,0 +1,197 @@
+"""
+Verifica o orcamento de consultas SQL das rotas (@query_budget).
+
+Aplica as migracoes num banco (SQLite temporario por padrao, ou o
+DATABASE_URL informado), cria um usuario com poucos dados e outro com
+muitos, e chama cada rota com orcamento como cada um deles, contando os
+comandos SQL pelo cabecalho X-Query-Count (QUERY_DEBUG). O cache de
+tokens e o indice espacial sao limpos antes de cada chamada, entao a
+contagem e a do pior caso. Termina com codigo 1 se alguma rota passar do
+orcamento, se a contagem crescer com o tamanho dos dados (N+1) ou se uma
+rota com orcamento nao for exercitada aqui.
+
+Uso:
+    python check_query_budgets.py
+    DATABASE_URL=postgresql://... python check_query_budgets.py
+"""
+import os
+import random
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, "benchmarks"))
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'budgets.db')}"
+os.environ["QUERY_DEBUG"] = "true"
+
+from fastapi.testclient import TestClient
+
+from app import models
+from app.api import endpoints
+from app.core.security import create_access_token, get_password_hash
+from app.crud import crud_geometry
+from app.db.session import SessionLocal
+from app.main import app
+from app.services.auth_cache import auth_cache
+from app.services.spatial_index import property_index
+from fakes import install
+from init_db import init_db
+from seed import boundary, cpf
+
+API = "/api/v1"
+PASSWORD = "budget-password"
+
+
+def seed(db, email: str, clients: int, properties_per_client: int, reports_per_property: int) -> dict:
+    rng = random.Random(clients)
+    user = models.User(email=email, hashed_password=get_password_hash(PASSWORD, rounds=4))
+    db.add(user)
+    db.flush()
+    ids = {"email": email, "clients": [], "properties": [], "reports": [], "changes": [], "boundary": None}
+    for c in range(clients):
+        client = models.Client(name=f"Cliente {c}", document=cpf(rng), city="Goiânia", owner_id=user.id)
+        db.add(client)
+        db.flush()
+        ids["clients"].append(client.id)
+        for p in range(properties_per_client):
+            geojson = boundary(rng)
+            geometry = models.Geometry(hash=crud_geometry.geometry_hash(geojson), geojson=geojson)
+            prop = models.Property(name=f"Fazenda {c}-{p}", client_id=client.id, boundary_geometry=geometry)
+            db.add(prop)
+            db.flush()
+            ids["properties"].append(prop.id)
+            # The first property's, as the requests use that property
+            ids["boundary"] = ids["boundary"] or geojson
+            for _ in range(reports_per_property):
+                report = models.AnalysisReport(
+                    owner_id=user.id, property_id=prop.id, aoi_geometry=geometry, aoi_area_hectares=10.0,
+                    ndvi_stats={"min": 0.1, "mean": 0.5, "max": 0.8},
+                    degradation_summary=[{"class_name": "Pastagem Boa", "percentage": 100.0, "area_hectares": 10.0}],
+                    analysis_period={"start_date": "2026-01-01", "end_date": "2026-06-30"},
+                    satellite_image_info={"id": "x", "cloud_percentage": 1.0}, map_layers_urls={},
+                    ai_description="Pastagem em boas condições.", report_html="<html></html>",
+                )
+                db.add(report)
+                change = models.ChangeReport(
+                    owner_id=user.id, aoi_geometry=geometry, aoi_area_hectares=10.0,
+                    before_period={"start_date": "2025-01-01", "end_date": "2025-06-30", "scenes": 3},
+                    after_period={"start_date": "2026-01-01", "end_date": "2026-06-30", "scenes": 3},
+                    ndvi_stats={band: {"min": 0.1, "mean": 0.5, "max": 0.8} for band in ("before", "after", "change")},
+                    transitions=[{"from_class": "Pastagem Boa", "to_class": "Pastagem Boa", "area_hectares": 10.0}],
+                    map_layers_urls={},
+                )
+                db.add(change)
+                db.flush()
+                ids["reports"].append(report.id)
+                ids["changes"].append(change.id)
+    db.commit()
+    return ids
+
+
+def requests_for(ids: dict) -> list:
+    """(route, path, options) per budgeted route, in an order that keeps the ids valid."""
+    token = create_access_token(ids["email"])
+    auth = {"headers": {"Authorization": f"Bearer {token}"}}
+    cid, pid, rid, chid = ids["clients"][0], ids["properties"][0], ids["reports"][0], ids["changes"][0]
+    suffix = ids["email"].split("@")[0]
+    return [
+        ("POST /auth/register", "/auth/register", {"json": {"email": f"new-{suffix}@example.com", "password": PASSWORD}}),
+        ("POST /auth/login", "/auth/login", {"data": {"username": ids["email"], "password": PASSWORD}}),
+        ("GET /auth/me", "/auth/me", auth),
+        ("PUT /auth/me", "/auth/me", {**auth, "json": {"full_name": "Produtor"}}),
+        ("GET /clients/", "/clients/", auth),
+        ("GET /clients/count", "/clients/count", auth),
+        ("GET /clients/{client_id}", f"/clients/{cid}", auth),
+        ("POST /clients/", "/clients/", {**auth, "json": {"name": "Novo cliente"}}),
+        ("PUT /clients/{client_id}", f"/clients/{cid}", {**auth, "json": {"name": "Cliente renomeado"}}),
+        ("GET /properties/", "/properties/", auth),
+        ("GET /properties/count", "/properties/count", auth),
+        ("GET /properties/map", "/properties/map", {**auth, "params": {"bbox": "-54,-20,-46,-13", "zoom": 8}}),
+        ("GET /properties/intersecting", "/properties/intersecting", {**auth, "params": {"bbox": "-54,-20,-46,-13"}}),
+        ("GET /properties/{property_id}", f"/properties/{pid}", auth),
+        ("POST /properties/", "/properties/", {**auth, "json": {
+            "name": "Nova fazenda", "client_id": cid, "geojson_boundary": ids["boundary"],
+        }}),
+        ("PUT /properties/{property_id}", f"/properties/{pid}", {**auth, "json": {"name": "Fazenda renomeada"}}),
+        ("GET /analysis/", "/analysis/", auth),
+        ("GET /analysis/{report_id}", f"/analysis/{rid}", auth),
+        ("GET /analysis/{report_id}/download", f"/analysis/{rid}/download", {"params": {"token": token}}),
+        ("POST /analysis/", "/analysis/", {
+            "headers": {**auth["headers"], "Idempotency-Key": f"budget-{suffix}"},
+            "json": {**ids["boundary"], "property_id": pid},
+        }),
+        ("POST /analysis/change", "/analysis/change", {**auth, "json": {
+            **ids["boundary"],
+            "before": {"start_date": "2025-01-01", "end_date": "2025-06-30"},
+            "after": {"start_date": "2026-01-01", "end_date": "2026-06-30"},
+        }}),
+        ("GET /analysis/change/{change_id}", f"/analysis/change/{chid}", auth),
+        ("GET /dashboard/summary", "/dashboard/summary", auth),
+        ("DELETE /analysis/{report_id}", f"/analysis/{rid}", auth),
+        ("DELETE /analysis/change/{change_id}", f"/analysis/change/{chid}", auth),
+        ("DELETE /properties/{property_id}", f"/properties/{pid}", auth),
+        ("DELETE /clients/{client_id}", f"/clients/{cid}", auth),
+    ]
+
+
+def budgeted_routes() -> dict:
+    """Declared budget of each route, keyed like requests_for."""
+    budgets = {}
+    for prefix in ("auth", "clients", "properties", "analysis", "dashboard"):
+        for route in getattr(endpoints, prefix).router.routes:
+            budget = getattr(route.endpoint, "query_budget", None)
+            if budget is not None:
+                for method in route.methods:
+                    budgets[f"{method} /{prefix}{route.path}"] = budget
+    return budgets
+
+
+def main():
+    init_db()
+    install()
+    db = SessionLocal()
+    small = seed(db, "small@example.com", clients=1, properties_per_client=1, reports_per_property=1)
+    large = seed(db, "large@example.com", clients=40, properties_per_client=3, reports_per_property=2)
+    db.close()
+
+    budgets = budgeted_routes()
+    counts = {}
+    failures = []
+    client = TestClient(app)
+    for size, ids in (("small", small), ("large", large)):
+        for route, path, options in requests_for(ids):
+            auth_cache.clear()
+            property_index.clear()
+            method = route.split()[0]
+            response = client.request(method, f"{API}{path}", **options)
+            if response.status_code >= 400:
+                failures.append(f"{route} ({size}): HTTP {response.status_code} {response.text[:200]}")
+                continue
+            counts.setdefault(route, {})[size] = int(response.headers["X-Query-Count"])
+
+    print(f"{'route':<40} {'small':>6} {'large':>6} {'budget':>7}")
+    for route, by_size in counts.items():
+        budget = budgets.get(route)
+        print(f"{route:<40} {by_size.get('small', '-'):>6} {by_size.get('large', '-'):>6} "
+              f"{budget if budget is not None else '-':>7}")
+        if budget is None:
+            failures.append(f"{route}: no @query_budget")
+            continue
+        for size, used in by_size.items():
+            if used > budget:
+                failures.append(f"{route} ({size}): {used} statements, budget {budget}")
+        if by_size.get("large", 0) > by_size.get("small", 0):
+            failures.append(f"{route}: {by_size.get('small')} statements with 1 row, {by_size['large']} with many")
+    failures += [f"{route}: has a budget but is not checked here" for route in budgets if route not in counts]
+
+    if failures:
+        print("\n".join(["", *failures]))
+        sys.exit(1)
+    print(f"\n{len(counts)} routes within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Verifica os planos de execucao das consultas de app/crud.
+
+Aplica as migracoes num banco (SQLite temporario por padrao, ou o
+DATABASE_URL informado), popula dados sinteticos, executa cada funcao de
+CRUD capturando os SELECTs emitidos e roda EXPLAIN sobre cada um. Termina
+com codigo 1 se alguma consulta fizer varredura sequencial de tabela.
+
+Uso:
+    python check_query_plans.py
+    DATABASE_URL=postgresql://... python check_query_plans.py
+"""
+import asyncio
+import os
+import re
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'plans.db')}"
+
+from sqlalchemy import event, select
+
+from app import models
+from app.db.base import Base
+from app.crud import crud_analysis, crud_client, crud_dashboard, crud_geometry, crud_property, crud_user
+from app.services.auth_cache import auth_cache
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine
+from init_db import init_db
+
+SQLITE_FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+POSTGRES_SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+def seed(db) -> models.User:
+    users = []
+    for u in range(3):
+        user = models.User(email=f"plans{u}@cultiveai.local", hashed_password="x")
+        db.add(user)
+        users.append(user)
+    aoi = models.Geometry(hash=crud_geometry.geometry_hash({}), geojson={})
+    db.add(aoi)
+    db.flush()
+    for user in users:
+        for c in range(20):
+            client = models.Client(name=f"Cliente {c}", city="São José", document="52998224725", owner_id=user.id)
+            db.add(client)
+            db.flush()
+            for p in range(3):
+                prop = models.Property(name=f"Fazenda {c}-{p}", city="Goiânia", client_id=client.id)
+                db.add(prop)
+                db.flush()
+                db.add(models.AnalysisReport(
+                    owner_id=user.id, property_id=prop.id, aoi_geometry_id=aoi.id, aoi_area_hectares=10.0,
+                    ndvi_stats={"mean": 0.5}, degradation_summary=[],
+                ))
+    db.commit()
+    return users[0]
+
+
+async def exercise_crud(db, user_id: int, email: str) -> None:
+    """Call every read path in app/crud with realistic arguments."""
+    await crud_user.get_user_by_email(db, email=email)
+    await crud_user.get_user_by_id(db, user_id=user_id)
+    auth_cache.clear()
+    await auth_cache.get(db, "token")
+
+    clients, _, cursor = await crud_client.get_clients(db, owner_id=user_id, limit=5)
+    await crud_client.get_clients(db, owner_id=user_id, limit=5, cursor=cursor)
+    await crud_client.get_clients(db, owner_id=user_id, limit=5, search="Sao Jose")
+    await crud_client.get_clients(db, owner_id=user_id, limit=5, search="Jose 98123")
+    await crud_client.get_clients(db, owner_id=user_id, limit=5, search="529.982")
+    await crud_client.get_clients_count(db, owner_id=user_id)
+    await crud_client.get_clients_count(db, owner_id=user_id, search="cliente")
+    await crud_client.get_client(db, client_id=clients[0].id, owner_id=user_id)
+    await crud_client.get_client_properties_count(db, clients[0].id)
+    await crud_client.get_clients_properties_counts(db, [client.id for client in clients])
+
+    props, _, cursor = await crud_property.get_properties(db, owner_id=user_id, limit=5)
+    await crud_property.get_properties(db, owner_id=user_id, limit=5, cursor=cursor)
+    await crud_property.get_properties(db, owner_id=user_id, limit=5, client_id=clients[0].id)
+    await crud_property.get_properties(db, owner_id=user_id, limit=5, search="fazenda")
+    await crud_property.get_properties_count(db, owner_id=user_id, client_id=clients[0].id)
+    await crud_property.get_property(db, property_id=props[0].id, owner_id=user_id)
+    await crud_property.get_property_reports_count(db, props[0].id)
+    await crud_property.get_properties_reports_counts(db, [prop.id for prop in props])
+
+    reports, _, cursor = await crud_analysis.get_user_reports(db, user_id=user_id, limit=5)
+    await crud_analysis.get_user_reports(db, user_id=user_id, limit=5, cursor=cursor)
+    _, _, cursor = await crud_analysis.get_user_report_summaries(db, user_id=user_id, limit=5)
+    await crud_analysis.get_user_report_summaries(db, user_id=user_id, limit=5, cursor=cursor)
+    await crud_analysis.get_user_report_summaries(db, user_id=user_id, limit=5, fields=["aoi_geojson"])
+    await crud_analysis.get_user_reports_count(db, user_id=user_id)
+    await crud_analysis.get_analysis_report(db, report_id=reports[0].id)
+
+    await crud_client.get_client_revision(db, client_id=clients[0].id, owner_id=user_id)
+    await crud_client.get_clients_revision(db, owner_id=user_id)
+    await crud_property.get_property_revision(db, property_id=props[0].id, owner_id=user_id)
+    await crud_property.get_properties_revision(db, owner_id=user_id)
+    await crud_property.get_map_properties(db, owner_id=user_id, bounds=(-54, -20, -46, -13), zoom_level=8, min_extent=0.01)
+    await crud_property.get_map_properties(db, owner_id=user_id, bounds=(-54, -20, -46, -13), zoom_level=None, min_extent=0)
+    await crud_analysis.get_report_revision(db, report_id=reports[0].id)
+    await crud_analysis.get_reports_revision(db, user_id=user_id)
+    await crud_analysis.get_tile_source(db, report_id=reports[0].id)
+    await crud_analysis.get_change_report(db, change_id=1)
+    await crud_analysis.get_change_tile_source(db, change_id=1)
+
+    await crud_geometry.get_or_create_ids(db, [{}])
+
+    await crud_dashboard.get_dashboard_summary(db, owner_id=user_id)
+    await crud_dashboard.rebuild(db, owner_id=user_id)
+    await crud_dashboard.apply(db, user_id, crud_dashboard.SummaryDelta())
+    await crud_dashboard.report_delta(db, reports[0], -1)
+    await crud_dashboard.properties_delta(db, [prop.id for prop in props])
+    await crud_dashboard.properties_delta(
+        db, select(models.Property.id).where(models.Property.client_id == clients[0].id)
+    )
+
+    # Child lookups by foreign key, as ON DELETE CASCADE does them
+    client = await crud_client.get_client(db, client_id=clients[0].id, owner_id=user_id)
+    await db.refresh(client, ["properties"])
+    for prop in client.properties:
+        await db.refresh(prop, ["reports"])
+
+
+async def capture_selects(db, user_id: int, email: str):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        await exercise_crud(db, user_id, email)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+async def full_scans(conn, statement, parameters):
+    dialect = async_engine.dialect.name
+    if dialect == "sqlite":
+        rows = (await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)).all()
+        plan = [row[-1] for row in rows]
+        # SCAN of a materialized subquery (e.g. FTS hits) is not a table scan
+        scans = [m.group(1) for m in (SQLITE_FULL_SCAN.match(line) for line in plan)
+                 if m and m.group(1) in Base.metadata.tables]
+    elif dialect == "postgresql":
+        rows = (await conn.exec_driver_sql("EXPLAIN " + statement, parameters)).all()
+        plan = [row[0] for row in rows]
+        scans = [m.group(1) for m in (POSTGRES_SEQ_SCAN.search(line) for line in plan) if m]
+    else:
+        raise SystemExit(f"Unsupported dialect: {dialect}")
+    return scans, plan
+
+
+async def check_plans(user_id: int, email: str) -> int:
+    async with AsyncSessionLocal() as db:
+        statements = await capture_selects(db, user_id, email)
+        conn = await db.connection()
+        if async_engine.dialect.name == "postgresql":
+            # Tiny seeded tables make seq scans cheapest; only fail when no index can serve the query
+            await conn.exec_driver_sql("SET enable_seqscan = off")
+
+        failures = 0
+        for statement, parameters in statements:
+            scans, plan = await full_scans(conn, statement, parameters)
+            if scans:
+                failures += 1
+                print(f"FULL SCAN on {', '.join(scans)}:\n  {' '.join(statement.split())}")
+                print("  " + "\n  ".join(plan))
+        print(f"{len(statements)} queries checked, {failures} with full table scans")
+    await async_engine.dispose()
+    return failures
+
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        user = seed(db)
+        user_id, email = user.id, user.email
+    finally:
+        db.close()
+    failures = asyncio.run(check_plans(user_id, email))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
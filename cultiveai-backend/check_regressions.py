@@ -0,0 +1,172 @@
+"""
+Verifica cenarios de concorrencia e de cache que ja corromperam dados.
+
+Aplica as migracoes num banco (SQLite temporario por padrao, ou o
+DATABASE_URL informado), executa cada verificacao e termina com codigo 1
+se alguma falhar. As verificacoes de concorrencia so exercitam bloqueios
+de linha no PostgreSQL: no SQLite os escritores ja sao serializados.
+
+Uso:
+    python check_regressions.py
+    DATABASE_URL=postgresql://... python check_regressions.py
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'regressions.db')}"
+
+from sqlalchemy import func, select
+
+from app import models
+from app.crud import crud_analysis, crud_dashboard, crud_user
+from app.services import import_service
+from app.services.auth_cache import VERSION_TTL, AuthCache, auth_cache
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine
+from init_db import init_db
+
+
+
+def aoi(west: float) -> dict:
+    ring = [[west, -16], [west + 0.01, -16], [west + 0.01, -15.99], [west, -15.99], [west, -16]]
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def seed(db) -> models.Property:
+    user = models.User(email="regressions@cultiveai.local", hashed_password="x")
+    db.add(user)
+    db.flush()
+    client = models.Client(name="Cliente", owner_id=user.id)
+    db.add(client)
+    db.flush()
+    prop = models.Property(name="Fazenda", client_id=client.id)
+    db.add(prop)
+    db.commit()
+    return prop
+
+
+async def create_report(owner_id: int, property_id: int, west: float, class_name: str, area: float) -> None:
+    async with AsyncSessionLocal() as db:
+        await crud_analysis.create_analysis_report(db, {
+            "aoi_geojson": aoi(west), "property_id": property_id, "aoi_area_hectares": area,
+            "degradation_summary": [{"class_name": class_name, "area_hectares": area}],
+            "map_layers_urls": {"ndvi_url": "https://tiles.example/expired/{z}/{x}/{y}"},
+        }, owner_id)
+
+
+async def check_concurrent_reports(owner_id: int, property_id: int) -> None:
+    """Two reports of one property created at once: only the latest counts in class_areas."""
+    async with AsyncSessionLocal() as db:
+        await crud_dashboard.get_dashboard_summary(db, owner_id)
+    async with AsyncSessionLocal() as holder:
+        # Both writers queue behind this lock with their inserts (at most) flushed;
+        # distinct AOIs so that the geometries unique index does not serialize them first
+        await crud_dashboard.lock(holder, owner_id)
+        writers = asyncio.gather(
+            create_report(owner_id, property_id, -49.0, "Degradada", 5.0),
+            create_report(owner_id, property_id, -48.0, "Saudavel", 7.0),
+        )
+        await asyncio.sleep(0.5)
+        await holder.commit()
+        await writers
+    async with AsyncSessionLocal() as db:
+        stored = dict((await db.get(models.DashboardSummary, owner_id)).class_areas)
+        expected = dict((await crud_dashboard.rebuild(db, owner_id)).class_areas)
+        await db.rollback()
+    assert stored == expected, f"class_areas {stored}, rebuilt {expected}"
+
+
+async def check_cp1252_geojson(owner_id: int, client_id: int) -> None:
+    """A non-UTF-8 GeoJSON is a format error (400), and nothing of it is saved."""
+    features = [
+        {"type": "Feature", "properties": {"nome": name}, "geometry": aoi(-47.0)}
+        for name in ("Fazenda Boa Vista", "Fazenda São João")
+    ]
+    data = json.dumps({"type": "FeatureCollection", "features": features}, ensure_ascii=False).encode("cp1252")
+    async with AsyncSessionLocal() as db:
+        count = select(func.count(models.Property.id))
+        before = await db.scalar(count)
+        try:
+            await import_service.import_properties(
+                db, io.BytesIO(data), "geojson", owner_id=owner_id, default_client_id=client_id
+            )
+        except import_service.ImportFormatError as exc:
+            assert str(exc).startswith("JSON inválido"), exc
+        else:
+            raise AssertionError("import accepted a CP1252 file")
+        assert await db.scalar(count) == before, "rows of the rejected file were saved"
+
+
+async def check_report_tile_refresh(owner_id: int, property_id: int) -> None:
+    """Replacing an expired tile URL changes the report and report list validators (no stale 304)."""
+    await create_report(owner_id, property_id, -46.0, "Saudavel", 3.0)
+    async with AsyncSessionLocal() as db:
+        report_id = await db.scalar(select(func.max(models.AnalysisReport.id)))
+        before = (
+            await crud_analysis.get_report_revision(db, report_id), await crud_analysis.get_reports_revision(db, owner_id)
+        )
+        await crud_analysis.set_map_layer_url(db, report_id, "ndvi_url", "https://tiles.example/{z}/{x}/{y}")
+        after = (
+            await crud_analysis.get_report_revision(db, report_id), await crud_analysis.get_reports_revision(db, owner_id)
+        )
+    assert before[0] != after[0], f"report revision unchanged: {after[0]}"
+    assert before[1] != after[1], f"report list revision unchanged: {after[1]}"
+
+
+async def check_deactivation(owner_id: int) -> None:
+    """Deactivating a user drops its cached tokens here and, within VERSION_TTL, on the other workers."""
+    other_worker = AuthCache(ttl=600)
+    async with AsyncSessionLocal() as db:
+        user = await crud_user.get_user_by_id(db, owner_id)
+        for cache in (auth_cache, other_worker):
+            await cache.get(db, "token")
+            cache.put("token", user, time.time() + 600)
+        await crud_user.set_user_active(db, user, False)
+        assert await auth_cache.get(db, "token") is None, "this worker still has the token"
+        await asyncio.sleep(VERSION_TTL)
+        assert await other_worker.get(db, "token") is None, "another worker still has the token"
+        await crud_user.set_user_active(db, user, True)
+
+
+async def run_checks(owner_id: int, client_id: int, property_id: int) -> int:
+    checks = [
+        ("concurrent reports", check_concurrent_reports(owner_id, property_id)),
+        ("cp1252 geojson import", check_cp1252_geojson(owner_id, client_id)),
+        ("report tile refresh", check_report_tile_refresh(owner_id, property_id)),
+        ("user deactivation", check_deactivation(owner_id)),
+    ]
+    failures = 0
+    for name, check in checks:
+        try:
+            await check
+            print(f"ok    {name}")
+        except Exception as exc:
+            failures += 1
+            print(f"FAIL  {name}: {type(exc).__name__}: {exc}")
+    print(f"{len(checks)} checks, {failures} failed")
+    await async_engine.dispose()
+    return failures
+
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        prop = seed(db)
+        owner_id, client_id, property_id = prop.client.owner_id, prop.client_id, prop.id
+    finally:
+        db.close()
+    failures = asyncio.run(run_checks(owner_id, client_id, property_id))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,42 @@
 """
 Script para inicializar/atualizar o banco de dados.
-Execute este script sempre que houver mudancas nos models.
+Execute este script sempre que houver mudancas nos models
+(aplica as migracoes do Alembic ate a ultima revisao).
 """
 import sys
 import os
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # Add the app directory to the path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
 
-from app.db.base import Base
 from app.db.session import engine
 
+# Schema previously produced by Base.metadata.create_all()
+BASELINE_REVISION = "6667d08e192a"
+
+
+def get_alembic_config() -> Config:
+    config = Config(os.path.join(BASE_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BASE_DIR, "alembic"))
+    return config
+
+
 def init_db():
-    """Create all tables in the database."""
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created successfully!")
+    """Apply all pending migrations to the database."""
+    config = get_alembic_config()
+    tables = inspect(engine).get_table_names()
+    if "users" in tables and "alembic_version" not in tables:
+        print("Existing schema without migration history, stamping baseline...")
+        command.stamp(config, BASELINE_REVISION)
+    print("Applying database migrations...")
+    command.upgrade(config, "head")
+    print("Database is up to date!")
 
 if __name__ == "__main__":
     init_db()
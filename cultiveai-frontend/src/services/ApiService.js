@@ -146,6 +146,19 @@ export default {
     return apiClient.delete(`/clients/${clientId}`);
   },
 
+  importClients(file, params = {}) {
+    const form = new FormData();
+    form.append("file", file);
+    return apiClient.post("/clients/import", form, {
+      params,
+      headers: { "Content-Type": "multipart/form-data" },
+    });
+  },
+
+  exportClients(params = {}) {
+    return apiClient.get("/clients/export", { params, responseType: "blob" });
+  },
+
   // Properties
   getProperties(params = {}) {
     return apiClient.get("/properties/", { params });
@@ -171,13 +184,35 @@ export default {
     return apiClient.delete(`/properties/${propertyId}`);
   },
 
+  importProperties(file, params = {}) {
+    const form = new FormData();
+    form.append("file", file);
+    return apiClient.post("/properties/import", form, {
+      params,
+      headers: { "Content-Type": "multipart/form-data" },
+    });
+  },
+
+  exportProperties(params = {}) {
+    return apiClient.get("/properties/export", { params, responseType: "blob" });
+  },
+
   // Analysis
   analyzeArea(geojson, propertyId = null) {
     const data = { ...geojson };
     if (propertyId) {
       data.property_id = propertyId;
     }
-    return apiClient.post("/analysis/", data);
+    // One key per submission: retries of this request (e.g. after a token refresh) get the same report
+    const idempotencyKey =
+      globalThis.crypto?.randomUUID?.() ?? `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    return apiClient.post("/analysis/", data, {
+      headers: { "Idempotency-Key": idempotencyKey },
+    });
+  },
+
+  getDashboardSummary() {
+    return apiClient.get("/dashboard/summary");
   },
 
   getAnalysisReports(params = {}) {
@@ -195,4 +230,11 @@ export default {
   downloadReportUrl(reportId) {
     return `${apiClient.defaults.baseURL}/analysis/${reportId}/download?token=${getToken()}`;
   },
+
+  // tile_urls of a report are relative to the API; their Earth Engine tokens are renewed by the API
+  tileLayerUrls(tileUrls = {}) {
+    return Object.fromEntries(
+      Object.entries(tileUrls).map(([key, path]) => [key, `${apiClient.defaults.baseURL}${path}`])
+    );
+  },
 };